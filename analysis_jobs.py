@@ -0,0 +1,389 @@
+import io
+import re
+import threading
+import time
+import traceback
+
+from job_queue import JobQueue
+from metrics import instrument, timed
+from json_parse import generate_json
+from model_clients import get_model
+from upload_registry import get_registry
+from upload_pipeline import StageTimer, start_upload, upload_status_text
+
+# ==========================================
+# 분석 작업 함수 (백그라운드 작업 큐에서 실행)
+# ==========================================
+# 각 화면의 분석 로직을 Streamlit 호출 없이 작업 스레드에서 돌 수 있도록 모은 것.
+# 작업 함수는 handler(payload, ctx) 형태이며, 결과 보관소에 그대로 넣을 수 있는
+# {"title", "data", "files"} dict를 반환한다. (1-1 일괄 평가 항목은 업체별 결과 dict)
+# ctx.progress()/ctx.emit() 호출 시점마다 취소 요청을 확인한다.
+
+_queue = None
+_queue_lock = threading.Lock()
+_evaluator = None
+
+
+def get_plan_evaluator():
+    """1-1 평가기 (단건/일괄 공용, 프로세스당 1개). 디스크 캐시 + 공유 업로드 레지스트리 + 수정본 비교 저장소"""
+    global _evaluator
+    if _evaluator is None:
+        with _queue_lock:
+            if _evaluator is None:
+                from eval_cache import EvalCache
+                from plan_eval import PlanEvaluator
+                from revision_store import get_revision_store
+                _evaluator = PlanEvaluator(get_registry(), EvalCache(), revisions=get_revision_store())
+    return _evaluator
+
+
+def _upload_progress(ctx):
+    return lambda status, elapsed: ctx.progress(upload_status_text(status, elapsed))
+
+
+def _unchanged(revision):
+    """이전 제출본과 내용이 같은 재제출 (평가 이력에 같은 평가가 중복으로 쌓이지 않도록 기록 생략)"""
+    return revision is not None and not revision["changed"]
+
+
+def _record_history(kind, payload, make_record, **fields):
+    """
+    완료된 평가를 이력 저장소에 기록 (업체명은 입력값 또는 파일명).
+    make_record: 결과 -> {"items": 이력 항목, 그 밖의 기록 필드} (변환 오류도 아래에서 함께 잡도록 함수로 받음).
+    기록은 부가 기능이므로 항목 변환/DB 오류 등 어떤 실패도 이미 끝난 평가를 실패로 만들지 않는다
+    """
+    from batch_eval import contractor_name
+    from eval_history import get_eval_history
+    try:
+        record = {**fields, **make_record()}
+        items = record.pop("items")
+        get_eval_history().record(kind, payload.get("contractor") or contractor_name(payload["file_name"]), items,
+                                  project=payload.get("project", ""), file_name=payload["file_name"], **record)
+    except Exception:
+        traceback.print_exc()
+
+
+# ------------------------------------------------------------------------------
+# 1-1. 계획서 평가 (단건 / 일괄 항목)
+# ------------------------------------------------------------------------------
+def run_plan_eval(payload, ctx):
+    from pdf_text import describe as describe_prepass
+    from revision_store import describe as describe_revision
+    from eval_history import KIND_PLAN, plan_items
+    from plan_eval import eligibility, total_score
+    eval_started = time.perf_counter()
+    eval_timer = StageTimer()
+    eval_info = {}
+    if payload.get("chunk_pages"): ctx.progress("⏳ 페이지 구간별 증거 추출 중...")
+    eval_data, from_cache = get_plan_evaluator().evaluate(
+        payload["pdf_bytes"], timer=eval_timer,
+        on_progress=_upload_progress(ctx),
+        on_generate=lambda: ctx.progress("⏳ AI 분석 중..."),
+        chunk_pages=payload.get("chunk_pages"),
+        info=eval_info,
+        on_item=ctx.emit,
+        title=payload["file_name"],
+    )
+    if not isinstance(eval_data, list):
+        raise ValueError("데이터 형식 오류")
+
+    eval_captions = []
+    if "prepass" in eval_info:
+        eval_captions.append(describe_prepass(eval_info["prepass"]))
+    if "local_items" in eval_info:
+        eval_captions.append(f"🔎 키워드 사전 채점: {eval_info['local_items']}개 항목 로컬 확정 / {eval_info['llm_items']}개 항목 AI 채점")
+    if "revision" in eval_info:
+        eval_captions.append(describe_revision(eval_info["revision"]))
+    if from_cache:
+        eval_captions.append("⚡ 이전에 평가한 동일 문서입니다. 저장된 결과를 표시합니다. (API 호출 없음)")
+    else:
+        eval_captions.append(f"⏱️ {eval_timer.summary()}")
+    # 캐시 결과(같은 문서 재조회)나 내용이 바뀌지 않은 재제출은 새 평가가 아니므로 이력에 넣지 않는다
+    if not eval_info.get("partial") and not from_cache and not _unchanged(eval_info.get("revision")):
+        _record_history(KIND_PLAN, payload,
+                        lambda: {"items": plan_items(eval_data), "grade": eligibility(total_score(eval_data))[2]},
+                        model=get_plan_evaluator().model_id, elapsed=time.perf_counter() - eval_started,
+                        timings=eval_timer.timings)
+    return {"title": payload["file_name"],
+            "data": {"eval_data": eval_data, "captions": eval_captions, "notes": eval_info["notes"],
+                     "revision": eval_info.get("revision")}}
+
+
+def run_plan_batch_item(payload, ctx):
+    from batch_eval import evaluate_one
+    from eval_history import KIND_PLAN, plan_items
+    ctx.progress("⏳ 채점 중...")
+    result = evaluate_one(get_plan_evaluator(), payload["file_name"], payload["pdf_bytes"])
+    if not result["error"] and not result["from_cache"] and not result["unchanged"]:
+        _record_history(KIND_PLAN, payload, lambda: {"items": plan_items(result["items"])}, grade=result["eligibility"],
+                        model=get_plan_evaluator().model_id, elapsed=result["elapsed"], timings=result["timings"])
+    return result
+
+
+# ------------------------------------------------------------------------------
+# 1-2. 위험성평가 적정성 검토
+# ------------------------------------------------------------------------------
+def run_risk_review(payload, ctx):
+    from pdf_text import prepare_document, describe as describe_prepass, text_parts as prepass_text_parts
+    from excel_text import prepare_workbook, describe as describe_workbook
+    from risk_lint import lint, findings_text, describe as describe_lint
+    from risk_eval import (RISK_REVIEW_SCHEMA, RISK_REVIEW_PROMPT, find_revision, pdf_revision_units, review_chunks,
+                           review_model, review_revision, save_revision)
+    from revision_store import get_revision_store, describe as describe_revision
+    from eval_history import KIND_RISK_REVIEW, risk_items
+    from risk_eval import RISK_REVIEW_MODEL_ID
+
+    review_started = time.perf_counter()
+    file_ext = payload["file_name"].split('.')[-1].lower()
+    model_input = []
+    risk_timer = StageTimer()
+    review_captions, review_warnings = [], []
+    review_facts, review_checks = "", []
+    risk_upload = None
+    revision_units, revision = None, None
+    revision_store = get_revision_store()
+
+    def review_result(result_data, complete=True):
+        # 완전한 검토 결과는 평가 이력에 기록하고 다음 수정본 비교 기준으로 저장 (바뀐 내용이 없던 재제출은 둘 다 생략)
+        review_captions.append(f"⏱️ {risk_timer.summary()}")
+        if complete and not _unchanged(revision):
+            _record_history(KIND_RISK_REVIEW, payload, lambda: {"items": risk_items(result_data)}, model=RISK_REVIEW_MODEL_ID,
+                            elapsed=time.perf_counter() - review_started, timings=risk_timer.timings)
+        if complete and revision_units is not None and (revision is None or revision["changed"]):
+            save_revision(revision_store, payload["file_name"], revision_units, result_data)
+        return {"title": payload["file_name"],
+                "data": {"items": result_data, "captions": review_captions, "warnings": review_warnings,
+                         "checks": review_checks, "revision": revision}}
+
+    try:
+        # PDF는 텍스트 레이어를 먼저 추출하고, 스캔 페이지가 있으면 그 부분만 업로드
+        # (업로드는 백그라운드에서 시작하고, 업로드 중에 프롬프트/모델을 준비)
+        if file_ext == 'pdf':
+            with risk_timer.stage("text_extraction"):
+                risk_prep = prepare_document(payload["file_bytes"])
+            review_captions.append(describe_prepass(risk_prep))
+            model_input.extend(prepass_text_parts(risk_prep))
+            revision_units = pdf_revision_units(risk_prep)
+            if risk_prep["upload_bytes"]:
+                risk_upload = start_upload(get_registry(), risk_prep["upload_bytes"], timer=risk_timer)
+
+        # 1. Excel 처리 (머리글/빈 열/중복 행 정리 후 토큰 예산별 구간 분할)
+        if file_ext in ['xlsx', 'xls']:
+            with risk_timer.stage("excel_read"):
+                workbook = prepare_workbook(io.BytesIO(payload["file_bytes"]))
+            if not workbook["chunks"]:
+                raise ValueError("엑셀에서 검토할 내용을 찾지 못했습니다.")
+            review_captions.append(describe_workbook(workbook))
+            if workbook["stats"]["truncated"]:
+                review_warnings.append("엑셀이 너무 커서 앞부분만 검토했습니다. 시트를 나누어 다시 제출하면 전체를 검토할 수 있습니다.")
+            # 기계적으로 확인 가능한 결함은 로컬에서 집계해 사실로 전달
+            with risk_timer.stage("lint"):
+                lint_result = lint(workbook["tables"])
+            review_captions.append(describe_lint(lint_result))
+            review_facts, review_checks = findings_text(lint_result), lint_result["findings"]
+            revision_units = workbook["revision"]
+
+        # 이전에 검토한 문서의 수정본이면 바뀐 행/페이지만 보내 영향받는 항목만 다시 평가
+        if revision_units is not None:
+            with risk_timer.stage("revision_diff"):
+                revision_base = find_revision(revision_store, revision_units)
+            if revision_base is not None:
+                ctx.progress("⏳ 수정된 부분 AI 분석 중...")
+                with risk_timer.stage("generation"):
+                    result_data, revision = review_revision(revision_base, revision_units, review_facts)
+                review_captions.append(describe_revision(revision))
+                if result_data is not None:
+                    return review_result(result_data)
+
+        if file_ext in ['xlsx', 'xls']:
+            if len(workbook["chunks"]) > 1:
+                # 큰 통합 문서: 구간별 병렬 검토 후 항목별 병합
+                ctx.progress(f"⏳ AI 분석 중... (0/{len(workbook['chunks'])} 구간)")
+                with risk_timer.stage("generation"):
+                    result_data, chunk_failures = review_chunks(
+                        workbook["chunks"], facts=review_facts, on_done=lambda done, total: ctx.progress(f"⏳ AI 분석 중... ({done}/{total} 구간)"))
+                for index, error in chunk_failures:
+                    review_warnings.append(f"{index}번째 구간 검토 실패로 해당 부분은 반영되지 않았습니다: {error}")
+                return review_result(result_data, complete=not chunk_failures)
+            model_input.append(workbook["chunks"][0]["text"])
+
+        # 평가 모델 (프로세스 공용 클라이언트)
+        risk_eval_model = review_model()
+
+        # 2. PDF 처리 (스캔 페이지 업로드 완료 대기, 공유 레지스트리로 재사용)
+        if risk_upload is not None:
+            model_input.append(risk_upload.wait(on_progress=_upload_progress(ctx)))
+
+        model_input.insert(0, RISK_REVIEW_PROMPT + review_facts)
+        ctx.progress("⏳ AI 분석 중...")
+
+        risk_parse_info = {}
+        with risk_timer.stage("generation"):
+            result_data = generate_json(risk_eval_model, model_input, RISK_REVIEW_SCHEMA,
+                                        on_item=ctx.emit, info=risk_parse_info)
+    except Exception as e:
+        if risk_upload is not None:
+            risk_upload.report_error(e)
+        raise
+    finally:
+        # 원격 파일은 레지스트리가 TTL 만료 후 정리 (다른 탭에서 재사용 가능)
+        if risk_upload is not None:
+            risk_upload.close()
+
+    if not isinstance(result_data, list):
+        raise ValueError("분석 결과 형식이 올바르지 않습니다.")
+    if risk_parse_info["salvaged"]:
+        review_warnings.append("AI 응답이 출력 길이 제한으로 잘려, 완성된 항목만 표시합니다.")
+    return review_result(result_data, complete=not risk_parse_info["salvaged"])
+
+
+# ------------------------------------------------------------------------------
+# 2-1. 직접 입력형 위험성평가 생성
+# ------------------------------------------------------------------------------
+def run_risk_manual(payload, ctx):
+    from risk_excel import generate_excel_from_scratch
+    from risk_gen import RISK_MODEL_ID, RISK_GEN_CONFIG, RISK_MANUAL_PROMPT, RISK_ROWS_SCHEMA
+
+    from risk_library import get_risk_library
+
+    p_info = payload["p_info"]
+    selected_risks = payload["selected_risks"]
+    manual_captions, manual_warnings = [], []
+
+    # 검증된 행 라이브러리에서 충분히 비슷한 행이 있는 위험요인은 바로 구성, 나머지만 AI 생성
+    with timed("library"):
+        library_rows, covered, gaps = get_risk_library().lookup(p_info, selected_risks)
+    generated = []
+    if gaps or not selected_risks:
+        ctx.progress("⏳ AI 생성 중...")
+        risk_model = get_model(RISK_MODEL_ID, RISK_GEN_CONFIG)
+        prompt = RISK_MANUAL_PROMPT.format(name=p_info["name"], content=p_info["content"], risks=", ".join(gaps))
+        manual_parse_info = {}
+        with timed("generation"):
+            generated = generate_json(risk_model, prompt, RISK_ROWS_SCHEMA, info=manual_parse_info)
+        if generated is None:
+            raise ValueError("AI 응답에서 위험요인 목록을 찾지 못했습니다.")
+        if manual_parse_info["salvaged"]:
+            manual_warnings.append(f"AI 응답이 잘려 완성된 {len(generated)}개 항목만 반영했습니다.")
+    if covered:
+        rest = f" · {', '.join(gaps)}는 AI 생성" if gaps else " (AI 호출 생략)"
+        manual_captions.append(f"📚 라이브러리에서 {', '.join(covered)} {len(library_rows)}개 항목 재사용{rest}")
+
+    # 선택한 위험요인 순서대로 정렬 (분류를 알 수 없는 AI 행은 뒤에)
+    order = {hazard: i for i, hazard in enumerate(selected_risks)}
+    risk_data = sorted(library_rows + generated, key=lambda row: order.get(row.get("hazard"), len(order)))
+
+    with timed("excel_build"):
+        excel_byte = generate_excel_from_scratch(p_info, risk_data)
+    return {"title": p_info["name"],
+            "data": {"p_info": p_info, "risk_data": risk_data, "captions": manual_captions,
+                     "warnings": manual_warnings,
+                     # 라이브러리 등록 후보: 요청한 위험요인으로 분류된 AI 생성 행
+                     "new_rows": [row for row in generated if row.get("hazard") in gaps],
+                     "file_name": f"위험성평가_{p_info['name']}.xlsx"},
+            "files": {"excel": excel_byte.getvalue()}}
+
+
+# ------------------------------------------------------------------------------
+# 2-2. 계획서(PDF) 기반 위험성평가 생성
+# ------------------------------------------------------------------------------
+def run_risk_pdf(payload, ctx):
+    from pdf_chunks import page_count
+    from pdf_text import prepare_document, describe as describe_prepass, text_parts as prepass_text_parts
+    from risk_excel import generate_excel_from_scratch
+    from risk_gen import (RISK_MODEL_ID, RISK_GEN_CONFIG, RISK_PDF_PROMPT, RISK_PDF_SCHEMA,
+                          analyze_pdf_chunked, finalize_project_info)
+
+    pdf_bytes = payload["pdf_bytes"]
+    chunk_pages = payload.get("chunk_pages")
+    upload_registry = get_registry()
+    pdf_prep_timer = StageTimer()
+    raw_text = ""
+    pdf_captions, pdf_warnings = [], []
+    pdf_upload = None
+    try:
+        with pdf_prep_timer.stage("text_extraction"):
+            pdf_prep = prepare_document(pdf_bytes)
+        pdf_captions.append(describe_prepass(pdf_prep))
+
+        # 텍스트 레이어가 없는 대용량 PDF만 구간 분할 (텍스트 추출본은 이미 압축되어 있음)
+        if chunk_pages and pdf_prep["mode"] == "upload" and page_count(pdf_bytes) > chunk_pages:
+            # 대용량 PDF: 페이지 구간별 병렬 추출 후 병합
+            ctx.progress("⏳ 페이지 구간별 분할 분석 중...")
+            with pdf_prep_timer.stage("chunk_analysis"):
+                full_data, chunk_failures = analyze_pdf_chunked(upload_registry, pdf_bytes, RISK_MODEL_ID,
+                                                                chunk_pages)
+            for start, end, error in chunk_failures:
+                pdf_warnings.append(f"p.{start}~{end} 구간 분석 실패 (해당 구간 위험요인 누락 가능): {error}")
+        else:
+            # 스캔 페이지(또는 원본)만 백그라운드 업로드 (1-1에서 이미 업로드한 계획서라면 재사용)
+            pdf_contents = [RISK_PDF_PROMPT] + prepass_text_parts(pdf_prep)
+            if pdf_prep["upload_bytes"]:
+                pdf_upload = start_upload(upload_registry, pdf_prep["upload_bytes"], timer=pdf_prep_timer)
+
+            pdf_model = get_model(RISK_MODEL_ID, RISK_GEN_CONFIG)
+            pdf_parse_info = {}
+
+            if pdf_upload is not None:
+                pdf_contents.append(pdf_upload.wait(on_progress=_upload_progress(ctx)))
+            ctx.progress("⏳ AI 분석 중...")
+            with pdf_prep_timer.stage("generation"):
+                # JSON 추출 안전장치 (코드펜스/설명문 제거, 잘린 응답 복구 및 이어받기)
+                full_data = generate_json(pdf_model, pdf_contents, RISK_PDF_SCHEMA, info=pdf_parse_info)
+            raw_text = pdf_parse_info["text"]
+            if pdf_parse_info["salvaged"]:
+                pdf_warnings.append("AI 응답이 출력 길이 제한으로 잘려, 완성된 위험요인까지만 반영했습니다.")
+    except Exception as e:
+        if pdf_upload is not None:
+            pdf_upload.report_error(e)
+        raise
+    finally:
+        # 원격 파일 삭제는 레지스트리가 담당 (참조 해제만 수행)
+        if pdf_upload is not None:
+            pdf_upload.close()
+    pdf_captions.append(f"⏱️ {pdf_prep_timer.summary()}")
+
+    if full_data is None:
+        # 화면에서 AI 원문을 보여줄 수 있도록 오류 대신 원문을 돌려준다
+        return {"error": "AI 응답에서 유효한 데이터 구조를 찾지 못했습니다. 다시 시도해 주세요.", "raw_text": raw_text}
+
+    p_info_final = finalize_project_info(full_data.get("project_info"))
+    r_data = full_data.get("risk_data", [])
+
+    # 엑셀 생성 함수에 안전한 데이터를 전달
+    with timed("excel_build"):
+        excel_byte = generate_excel_from_scratch(p_info_final, r_data)
+
+    # 파일명에 에러가 나지 않도록 처리
+    safe_filename = re.sub(r'[\\/*?:"<>|]', "", p_info_final['name'])
+    return {"title": payload["file_name"],
+            "data": {"p_info": p_info_final, "risk_data": r_data, "show_overview": True,
+                     "captions": pdf_captions, "warnings": pdf_warnings,
+                     "file_name": f"위험성평가_{safe_filename}.xlsx"},
+            "files": {"excel": excel_byte.getvalue()}}
+
+
+JOB_HANDLERS = {
+    "plan_eval": run_plan_eval,
+    "plan_batch_item": run_plan_batch_item,
+    "risk_review": run_risk_review,
+    "risk_manual": run_risk_manual,
+    "risk_manual_item": run_risk_manual,    # 2-1 일괄 생성의 공사 1건 (진행 표시를 단건 생성과 분리)
+    "risk_pdf": run_risk_pdf,
+}
+# 여러 건을 한꺼번에 등록하는 일괄 작업 (작업 큐에서 낮은 우선순위 + 동시 실행 수 제한)
+BATCH_JOB_KINDS = {"plan_batch_item", "risk_manual_item"}
+
+
+def get_job_queue():
+    """프로세스 공용 작업 큐 (최초 호출 시 작업 함수 등록 + 작업 스레드 시작). 모든 작업은 실행 계측됨"""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                queue = JobQueue()
+                for kind, handler in JOB_HANDLERS.items():
+                    queue.register(kind, instrument(kind, handler), batch=kind in BATCH_JOB_KINDS)
+                queue.start()
+                _queue = queue
+    return _queue
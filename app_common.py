@@ -0,0 +1,236 @@
+import hmac
+import time
+import uuid
+
+import streamlit as st
+
+from job_queue import ACTIVE_STATUSES, STATUS_LABELS
+from model_clients import set_api_key
+from result_store import get_session_store
+
+# ==========================================
+# 페이지 공용 설정 / 화면 요소
+# ==========================================
+# 각 업무 화면(views/)은 선택된 페이지만 실행되므로, 여러 페이지가 함께 쓰는 것만 여기에 둔다.
+# 무거운 모듈(google.generativeai, pandas, openpyxl)은 실제로 쓰는 경로에서 불러온다.
+
+generation_config = {
+    "temperature": 0.0,
+    "top_p": 1,
+    "top_k": 1,
+    "max_output_tokens": 8000,
+}
+
+RESULT_TAB_LABELS = {
+    "plan_eval": "1-1 계획서 평가",
+    "plan_batch": "1-1 일괄 평가",
+    "risk_review": "1-2 위험성평가 검토",
+    "risk_manual": "2-1 입력형 생성",
+    "risk_pdf": "2-2 PDF 기반 생성",
+}
+
+# 1-1 평가 방식 (결과 종류 -> 라디오 선택지)
+PLAN_EVAL_MODES = {
+    "plan_eval": "단건 평가",
+    "plan_batch": "일괄 평가 (여러 업체)",
+}
+
+
+def configure_api():
+    """API 키 등록 (SDK는 실제 호출 시점에 불러와 설정)"""
+    try:
+        API_KEY = st.secrets["GEMINI_API_KEY"]
+    except:
+        API_KEY = "YOUR_GEMINI_API_KEY" # 로컬 테스트용 키
+    set_api_key(API_KEY)
+
+
+def admin_password():
+    """관리 화면 비밀번호 (secrets의 ADMIN_PASSWORD, 없으면 관리 화면 자체를 숨김)"""
+    try:
+        return st.secrets["ADMIN_PASSWORD"] or None
+    except:
+        return None
+
+
+def require_admin():
+    """관리 화면 진입 시 비밀번호 확인 (세션당 1회). 통과하지 못하면 화면 실행 중단"""
+    password = admin_password()
+    if password is None:
+        st.error("관리 화면이 설정되지 않았습니다. (secrets에 ADMIN_PASSWORD 필요)")
+        st.stop()
+    if st.session_state.get("admin_ok"):
+        return
+    entered = st.text_input("관리자 비밀번호", type="password", key="admin_password")
+    if entered and hmac.compare_digest(entered.encode(), str(password).encode()):
+        st.session_state["admin_ok"] = True
+        st.rerun()
+    if entered:
+        st.error("비밀번호가 맞지 않습니다.")
+    st.stop()
+
+
+def get_result_store():
+    """세션별 결과 보관소 (다운로드 클릭 등으로 재실행되어도 결과 유지, API 재호출 없음)"""
+    return get_session_store(st.session_state)
+
+
+def chunk_options(key_prefix):
+    """대용량 PDF 분할 분석 옵션 (사용 여부, 구간당 페이지 수)"""
+    from pdf_chunks import DEFAULT_CHUNK_PAGES
+    col_a, col_b = st.columns([1, 1])
+    use_split = col_a.checkbox("대용량 PDF 분할 분석", key=f"{key_prefix}_split",
+                               help="페이지 구간별로 나누어 동시에 분석한 뒤 결과를 병합합니다. (구간 페이지 수보다 긴 PDF에만 적용)")
+    chunk_pages = col_b.number_input("구간당 페이지 수", min_value=5, max_value=200, value=DEFAULT_CHUNK_PAGES, step=5,
+                                     key=f"{key_prefix}_chunk_pages", disabled=not use_split)
+    return use_split, int(chunk_pages)
+
+# ------------------------------------------------------------------------------
+# 보관된 결과 화면 (버튼 클릭 직후와 이후 재실행 모두 같은 함수로 표시)
+# ------------------------------------------------------------------------------
+def result_header(entry):
+    col_a, col_b = st.columns([5, 1])
+    col_a.caption(f"🗂️ {entry['title']} · {time.strftime('%H:%M:%S', time.localtime(entry['created']))} 결과")
+    col_b.button("결과 닫기", key=f"dismiss_{entry['id']}", on_click=get_result_store().dismiss, args=(entry['tab'],))
+
+def render_risk_excel(entry):
+    """2-1 / 2-2 생성 결과 (개요 + 엑셀 다운로드)"""
+    data = entry["data"]
+    result_header(entry)
+    for caption in data.get("captions", []):
+        st.caption(caption)
+    for warning in data["warnings"]:
+        st.warning(warning)
+
+    p_info = data["p_info"]
+    if data.get("show_overview"):
+        st.success("분석 완료!")
+        with st.expander("추출된 개요 확인", expanded=True):
+            st.write(f"**공사명:** {p_info['name']}")
+            st.write(f"**상세내용:** {p_info['content']}")
+    else:
+        st.success("완료!")
+    st.download_button(
+        label="📥 엑셀 다운로드",
+        data=entry["files"]["excel"],
+        file_name=data["file_name"],
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        key=f"risk_download_{entry['id']}"
+    )
+
+def render_revision_delta(revision, items, key, label):
+    """수정 제출본: 이전 제출본 대비 항목별 점수 변화 (key(item) -> 항목 비교 키, label(item) -> 항목 표시명)"""
+    if not revision or "previous" not in revision:
+        return
+    previous = {p["key"]: p for p in revision["previous"]}
+    rows = []
+    for item in items:
+        score = item.get("score") or 0
+        before = previous.pop(key(item), None)
+        change = "신규" if before is None else f"{score - before['score']:+d}" if score != before["score"] else ""
+        rows.append({"항목": label(item), "이전": None if before is None else before["score"], "현재": score,
+                     "변화": change, "처리": "이전 결과" if item.get("source") == "carried" else "다시 평가"})
+    rows.extend({"항목": p["label"], "이전": p["score"], "현재": None, "변화": "삭제", "처리": ""} for p in previous.values())
+    before_total = sum(p["score"] for p in revision["previous"])
+    after_total = sum(item.get("score") or 0 for item in items)
+    with st.expander(f"🔁 이전 제출본 대비: {before_total}점 → {after_total}점 ({after_total - before_total:+d})"):
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+
+def show_stored_result(tab, render):
+    entry = get_result_store().current(tab)
+    if entry is not None:
+        render(entry)
+
+# ------------------------------------------------------------------------------
+# 백그라운드 작업 (분석은 작업 큐에서 실행, 화면은 진행 상황만 조회)
+# ------------------------------------------------------------------------------
+JOB_REFRESH_SECONDS = 1.0
+
+def get_owner():
+    """
+    작업 소유자 ID. URL 쿼리(?sid=)에 보관하여 새로고침/재연결 후에도
+    같은 사용자의 진행 중인 작업과 결과를 다시 찾는다.
+    """
+    owner = st.query_params.get("sid")
+    if not owner:
+        owner = uuid.uuid4().hex[:16]
+        st.query_params["sid"] = owner
+    return owner
+
+def get_job_queue():
+    from analysis_jobs import get_job_queue as get_queue
+    return get_queue()
+
+def submit_job(kind, payload, title, group=None):
+    job_id = get_job_queue().submit(kind, payload, title=title, owner=get_owner(), group=group)
+    st.toast(f"작업이 등록되었습니다: {title}")
+    return job_id
+
+def job_status_box(job, render_partial=None):
+    """진행 중인 작업 1건 (상태, 진행 메시지, 실시간 결과, 취소 버튼)"""
+    started = job["started"] or job["created"]
+    with st.container(border=True):
+        c1, c2 = st.columns([5, 1])
+        c1.markdown(f"**{job['title']}** · {STATUS_LABELS[job['status']]} ({time.time() - started:.0f}초)")
+        if job["cancel_requested"]:
+            c1.caption("⏹️ 취소 요청됨 (현재 단계가 끝나면 중단합니다)")
+        elif job["message"]:
+            c1.caption(job["message"])
+        c2.button("취소", key=f"cancel_{job['id']}", on_click=get_job_queue().cancel, args=(job["id"],),
+                  disabled=bool(job["cancel_requested"]))
+        if render_partial and job["partial"]:
+            render_partial(job["partial"])
+
+def notify_finished_job(kind, job, message, raw_text=None):
+    """실패/취소 알림은 다음 전체 재실행 때 작업 패널 위에 표시"""
+    notices = st.session_state.setdefault("job_notices", {}).setdefault(kind, [])
+    notices.append((job["title"], message, raw_text))
+
+def show_job_notices(kind):
+    for title, message, raw_text in st.session_state.get("job_notices", {}).pop(kind, []):
+        st.error(f"{title}: {message}")
+        if raw_text is not None:
+            with st.expander("AI 원문 보기"):
+                st.code(raw_text)
+
+def job_panel(kind, render_partial=None, limit=10):
+    """
+    이 사용자의 kind 작업 진행 상황 (진행 중인 작업이 있으면 주기적으로 자동 갱신).
+    끝난 작업의 결과는 결과 보관소로 옮기고 화면 전체를 다시 그린다.
+    """
+    queue = get_job_queue()
+    owner = get_owner()
+    imported = st.session_state.setdefault("imported_jobs", set())
+    # 재접속한 세션에서는 완료 결과만 다시 가져오고, 예전 실패/취소 알림은 띄우지 않음
+    session_started = st.session_state.setdefault("jobs_session_started", time.time())
+    show_job_notices(kind)
+
+    def panel():
+        jobs = queue.list(owner=owner, kind=kind, limit=limit)
+        changed = False
+        for job in reversed(jobs):
+            if job["status"] in ACTIVE_STATUSES:
+                job_status_box(job, render_partial)
+                continue
+            if job["id"] in imported:
+                continue
+            imported.add(job["id"])
+            changed = True
+            if job["status"] == "done":
+                result = queue.result(job["id"]) or {}
+                if "error" in result:
+                    notify_finished_job(kind, job, result["error"], result.get("raw_text"))
+                else:
+                    get_result_store().put(kind, result.get("title") or job["title"], result["data"],
+                                           files=result.get("files"))
+            elif job["finished"] and job["finished"] < session_started:
+                continue
+            elif job["status"] == "failed":
+                notify_finished_job(kind, job, f"분석 중 오류 발생: {job['error']}")
+            else:
+                notify_finished_job(kind, job, "작업이 취소되었습니다.")
+        if changed:
+            st.rerun()
+
+    active = bool(queue.list(owner=owner, kind=kind, statuses=ACTIVE_STATUSES, limit=1))
+    st.fragment(panel, run_every=JOB_REFRESH_SECONDS if active else None)()
@@ -0,0 +1,157 @@
+import io
+import os
+import time
+import zipfile
+
+from plan_eval import total_score, eligibility
+from upload_pipeline import StageTimer
+
+# ==========================================
+# 1-1. 계획서 일괄 평가 (입찰 시즌 다건 처리)
+# ==========================================
+# 업체별 PDF는 작업 큐(analysis_jobs)에 1건씩 등록되어 공용 작업 스레드가 채점하고,
+# 여기서는 zip 펼치기, 업체 1건 채점, 순위 요약 엑셀 생성을 맡는다.
+# 실제 API 호출 속도는 공용 RateLimiter가 할당량 이내로 제한한다.
+
+
+def _zip_member_name(info):
+    # 윈도우 탐색기로 압축한 zip은 한글 파일명이 cp949인데 UTF-8 플래그가 없어 cp437로 해석됨
+    if info.flag_bits & 0x800:
+        return info.filename
+    try:
+        return info.filename.encode("cp437").decode("cp949")
+    except (UnicodeEncodeError, UnicodeDecodeError):
+        return info.filename
+
+
+def contractor_name(file_name):
+    """파일명에서 업체명 추출 (확장자/경로 제거)"""
+    return os.path.splitext(os.path.basename(file_name))[0]
+
+
+def collect_documents(uploaded_files):
+    """업로드된 PDF/zip 목록을 [(파일명, PDF 바이트)] 목록으로 펼친다"""
+    docs = []
+    for uploaded in uploaded_files:
+        name = uploaded.name
+        if name.lower().endswith(".zip"):
+            with zipfile.ZipFile(io.BytesIO(uploaded.getvalue())) as zf:
+                for info in zf.infolist():
+                    member = _zip_member_name(info)
+                    if info.is_dir() or "__MACOSX" in member or not member.lower().endswith(".pdf"):
+                        continue
+                    docs.append((os.path.basename(member), zf.read(info)))
+        elif name.lower().endswith(".pdf"):
+            docs.append((name, uploaded.getvalue()))
+    return docs
+
+
+def empty_result(file_name, error=None):
+    """업체 1건 결과 dict (평가 전 / 실패 / 취소 건)"""
+    return {
+        "contractor": contractor_name(file_name),
+        "file_name": file_name,
+        "total": None,
+        "eligibility": "",
+        "items": [],
+        "from_cache": False,
+        "unchanged": False,     # 이전 제출본과 내용이 같은 재제출 (이력 기록 생략)
+        "error": error,
+        "elapsed": 0.0,
+        "timings": {},
+    }
+
+
+def evaluate_one(evaluator, file_name, pdf_bytes):
+    """업체 1건 채점. 실패해도 예외 대신 error가 채워진 결과 dict 반환"""
+    timer = StageTimer()
+    started = time.perf_counter()
+    result = empty_result(file_name)
+    info = {}
+    try:
+        eval_data, from_cache = evaluator.evaluate(pdf_bytes, timer=timer, title=file_name, info=info)
+        if not isinstance(eval_data, list):
+            raise ValueError("데이터 형식 오류")
+        result["items"] = eval_data
+        result["total"] = total_score(eval_data)
+        result["eligibility"] = eligibility(result["total"])[2]
+        result["from_cache"] = from_cache
+        result["unchanged"] = not info.get("revision", {}).get("changed", True)
+    except Exception as e:
+        # 업체 1건의 실패가 전체 일괄 평가를 멈추지 않도록 결과에 오류만 기록
+        result["error"] = str(e)
+    result["elapsed"] = time.perf_counter() - started
+    result["timings"] = dict(timer.timings)
+    return result
+
+
+def rank_results(results):
+    """총점 내림차순 정렬 (오류 건은 맨 아래)"""
+    return sorted(results, key=lambda r: (r["total"] is None, -(r["total"] or 0), r["contractor"]))
+
+
+def build_summary_workbook(results):
+    """순위 요약 + 항목별 점수 시트로 구성된 엑셀 생성"""
+    # openpyxl은 결과를 내려받을 때만 필요하므로 여기서 불러온다 (페이지 로딩 시간 단축)
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
+    from openpyxl.utils import get_column_letter
+
+    ranked = rank_results(results)
+
+    thin_border = Border(left=Side(style='thin'), right=Side(style='thin'),
+                         top=Side(style='thin'), bottom=Side(style='thin'))
+    header_fill = PatternFill(start_color="DDDDDD", end_color="DDDDDD", fill_type="solid")
+    header_font = Font(bold=True, size=11)
+    center_align = Alignment(horizontal="center", vertical="center", wrap_text=True)
+
+    def write_header(ws, headers, widths):
+        for i, header in enumerate(headers):
+            cell = ws.cell(row=1, column=i + 1, value=header)
+            cell.fill = header_fill
+            cell.font = header_font
+            cell.alignment = center_align
+            cell.border = thin_border
+            ws.column_dimensions[get_column_letter(i + 1)].width = widths[i]
+
+    def write_row(ws, row, values):
+        for i, val in enumerate(values):
+            cell = ws.cell(row=row, column=i + 1, value=val)
+            cell.border = thin_border
+            cell.alignment = center_align
+
+    wb = Workbook()
+
+    # --- 1. 종합 순위 ---
+    ws = wb.active
+    ws.title = "종합순위"
+    write_header(ws, ["순위", "업체명", "총점", "판정", "비고"], [8, 30, 10, 22, 40])
+    rank = 0
+    for row, r in enumerate(ranked, start=2):
+        if r["error"]:
+            write_row(ws, row, ["-", r["contractor"], "", "평가 실패", r["error"]])
+        else:
+            rank += 1
+            write_row(ws, row, [rank, r["contractor"], r["total"], r["eligibility"], "캐시" if r["from_cache"] else ""])
+
+    # --- 2. 항목별 점수 (업체 x 17개 항목) ---
+    ws_items = wb.create_sheet("항목별점수")
+    item_names = {}
+    for r in ranked:
+        for item in r["items"]:
+            item_names.setdefault(item['item_no'], item.get('category', ''))
+    item_nos = sorted(item_names)
+    write_header(ws_items, ["업체명"] + [f"{no}. {item_names[no]}" for no in item_nos] + ["총점"],
+                 [30] + [14] * len(item_nos) + [10])
+    row = 2
+    for r in ranked:
+        if r["error"]:
+            continue
+        scores = {item['item_no']: item['score'] for item in r["items"]}
+        write_row(ws_items, row, [r["contractor"]] + [scores.get(no, "") for no in item_nos] + [r["total"]])
+        row += 1
+
+    output = io.BytesIO()
+    wb.save(output)
+    output.seek(0)
+    return output
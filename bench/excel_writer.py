@@ -0,0 +1,61 @@
+"""
+2-1 / 2-2 위험성평가표 엑셀 생성(risk_excel.generate_excel_from_scratch) 벤치마크.
+행 수별로 일반 모드와 write-only(스트리밍) 모드의 생성 시간, Python 할당 최대치, 파일 크기를 잰다.
+
+    python -m bench.excel_writer                         # 기본: 100 / 1,000 / 10,000 / 30,000행
+    python -m bench.excel_writer --rows 500,20000 --repeat 3
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from bench.inputs import project_info
+from risk_excel import generate_excel_from_scratch
+
+
+def risk_rows(count):
+    return [{"equipment": f"장비 {i % 40}", "risk_factor": f"위험요인 {i}: 고소 작업 중 추락 및 낙하물에 의한 충돌",
+             "risk_level": "상중하"[i % 3], "countermeasure": "안전난간 설치, 안전대 체결 확인, 작업 전 TBM 실시",
+             "manager": "현장소장"} for i in range(count)]
+
+
+def measure(p_info, rows, streaming, repeat):
+    """(최소 소요 시간, 할당 최대치 MB, 파일 크기 KB)"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        output = generate_excel_from_scratch(p_info, rows, streaming=streaming)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    tracemalloc.start()
+    generate_excel_from_scratch(p_info, rows, streaming=streaming)
+    peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    tracemalloc.stop()
+    return best, peak, len(output.getvalue()) / 1024
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="위험성평가표 엑셀 생성 벤치마크")
+    parser.add_argument("--rows", default="100,1000,10000,30000", help="쉼표로 구분한 행 수")
+    parser.add_argument("--repeat", type=int, default=1, help="시간 측정 반복 횟수 (최솟값 사용)")
+    args = parser.parse_args(argv)
+
+    p_info = project_info(0)
+    print(f"{'행 수':>8}{'모드':>10}{'시간(초)':>10}{'µs/행':>8}{'할당 MB':>10}{'파일 KB':>10}")
+    for count in [int(n) for n in args.rows.split(",") if n.strip()]:
+        rows = risk_rows(count)
+        for streaming in (False, True):
+            elapsed, peak, size = measure(p_info, rows, streaming, args.repeat)
+            print(f"{count:>8,}{'스트리밍' if streaming else '일반':>10}{elapsed:>10.2f}"
+                  f"{elapsed / max(count, 1) * 1e6:>8.0f}{peak:>10.1f}{size:>10.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
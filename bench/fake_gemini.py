@@ -0,0 +1,294 @@
+import io
+import os
+import json
+import math
+import random
+import re
+import threading
+import time
+import types
+
+from json_parse import CONTINUE_PROMPT
+from rubric import rubric_items
+
+# ==========================================
+# 로컬 Gemini 대체 백엔드 (네트워크/API 키 없이 벤치마크)
+# ==========================================
+# model_clients.set_backend(FakeGemini(...))로 끼우면 모든 탭/작업이 이 백엔드를 호출한다.
+#   - 프롬프트의 고유 문구로 어떤 화면의 요청인지 판별하여 해당 형식의 JSON 응답을 돌려준다
+#     (responses로 녹화된 응답 {경로: 원문}을 넘기면 합성 응답 대신 그대로 재생)
+#   - 지연: 로그정규분포 (중앙값 latency, 분산 jitter), 스트리밍은 조각별로 나눠 지연
+#   - 오류: error_rate 확률로 429(ResourceExhausted)
+#   - 잘림: truncate_rate 확률로 응답 중간에서 끊고, "이어서 출력" 요청에는 나머지를 돌려준다
+#   - 업로드: upload_latency 후 PROCESSING 상태 파일 반환, processing_polls번 조회 후 ACTIVE
+#   - 컨텍스트 캐시: caching.CachedContent.create / GenerativeModel.from_cached_content 대체
+#     (cache_min_tokens 미만이면 InvalidArgument, 만료/삭제된 캐시로 호출하면 NotFound, context_cache=False면 미지원)
+#   - 입력 처리 지연: 캐시되지 않은 입력 1,000토큰당 prefill초를 첫 조각 지연에 더함
+
+# 요청 경로 판별 (위에서부터 먼저 일치하는 것)
+ROUTES = [
+    ("plan_chunk", "수급업체 계획서 전체 중"),
+    ("risk_pdf", "계획서 전체 중"),
+    ("plan_subset", "[채점 대상 항목]"),
+    ("plan_eval", "[마스터 가이드라인]을 기준으로"),
+    ("risk_review", "위험성평가 적정성 검토 전문가"),
+    ("risk_pdf", "project_info"),
+    ("risk_manual", "[공사정보]"),
+]
+
+CHARS_PER_TOKEN = 2.0
+_ITEM_LIST_RE = re.compile(r"^\s*\d+(?:\s*,\s*\d+)*\s*$", re.MULTILINE)   # "1, 4, 9" 형태의 항목 번호 줄
+_HAZARDS_RE = re.compile(r"위험요인: ([^\n]*)")                              # 2-1 프롬프트의 위험요인 목록
+STREAM_CHUNK_CHARS = 200
+
+
+def _text_of(contents):
+    """요청 내용 중 문자열 파트만 이어붙인 것"""
+    if isinstance(contents, str):
+        return contents
+    if isinstance(contents, dict):
+        return _text_of(contents.get("parts", []))
+    if isinstance(contents, (list, tuple)):
+        return "\n".join(_text_of(part) for part in contents)
+    return ""
+
+
+def route_of(prompt_text):
+    for route, marker in ROUTES:
+        if marker in prompt_text:
+            return route
+    return "unknown"
+
+
+class FakeFile:
+    def __init__(self, name, state, size):
+        self.name = name
+        self.state = types.SimpleNamespace(name=state)
+        self.size_bytes = size
+
+
+class _Chunk:
+    def __init__(self, text, usage=None):
+        self.text = text
+        self.usage_metadata = usage
+
+
+class FakeCachedContent:
+    def __init__(self, backend, name, model, text, ttl):
+        self.backend = backend
+        self.name = name
+        self.model = model
+        self.text = text
+        self.expires_at = time.time() + ttl.total_seconds()
+
+    def update(self, ttl=None, expire_time=None):
+        self.backend._live_cache(self.name)
+        self.expires_at = time.time() + ttl.total_seconds()
+
+    def delete(self):
+        with self.backend._lock:
+            self.backend._caches.pop(self.name, None)
+
+
+class FakeModel:
+    def __init__(self, backend, model_name, generation_config=None, system_instruction=None, cached_content=None):
+        self.backend = backend
+        self.model_name = model_name
+        self.generation_config = generation_config
+        self.system_instruction = system_instruction
+        self.cached_content = cached_content
+
+    def generate_content(self, contents, stream=False, request_options=None, **kwargs):
+        return self.backend._generate(contents, stream, self.cached_content)
+
+
+class _ModelFactory:
+    """genai.GenerativeModel 대체 (생성자 호출 + from_cached_content)"""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def __call__(self, model_name=None, generation_config=None, system_instruction=None):
+        return FakeModel(self.backend, model_name, generation_config, system_instruction)
+
+    def from_cached_content(self, cached_content, generation_config=None, safety_settings=None):
+        return FakeModel(self.backend, cached_content.model, generation_config, cached_content=cached_content)
+
+
+class FakeGemini:
+    def __init__(self, latency=0.5, jitter=0.5, error_rate=0.0, truncate_rate=0.0, upload_latency=0.2,
+                 processing_polls=1, risk_rows=40, review_items=8, responses=None, seed=0, prefill=0.0,
+                 context_cache=True, cache_min_tokens=1024):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.truncate_rate = truncate_rate
+        self.upload_latency = upload_latency
+        self.processing_polls = processing_polls
+        self.risk_rows = risk_rows
+        self.review_items = review_items
+        self.responses = responses or {}
+        self.prefill = prefill
+        self.cache_min_tokens = cache_min_tokens
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._truncated = {}    # 잘린 응답 원문 -> 전체 응답
+        self._polls = {}
+        self._caches = {}
+        self._ids = 0
+        self.stats = {"calls": 0, "errors": 0, "truncated": 0, "continued": 0, "uploads": 0, "upload_bytes": 0,
+                      "cache_creates": 0, "cached_calls": 0}
+        self.GenerativeModel = _ModelFactory(self)
+        if context_cache:
+            self.caching = types.SimpleNamespace(CachedContent=types.SimpleNamespace(create=self._create_cache))
+
+    # ------------------------------------------------------------------
+    # genai 모듈과 같은 함수들
+    # ------------------------------------------------------------------
+    def configure(self, **kwargs):
+        pass
+
+    def upload_file(self, path: "str | os.PathLike | io.IOBase", mime_type=None, display_name=None, **kwargs):
+        if isinstance(path, io.IOBase):
+            size = len(path.read())
+        else:
+            with open(path, "rb") as f:
+                size = len(f.read())
+        time.sleep(self.upload_latency)
+        with self._lock:
+            self._ids += 1
+            name = f"files/fake-{self._ids}"
+            self._polls[name] = self.processing_polls
+            self.stats["uploads"] += 1
+            self.stats["upload_bytes"] += size
+        return FakeFile(name, "PROCESSING" if self.processing_polls else "ACTIVE", size)
+
+    def get_file(self, name):
+        with self._lock:
+            remaining = self._polls.get(name, 0)
+            self._polls[name] = max(0, remaining - 1)
+        return FakeFile(name, "PROCESSING" if remaining > 1 else "ACTIVE", 0)
+
+    def delete_file(self, name):
+        with self._lock:
+            self._polls.pop(name, None)
+
+    def _create_cache(self, model, display_name=None, system_instruction=None, contents=None, ttl=None, **kwargs):
+        text = _text_of([system_instruction or "", *(contents or [])])
+        if len(text) / CHARS_PER_TOKEN < self.cache_min_tokens:
+            from google.api_core import exceptions as api_exceptions
+            raise api_exceptions.InvalidArgument("fake cached content is too small")
+        with self._lock:
+            self._ids += 1
+            cache = FakeCachedContent(self, f"cachedContents/fake-{self._ids}", model, text, ttl)
+            self._caches[cache.name] = cache
+            self.stats["cache_creates"] += 1
+        return cache
+
+    def _live_cache(self, name):
+        with self._lock:
+            cache = self._caches.get(name)
+        if cache is None or time.time() >= cache.expires_at:
+            from google.api_core import exceptions as api_exceptions
+            raise api_exceptions.NotFound(f"fake cached content not found: {name}")
+        return cache
+
+    # ------------------------------------------------------------------
+    # 응답 생성
+    # ------------------------------------------------------------------
+    def _draw(self):
+        with self._lock:
+            return self._random.random(), self._random.gauss(0.0, 1.0), self._random.uniform(0.4, 0.9)
+
+    def _delay(self, normal):
+        return self.latency * math.exp(self.jitter * normal)
+
+    def _generate(self, contents, stream, cached_content=None):
+        roll, normal, cut = self._draw()
+        delay = self._delay(normal)
+        cached_text = self._live_cache(cached_content.name).text if cached_content is not None else ""
+        with self._lock:
+            self.stats["calls"] += 1
+            if cached_content is not None:
+                self.stats["cached_calls"] += 1
+        if roll < self.error_rate:
+            from google.api_core import exceptions as api_exceptions
+            time.sleep(delay * 0.1)
+            with self._lock:
+                self.stats["errors"] += 1
+            raise api_exceptions.ResourceExhausted("fake quota exceeded")
+
+        prompt_text = _text_of(contents)
+        text = self._continuation(contents) if CONTINUE_PROMPT in prompt_text else None
+        if text is None:
+            full = self.respond(route_of(prompt_text), prompt_text)
+            text = full
+            if roll < self.error_rate + self.truncate_rate:
+                text = full[:int(len(full) * cut)]
+                with self._lock:
+                    self.stats["truncated"] += 1
+                    self._truncated[text] = full
+        usage = types.SimpleNamespace(prompt_token_count=int((len(cached_text) + len(prompt_text)) / CHARS_PER_TOKEN),
+                                      cached_content_token_count=int(len(cached_text) / CHARS_PER_TOKEN),
+                                      candidates_token_count=int(len(text) / CHARS_PER_TOKEN))
+        # 캐시되지 않은 입력만 처리 지연에 반영
+        prefill = self.prefill * len(prompt_text) / CHARS_PER_TOKEN / 1000
+        if not stream:
+            time.sleep(prefill + delay)
+            return _Chunk(text, usage)
+        return self._stream(text, usage, delay, prefill)
+
+    def _stream(self, text, usage, delay, prefill=0.0):
+        pieces = [text[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(text), STREAM_CHUNK_CHARS)] or [""]
+        # 첫 조각까지의 지연은 호출 시점에 (SDK도 첫 조각을 받은 뒤 응답 객체를 돌려줌)
+        time.sleep(prefill + delay * 0.3)
+        per_piece = delay * 0.7 / len(pieces)
+
+        def chunks():
+            for i, piece in enumerate(pieces):
+                if i: time.sleep(per_piece)
+                yield _Chunk(piece, usage if i == len(pieces) - 1 else None)
+        return chunks()
+
+    def _continuation(self, contents):
+        model_turns = [c for c in contents if isinstance(c, dict) and c.get("role") == "model"]
+        partial = _text_of(model_turns[-1]) if model_turns else ""
+        with self._lock:
+            full = self._truncated.pop(partial, None)
+            self.stats["continued"] += 1
+        return full[len(partial):] if full is not None else None
+
+    def respond(self, route, prompt_text):
+        """경로별 응답 원문 (녹화된 응답이 있으면 그대로, 없으면 합성)"""
+        if route in self.responses:
+            return self.responses[route]
+        items = rubric_items()
+        if route in ("plan_eval", "plan_subset"):
+            item_nos = sorted(items)
+            if route == "plan_subset":
+                listed = _ITEM_LIST_RE.search(prompt_text.split("[채점 대상 항목]", 1)[1])
+                item_nos = [int(n) for n in re.findall(r"\d+", listed.group(0))] if listed else item_nos
+            data = [{"item_no": n, "category": items[n]["category"], "score": items[n]["max_score"] // 2,
+                     "max_score": items[n]["max_score"], "evidence": f"p.{n}: 관련 문구 확인", "judgment": "보통"}
+                    for n in item_nos if n in items]
+        elif route == "plan_chunk":
+            data = [{"item_no": n, "evidence": [f"p.{n}: 증거 문장 {n}"]} for n in sorted(items)]
+        elif route == "risk_review":
+            data = [{"category": f"평가 항목 {i + 1}", "score": 7, "max_score": 10, "status": "양호",
+                     "comment": "위험요인 도출과 감소대책이 구체적으로 기재되어 있음"} for i in range(self.review_items)]
+        elif route in ("risk_manual", "risk_pdf"):
+            rows = [{"equipment": f"장비 {i % 12}", "risk_factor": f"위험요인 {i}: 작업 중 추락/협착 가능",
+                     "risk_level": "상중하"[i % 3], "countermeasure": "안전난간 설치 및 작업 전 TBM 실시",
+                     "manager": "현장소장"} for i in range(self.risk_rows)]
+            if route == "risk_manual":
+                listed = _HAZARDS_RE.search(prompt_text)
+                hazards = [h.strip() for h in listed.group(1).split(",") if h.strip()] if listed else []
+                for i, row in enumerate(rows):
+                    row["hazard"] = hazards[i % len(hazards)] if hazards else ""
+            data = rows if route == "risk_manual" else {
+                "project_info": {"name": "벤치마크 공사", "loc": "본관", "period": "26.01.01 ~ 26.02.01",
+                                 "content": "객실 리모델링"},
+                "risk_data": rows}
+        else:
+            data = []
+        return "```json\n" + json.dumps(data, ensure_ascii=False, indent=1) + "\n```"
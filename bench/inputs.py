@@ -0,0 +1,87 @@
+import io
+import random
+
+# ==========================================
+# 벤치마크용 합성 입력 (대용량 PDF, 시트가 많은 엑셀, 긴 위험성평가표)
+# ==========================================
+# 같은 seed는 같은 바이트를 만든다. 문서마다 seed를 달리하여 평가 캐시/업로드 재사용에 걸리지 않게 한다.
+
+WORDS = ["safety", "plan", "worker", "scaffold", "crane", "fire", "electric", "inspection", "education",
+         "manager", "hazard", "permit", "guardrail", "harness", "ventilation", "emergency", "training",
+         "contractor", "supervisor", "checklist"]
+
+RISK_COLUMNS = ["공종", "세부작업", "위험요인", "재해형태", "빈도", "강도", "위험성", "감소대책", "담당자"]
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(page_texts):
+    """
+    최소 구성 PDF (Helvetica 텍스트 레이어). page_texts의 None/빈 문자열은 텍스트 없는 페이지 (스캔 페이지로 취급됨)
+    """
+    objects = []
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(len(page_texts)))
+    objects.append("<< /Type /Catalog /Pages 2 0 R >>")
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(page_texts)} >>")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    for i, text in enumerate(page_texts):
+        lines = (text or "").split("\n") if text else []
+        stream = ("BT /F1 10 Tf 40 800 Td " + " ".join(f"({_escape(line)}) Tj 0 -12 Td" for line in lines) + " ET"
+                  if lines else "")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>")
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+
+    out = "%PDF-1.4\n"
+    offsets = []
+    for i, obj in enumerate(objects):
+        offsets.append(len(out))
+        out += f"{i + 1} 0 obj\n{obj}\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n" + "".join(f"{o:010d} 00000 n \n" for o in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    return out.encode("latin-1")
+
+
+def plan_pdf(pages=40, lines_per_page=40, scan_ratio=0.0, seed=0):
+    """계획서 PDF. scan_ratio 비율의 페이지는 텍스트 없는 페이지"""
+    rng = random.Random(seed)
+    page_texts = []
+    for page_no in range(1, pages + 1):
+        if rng.random() < scan_ratio:
+            page_texts.append(None)
+            continue
+        lines = [f"doc {seed} page {page_no}: " + " ".join(rng.choice(WORDS) for _ in range(12))
+                 for _ in range(lines_per_page)]
+        page_texts.append("\n".join(lines))
+    return make_pdf(page_texts)
+
+
+def risk_workbook(sheets=10, rows=300, seed=0):
+    """위험성평가표 엑셀 (시트마다 RISK_COLUMNS 머리글 + rows행)"""
+    from openpyxl import Workbook
+    rng = random.Random(seed)
+    wb = Workbook(write_only=True)
+    for sheet_no in range(1, sheets + 1):
+        ws = wb.create_sheet(f"공종{sheet_no}")
+        ws.append(RISK_COLUMNS)
+        for row_no in range(rows):
+            frequency, severity = rng.randint(1, 5), rng.randint(1, 4)
+            ws.append([f"공종{sheet_no}", f"작업 {row_no}", f"{rng.choice(WORDS)} 관련 위험 {row_no}", "추락",
+                       frequency, severity, frequency * severity, f"{rng.choice(WORDS)} 대책 시행", "관리감독자"])
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def project_info(seed=0):
+    """2-1 입력값"""
+    rng = random.Random(seed)
+    return {
+        "name": f"벤치마크 공사 {seed}",
+        "loc": f"본관 {rng.randint(1, 20)}층",
+        "period": "26.02.01 ~ 02.15",
+        "content": " ".join(rng.choice(WORDS) for _ in range(30)),
+    }
@@ -0,0 +1,243 @@
+"""
+오프라인 벤치마크: 1-1 / 1-2 / 2-1 / 2-2 작업을 로컬 대체 백엔드(bench/fake_gemini.py)로 끝까지 실행하여
+처리량, 지연 백분위수(p50/p95/p99), 메모리, 단계별 시간을 측정한다. 네트워크/API 키가 필요 없다.
+
+    python -m bench.run_bench                                   # 기본 구성
+    python -m bench.run_bench --docs 20 --latency 1.0 --error-rate 0.05 --truncate-rate 0.1
+    python -m bench.run_bench --pages 300 --scan-ratio 0.6 --chunk-pages 50 --workflows plan_eval,risk_pdf
+    python -m bench.run_bench --json bench_output.json --baseline baseline.json   # 회귀 시 종료 코드 1
+
+실행은 임시 디렉터리 안에서 이루어지므로 작업 큐/평가 캐시/계측 로그가 실제 .cache를 건드리지 않는다.
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import analysis_jobs
+import eval_history
+import metrics
+import model_clients
+import resilient_client
+import revision_store
+import risk_library
+from bench.fake_gemini import FakeGemini
+from bench.inputs import plan_pdf, project_info, risk_workbook
+from context_cache import get_context_cache
+from eval_cache import EvalCache
+from job_queue import ACTIVE_STATUSES, JobQueue
+from metrics import instrument, percentile, read_records, summarize
+from plan_eval import PlanEvaluator
+from rate_limiter import get_limiter
+from upload_registry import get_registry
+
+POLL = 0.05
+
+# 벤치마크 이름 -> (작업 종류, 입력 생성 함수(문서 번호, 옵션))
+WORKFLOWS = {
+    "plan_eval": ("plan_eval", lambda i, a: {
+        "file_name": f"plan_{i}.pdf", "chunk_pages": a.chunk_pages,
+        "pdf_bytes": plan_pdf(a.pages, scan_ratio=a.scan_ratio, seed=i)}),
+    "plan_batch": ("plan_batch_item", lambda i, a: {
+        "file_name": f"업체{i}_plan.pdf",
+        "pdf_bytes": plan_pdf(a.pages, scan_ratio=a.scan_ratio, seed=10_000 + i)}),
+    "risk_review": ("risk_review", lambda i, a: {
+        "file_name": f"risk_{i}.xlsx", "file_bytes": risk_workbook(a.sheets, a.rows, seed=i)}),
+    "risk_manual": ("risk_manual", lambda i, a: {
+        "p_info": project_info(i), "selected_risks": ["화기", "고소", "중량물"]}),
+    "risk_bulk": ("risk_manual_item", lambda i, a: {
+        "p_info": project_info(30_000 + i), "selected_risks": ["전기", "고소"]}),
+    "risk_pdf": ("risk_pdf", lambda i, a: {
+        "file_name": f"plan_{i}.pdf", "chunk_pages": a.chunk_pages,
+        "pdf_bytes": plan_pdf(a.pages, scan_ratio=a.scan_ratio, seed=20_000 + i)}),
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="오프라인 벤치마크 (로컬 대체 Gemini 백엔드)")
+    parser.add_argument("--workflows", default=",".join(WORKFLOWS), help="쉼표로 구분 (기본: 전체)")
+    parser.add_argument("--docs", type=int, default=8, help="작업별 문서 수")
+    parser.add_argument("--workers", type=int, default=4, help="작업 큐 동시 실행 수")
+    parser.add_argument("--latency", type=float, default=0.5, help="모델 응답 지연 중앙값 (초)")
+    parser.add_argument("--jitter", type=float, default=0.5, help="지연 로그정규 분산 (0이면 고정 지연)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="429 오류 확률")
+    parser.add_argument("--truncate-rate", type=float, default=0.0, help="응답 잘림 확률")
+    parser.add_argument("--upload-latency", type=float, default=0.2)
+    parser.add_argument("--pages", type=int, default=40, help="합성 계획서 페이지 수")
+    parser.add_argument("--scan-ratio", type=float, default=0.1, help="텍스트 없는(스캔) 페이지 비율")
+    parser.add_argument("--chunk-pages", type=int, default=None, help="분할 분석 구간 페이지 수 (미지정 시 분할 안 함)")
+    parser.add_argument("--sheets", type=int, default=10, help="1-2 엑셀 시트 수")
+    parser.add_argument("--rows", type=int, default=300, help="1-2 엑셀 시트당 행 수")
+    parser.add_argument("--risk-rows", type=int, default=80, help="2-1/2-2 응답의 위험요인 행 수")
+    parser.add_argument("--prefill", type=float, default=0.0, help="캐시되지 않은 입력 1,000토큰당 첫 조각 지연 (초)")
+    parser.add_argument("--no-context-cache", action="store_true", help="대체 백엔드의 컨텍스트 캐시 미지원 (인라인 모드)")
+    parser.add_argument("--rpm", type=int, default=None, help="분당 호출 한도 (미지정 시 제한 없음)")
+    parser.add_argument("--backoff-base", type=float, default=None, help="재시도 대기 기준 (초)")
+    parser.add_argument("--responses", help="녹화된 응답 JSON 파일 ({경로: 응답 원문})")
+    parser.add_argument("--trace-memory", action="store_true", help="tracemalloc으로 Python 할당 최대치 측정 (느려짐)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="결과를 JSON으로 저장")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="회귀 판정 허용 비율")
+    return parser.parse_args(argv)
+
+
+def setup(args, workdir):
+    """대체 백엔드 / 임시 캐시 / 전용 작업 큐 구성"""
+    responses = None
+    if args.responses:
+        with open(args.responses, encoding="utf-8") as f:
+            responses = json.load(f)
+    backend = FakeGemini(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                         truncate_rate=args.truncate_rate, upload_latency=args.upload_latency,
+                         risk_rows=args.risk_rows, responses=responses, seed=args.seed, prefill=args.prefill,
+                         context_cache=not args.no_context_cache)
+    model_clients.set_backend(backend)
+    get_limiter().set_rate(args.rpm or 1_000_000, burst=args.rpm or 1_000_000)
+    if args.backoff_base is not None:
+        resilient_client.BACKOFF_BASE = args.backoff_base
+
+    # 저장소는 모듈 폴더 기준 .cache를 쓰므로, 벤치 기록이 실제 이력/통계에 섞이지 않도록 모두 임시 폴더로 돌린다
+    os.chdir(workdir)
+    metrics.METRICS_LOG = os.path.join(workdir, "metrics.jsonl")
+    metrics.PROFILE_DIR = os.path.join(workdir, "profiles")
+    revision_store._store = revision_store.RevisionStore(db_path=os.path.join(workdir, "revisions.sqlite3"))
+    eval_history._history = eval_history.EvalHistory(db_path=os.path.join(workdir, "eval_history.sqlite3"))
+    risk_library._library = risk_library.RiskLibrary(db_path=os.path.join(workdir, "risk_library.sqlite3"))
+    analysis_jobs._evaluator = PlanEvaluator(get_registry(), EvalCache(cache_dir=os.path.join(workdir, "eval")))
+    queue = JobQueue(db_path=os.path.join(workdir, "jobs.sqlite3"), workers=args.workers)
+    for kind, handler in analysis_jobs.JOB_HANDLERS.items():
+        queue.register(kind, instrument(kind, handler))
+    queue.start()
+    return backend, queue
+
+
+def max_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_workflow(queue, kind, payloads, trace_memory=False):
+    """문서를 한꺼번에 등록하고 모두 끝날 때까지 대기. 지연/처리량/메모리 반환"""
+    if trace_memory:
+        tracemalloc.reset_peak()
+    group = uuid.uuid4().hex
+    for i, payload in enumerate(payloads):
+        queue.submit(kind, payload, title=f"{kind}-{i}", owner="bench", group=group)
+    while queue.list(group=group, statuses=ACTIVE_STATUSES, limit=1):
+        time.sleep(POLL)
+
+    jobs = queue.list(group=group, limit=len(payloads))
+    done = [j for j in jobs if j["status"] == "done"]
+    latencies = [j["finished"] - j["created"] for j in done]
+    service = [j["finished"] - j["started"] for j in done]
+    wall = max(j["finished"] for j in jobs) - min(j["created"] for j in jobs)
+    result = {
+        "docs": len(payloads),
+        "failed": len(jobs) - len(done),
+        "errors": sorted({j["error"] for j in jobs if j["error"]})[:3],
+        "wall": round(wall, 3),
+        "throughput": round(len(done) / wall, 3) if wall > 0 else None,
+        "p50": percentile(latencies, 0.5),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "service_p50": percentile(service, 0.5),
+        "rss_mb": round(max_rss_mb(), 1),
+    }
+    if trace_memory:
+        result["py_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 1)
+    return result
+
+
+def compare(results, baseline, tolerance):
+    """이전 결과 대비 p95 증가 / 처리량 감소가 허용 비율을 넘는 항목"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            continue
+        if previous.get("p95") and current.get("p95") and current["p95"] > previous["p95"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['p95']:.2f}s -> {current['p95']:.2f}s")
+        if previous.get("throughput") and current.get("throughput") and \
+                current["throughput"] < previous["throughput"] * (1 - tolerance):
+            regressions.append(f"{name}: 처리량 {previous['throughput']:.2f} -> {current['throughput']:.2f} 건/초")
+        if current["failed"] > previous.get("failed", 0):
+            regressions.append(f"{name}: 실패 {previous.get('failed', 0)} -> {current['failed']}건")
+    return regressions
+
+
+def fmt(value, digits=2):
+    return "-" if value is None else f"{value:.{digits}f}"
+
+
+def print_report(results, stage_rows, backend):
+    print(f"\n{'작업':<12}{'문서':>5}{'실패':>5}{'처리량/s':>10}{'p50':>8}{'p95':>8}{'p99':>8}{'RSS MB':>9}")
+    for name, r in results.items():
+        print(f"{name:<12}{r['docs']:>5}{r['failed']:>5}{fmt(r['throughput']):>10}{fmt(r['p50']):>8}"
+              f"{fmt(r['p95']):>8}{fmt(r['p99']):>8}{fmt(r['rss_mb'], 1):>9}")
+        for error in r["errors"]:
+            print(f"    ! {error}")
+    print("\n단계별 평균 시간 (초)")
+    for row in stage_rows:
+        stages = ", ".join(f"{name} {seconds:.3f}" for name, seconds in sorted(row["stages"].items()))
+        print(f"  {row['tab']:<16}{stages}")
+    print("\n건당 평균 토큰 (입력 / 캐시 입력 / 출력)")
+    for row in stage_rows:
+        print(f"  {row['tab']:<16}{row['prompt_tokens']:>10,.0f}{row['cached_tokens']:>10,.0f}{row['output_tokens']:>10,.0f}")
+    print(f"\n대체 백엔드: {backend.stats}")
+    print(f"모델 래퍼: {resilient_client.client_stats()}")
+    print(f"가이드라인 캐시: {get_context_cache().stats()}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    names = [name.strip() for name in args.workflows.split(",") if name.strip()]
+    unknown = [name for name in names if name not in WORKFLOWS]
+    if unknown:
+        raise SystemExit(f"알 수 없는 작업: {', '.join(unknown)} (가능: {', '.join(WORKFLOWS)})")
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="bench_") as workdir:
+        try:
+            backend, queue = setup(args, workdir)
+            if args.trace_memory:
+                tracemalloc.start()
+            results = {}
+            for name in names:
+                kind, make_payload = WORKFLOWS[name]
+                started = time.perf_counter()
+                payloads = [make_payload(i, args) for i in range(args.docs)]
+                input_bytes = sum(len(v) for p in payloads for v in p.values() if isinstance(v, bytes))
+                print(f"[{name}] 입력 생성 {time.perf_counter() - started:.2f}초 ({input_bytes / 1024 / 1024:.1f}MB), 실행 중...",
+                      flush=True)
+                results[name] = run_workflow(queue, kind, payloads, args.trace_memory)
+            stage_rows = summarize(read_records())
+        finally:
+            os.chdir(cwd)
+
+    print_report(results, stage_rows, backend)
+    report = {"config": vars(args), "results": results, "stages": stage_rows, "backend": backend.stats}
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\n회귀 감지:")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
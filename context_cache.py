@@ -0,0 +1,214 @@
+import datetime
+import hashlib
+import json
+import re
+import threading
+import time
+
+from model_clients import get_model, load_genai
+from pdf_text import estimate_tokens
+
+# ==========================================
+# 가이드라인 컨텍스트 캐시 (Gemini cached content)
+# ==========================================
+# 1-1은 모든 호출에 MASTER_GUIDE_TEXT(17개 항목 기준표)를, 1-2는 MASTER_GUIDE_TEXT2를 문서 앞에 그대로 붙인다.
+# 같은 앞부분(시스템 지시문 + 가이드라인)을 원격 캐시로 한 번 만들어 두고, 요청에는 가이드라인 뒤의 내용만 보낸다.
+#   - 키: (모델, 시스템 지시문, 가이드라인 이름). 가이드라인 내용이 바뀌면(모듈 수정 후 재로딩) 새로 만들고 이전 캐시는 삭제
+#   - 만료(CACHE_TTL)가 가까워지면 사용 중인 캐시의 만료 시각을 연장, 연장에 실패하면 새로 만든다
+#   - 가이드라인이 모델의 캐시 최소 토큰 수(MIN_CACHE_TOKENS)보다 작으면 만들지 않고 처음부터 인라인으로 호출
+#   - 캐시를 쓸 수 없으면(권한/할당량, SDK 미지원 백엔드) 캐시 도입 전과 같은
+#     인라인 프롬프트로 호출하고, RETRY_AFTER 동안은 다시 만들지 않는다
+#   - 호출 중 캐시가 사라진 오류(만료/삭제)가 나면 그 캐시를 버리고 같은 요청을 인라인으로 다시 보낸다
+#     (업로드 파일 만료 등 캐시와 무관한 NotFound/PermissionDenied는 그대로 올려 보낸다)
+
+CONTEXT_CACHE_ENABLED = True
+CACHE_TTL = 60 * 60             # 원격 캐시 보관 기간 (초)
+REFRESH_MARGIN = 5 * 60         # 만료까지 이만큼 남으면 연장 (호출 도중 만료 방지)
+RETRY_AFTER = 30 * 60           # 캐시 생성 실패 후 인라인 모드로 지내는 시간 (초)
+MIN_CACHE_TOKENS = 1024         # Gemini 2.5 Flash 명시적 캐시 최소 토큰 수 (추정치로 비교)
+
+_CACHE_RESOURCE_RE = re.compile(r"cached[\s_]*contents?", re.IGNORECASE)
+
+
+def _is_stale_cache_error(exc):
+    """원격 캐시가 만료/삭제되었거나 쓸 수 없음을 뜻하는 오류인지 (이 경우에만 인라인으로 재호출)"""
+    from google.api_core import exceptions as api_exceptions
+    return (isinstance(exc, (api_exceptions.NotFound, api_exceptions.PermissionDenied,
+                             api_exceptions.FailedPrecondition))
+            and _CACHE_RESOURCE_RE.search(str(exc)) is not None)
+
+
+def with_guide(guide, contents):
+    """인라인 모드: 가이드라인을 첫 텍스트 앞에 붙인다 (캐시 도입 전과 같은 프롬프트)"""
+    if isinstance(contents, str):
+        return guide + contents
+    contents = list(contents)
+    first = contents[0] if contents else None
+    if isinstance(first, dict):
+        # 응답 이어받기 형식 ([{"role": "user", "parts": [...]}, ...])은 첫 사용자 턴에 붙인다
+        contents[0] = {**first, "parts": with_guide(guide, first.get("parts", []))}
+    elif isinstance(first, str):
+        contents[0] = guide + first
+    else:
+        contents.insert(0, guide)
+    return contents
+
+
+class _Entry:
+    def __init__(self):
+        self.digest = None
+        self.backend = None
+        self.cache = None
+        self.expires_at = 0.0
+        self.failed_at = None
+        self.models = {}                # 생성 설정 -> 캐시를 쓰는 모델
+        self.lock = threading.Lock()    # 같은 가이드라인 캐시의 동시 생성 방지
+
+
+class ContextCacheManager:
+    def __init__(self, ttl=CACHE_TTL, refresh_margin=REFRESH_MARGIN, retry_after=RETRY_AFTER):
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self.retry_after = retry_after
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._counters = {"created": 0, "extended": 0, "cached_calls": 0, "inline_calls": 0, "failures": 0,
+                          "stale": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    # ------------------------------------------
+    # 원격 캐시 생성 / 연장 / 삭제
+    # ------------------------------------------
+    def _create(self, genai, model_id, system_instruction, name, guide):
+        return genai.caching.CachedContent.create(
+            model=model_id, display_name=f"guide_{name}", system_instruction=system_instruction,
+            contents=[guide], ttl=datetime.timedelta(seconds=self.ttl))
+
+    def _delete_remote(self, cache):
+        try:
+            cache.delete()
+        except Exception:
+            pass
+
+    def _refresh(self, entry, genai, model_id, system_instruction, name, guide, digest, now):
+        """entry.lock 안에서 호출. 쓸 수 있는 원격 캐시가 있게 만든다 (실패 시 예외)"""
+        if entry.cache is not None and entry.digest == digest and entry.backend is genai:
+            if now < entry.expires_at - self.refresh_margin:
+                return
+            if now < entry.expires_at:
+                try:
+                    entry.cache.update(ttl=datetime.timedelta(seconds=self.ttl))
+                    entry.expires_at = now + self.ttl
+                    self._count("extended")
+                    return
+                except Exception:
+                    pass
+        stale = entry.cache if entry.backend is genai else None
+        entry.cache, entry.models = None, {}
+        # 새로 만든 직후 TTL을 시작해야 하므로 생성 시작 시각 기준으로 계산
+        entry.cache = self._create(genai, model_id, system_instruction, name, guide)
+        entry.digest, entry.backend, entry.expires_at, entry.failed_at = digest, genai, now + self.ttl, None
+        self._count("created")
+        if stale is not None:
+            self._delete_remote(stale)
+
+    def cached_model(self, model_id, generation_config, system_instruction, name, guide):
+        """가이드라인이 캐시된 모델 (안정화 래퍼 적용). 캐시를 쓸 수 없으면 None"""
+        if not CONTEXT_CACHE_ENABLED:
+            return None
+        genai = load_genai()
+        if not hasattr(genai, "caching"):
+            return None
+        if estimate_tokens((system_instruction or "") + guide) < MIN_CACHE_TOKENS:
+            return None
+        digest = hashlib.sha256(f"{system_instruction}\x00{guide}".encode("utf-8")).hexdigest()
+        with self._lock:
+            entry = self._entries.setdefault((model_id, system_instruction, name), _Entry())
+        now = time.time()
+        with entry.lock:
+            if entry.failed_at is not None and entry.digest == digest and now - entry.failed_at < self.retry_after:
+                return None
+            try:
+                self._refresh(entry, genai, model_id, system_instruction, name, guide, digest, now)
+            except Exception:
+                entry.digest, entry.failed_at = digest, now
+                self._count("failures")
+                return None
+            config_key = json.dumps(generation_config, sort_keys=True, default=str)
+            model = entry.models.get(config_key)
+            if model is None:
+                from resilient_client import ResilientModel
+                model = ResilientModel(genai.GenerativeModel.from_cached_content(
+                    cached_content=entry.cache, generation_config=generation_config), model_id)
+                entry.models[config_key] = model
+            return model
+
+    def invalidate(self, model_id, system_instruction, name):
+        """호출 중 캐시가 사라진 경우: 다음 호출에서 새로 만들도록 버린다"""
+        with self._lock:
+            entry = self._entries.get((model_id, system_instruction, name))
+        if entry is None:
+            return
+        with entry.lock:
+            stale, entry.cache, entry.models, entry.expires_at = entry.cache, None, {}, 0.0
+        self._count("stale")
+        if stale is not None:
+            self._delete_remote(stale)
+
+    def stats(self):
+        with self._lock:
+            live = sum(1 for e in self._entries.values() if e.cache is not None and time.time() < e.expires_at)
+            return {"caches": live, **self._counters}
+
+
+class GuidedModel:
+    """
+    가이드라인을 앞에 둔 모델 호출. generate_content(contents)의 contents에는 가이드라인 뒤의 내용만 넣는다.
+    캐시가 있으면 캐시 모델로, 없으면 가이드라인을 첫 텍스트 앞에 붙여 일반 모델로 호출한다.
+    """
+
+    def __init__(self, manager, model_id, generation_config, system_instruction, name, guide):
+        self._manager = manager
+        self.model_id = model_id
+        self.generation_config = generation_config
+        self.system_instruction = system_instruction
+        self.name = name
+        self.guide = guide
+
+    def generate_content(self, contents, stream=False, **kwargs):
+        model = self._manager.cached_model(self.model_id, self.generation_config, self.system_instruction,
+                                           self.name, self.guide)
+        if model is not None:
+            try:
+                response = model.generate_content(contents, stream=stream, **kwargs)
+                self._manager._count("cached_calls")
+                return response
+            except Exception as e:
+                if not _is_stale_cache_error(e):
+                    raise
+                self._manager.invalidate(self.model_id, self.system_instruction, self.name)
+        self._manager._count("inline_calls")
+        inline = get_model(self.model_id, self.generation_config, self.system_instruction)
+        return inline.generate_content(with_guide(self.guide, contents), stream=stream, **kwargs)
+
+
+# 프로세스 전역 캐시 관리자 (모든 탭/세션/작업 스레드 공유)
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_context_cache():
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = ContextCacheManager()
+    return _manager
+
+
+def get_guided_model(model_id, generation_config, system_instruction, name, guide):
+    """가이드라인(guide)을 캐시 또는 인라인으로 앞에 두는 모델. name: 캐시 구분용 가이드라인 이름"""
+    return GuidedModel(get_context_cache(), model_id, generation_config, system_instruction, name, guide)
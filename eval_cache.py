@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+# ==========================================
+# 평가 결과 디스크 캐시 (내용 주소 기반)
+# ==========================================
+# 동일한 PDF + 동일한 가이드라인/프롬프트/모델 조합이면 API를 다시 호출하지 않고
+# 저장된 결과를 그대로 돌려준다. 키에 guide_data.py 파일 자체의 해시가 포함되므로
+# 가이드라인을 수정하면 기존 캐시는 자동으로 무효화된다.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(BASE_DIR, ".cache", "eval")
+GUIDE_FILES = [os.path.join(BASE_DIR, "guide_data.py"), os.path.join(BASE_DIR, "guide_data2.py")]
+
+MAX_CACHE_BYTES = 200 * 1024 * 1024   # 캐시 전체 용량 상한 (200MB)
+MAX_CACHE_AGE = 30 * 24 * 60 * 60     # 캐시 보관 기간 (30일)
+
+
+def sha256_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def guide_fingerprint(paths=None):
+    """가이드라인 모듈 소스 파일의 해시 (파일이 바뀌면 값이 달라짐)"""
+    h = hashlib.sha256()
+    for path in paths or GUIDE_FILES:
+        try:
+            with open(path, "rb") as f:
+                h.update(f.read())
+        except OSError:
+            h.update(b"<missing>")
+    return h.hexdigest()
+
+
+def make_key(doc_bytes, prompt, model_id, system_instruction="", config=None):
+    """문서 바이트 해시 + (가이드라인, 프롬프트, 모델, 설정) 해시로 캐시 키 생성"""
+    h = hashlib.sha256()
+    for part in (
+        guide_fingerprint(),
+        prompt,
+        model_id,
+        system_instruction or "",
+        json.dumps(config or {}, sort_keys=True, ensure_ascii=False),
+    ):
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return f"{sha256_bytes(doc_bytes)}-{h.hexdigest()[:32]}"
+
+
+class EvalCache:
+    """
+    JSON 파일 1개 = 결과 1건 형태의 디스크 캐시.
+    - 조회 시 mtime을 갱신하여 LRU 순서를 유지
+    - 저장 후 용량(max_bytes) / 기간(max_age) 초과분을 오래된 순으로 정리
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES, max_age=MAX_CACHE_AGE):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.max_age:
+                os.remove(path)
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path, None)
+            return entry["data"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(self, key, data):
+        """
+        결과 저장 (실패해도 평가는 성공이므로 예외를 내지 않음).
+        임시 파일은 호출마다 고유 이름으로 만들어, 같은 키를 여러 작업 스레드가 동시에 써도 서로의 파일을 건드리지 않는다
+        """
+        path = self._path(key)
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=f"{key}.", suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"created": time.time(), "data": data}, f, ensure_ascii=False)
+            # 원자적 교체 (동시에 같은 키를 써도 깨진 파일이 남지 않음)
+            os.replace(tmp_path, path)
+            tmp_path = None
+            self.evict()
+        except OSError:
+            pass
+        finally:
+            if tmp_path is not None:
+                try: os.remove(tmp_path)
+                except OSError: pass
+
+    def evict(self):
+        now = time.time()
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.max_age:
+                try: os.remove(path)
+                except OSError: pass
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
@@ -0,0 +1,256 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# ==========================================
+# 평가 이력 저장소 (1-1 계획서 평가 / 1-2 위험성평가 검토)
+# ==========================================
+# 결과 보관소는 세션이 끝나면 사라지므로, 완료된 평가를 업체/공사/항목별 점수와 근거, 모델, 단계별 시간과 함께
+# SQLite에 쌓아 두고 이력 화면에서 업체별 추이와 항목별 취약점을 집계한다.
+# 같은 문서를 다시 열어 디스크 캐시 결과를 보여준 경우는 새 평가가 아니므로 기록하지 않는다 (평가 수/평균 왜곡 방지).
+#   - evaluations: 평가 1건 (총점/판정/모델/소요 시간)
+#   - evaluation_items: 항목별 점수. 집계가 색인만 읽고 끝나도록 평가의 종류/업체/시각을 행마다 복사해 둔다
+#   - item_labels: 항목 키 -> 표시명 (집계 결과에 이름을 붙일 때 항목 표 전체를 읽지 않도록)
+# 수만 건(항목 행 수십만)에서도 조회가 1초 안에 끝나도록 모든 집계는 (종류, 업체 또는 항목, 시각) 색인 범위에서 한다.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+HISTORY_DB_PATH = os.path.join(BASE_DIR, ".cache", "eval_history.sqlite3")
+
+KIND_PLAN = "plan"              # 1-1 계획서 평가 (단건/일괄)
+KIND_RISK_REVIEW = "risk_review"    # 1-2 위험성평가 검토
+
+MAX_EVIDENCE_CHARS = 500        # 항목 근거는 이 길이까지만 보관
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS evaluations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    contractor TEXT NOT NULL,
+    project TEXT,
+    file_name TEXT,
+    created REAL NOT NULL,
+    total REAL,
+    max_total REAL,
+    grade TEXT,
+    model TEXT,
+    elapsed REAL,
+    timings TEXT
+);
+CREATE INDEX IF NOT EXISTS evaluations_kind_created ON evaluations (kind, created);
+CREATE INDEX IF NOT EXISTS evaluations_contractor ON evaluations (kind, contractor, created, total);
+CREATE TABLE IF NOT EXISTS evaluation_items (
+    evaluation_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    contractor TEXT NOT NULL,
+    created REAL NOT NULL,
+    item_key TEXT NOT NULL,
+    score REAL,
+    max_score REAL,
+    judgment TEXT,
+    evidence TEXT,
+    source TEXT
+);
+CREATE INDEX IF NOT EXISTS evaluation_items_evaluation ON evaluation_items (evaluation_id);
+CREATE INDEX IF NOT EXISTS evaluation_items_contractor
+    ON evaluation_items (kind, contractor, created, item_key, score, max_score);
+CREATE INDEX IF NOT EXISTS evaluation_items_item ON evaluation_items (kind, item_key, created, score, max_score);
+CREATE TABLE IF NOT EXISTS item_labels (
+    kind TEXT NOT NULL,
+    item_key TEXT NOT NULL,
+    label TEXT,
+    PRIMARY KEY (kind, item_key)
+);
+"""
+
+
+def plan_items(eval_data):
+    """1-1 채점 결과 -> 이력 항목 (항목 키는 정렬되도록 두 자리 번호)"""
+    items = []
+    for item in eval_data:
+        try:
+            item_no = int(item.get("item_no"))
+        except (TypeError, ValueError):
+            continue
+        items.append({"key": f"{item_no:02d}", "label": f"{item_no}. {item.get('category', '')}",
+                      "score": item.get("score"), "max_score": item.get("max_score"),
+                      "judgment": item.get("judgment", ""), "evidence": item.get("evidence", ""),
+                      "source": item.get("source", "llm")})
+    return items
+
+
+def risk_items(result_data):
+    """1-2 검토 결과 -> 이력 항목 (항목 키는 공백을 정리한 평가 항목명)"""
+    items = []
+    for item in result_data:
+        label = " ".join(str(item.get("category", "")).split())
+        if label:
+            items.append({"key": label, "label": label, "score": item.get("score"), "max_score": item.get("max_score"),
+                          "judgment": item.get("status", ""), "evidence": item.get("comment", ""),
+                          "source": item.get("source", "llm")})
+    return items
+
+
+def _in(values):
+    return ",".join("?" * len(values))
+
+
+def _like_escape(text):
+    """LIKE 검색어의 %, _ 를 글자 그대로 찾도록 이스케이프 (ESCAPE '\\')"""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class EvalHistory:
+    def __init__(self, db_path=HISTORY_DB_PATH):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with self._db() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _db(self):
+        """자동 커밋 연결 (스레드마다 새로 열고 닫음)"""
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    # ------------------------------------------------------------------
+    # 기록
+    # ------------------------------------------------------------------
+    def record(self, kind, contractor, items, project="", file_name="", grade="", model="", elapsed=None,
+               timings=None, created=None):
+        """
+        평가 1건 기록. items: plan_items / risk_items 결과. 총점/만점은 항목에서 계산. 평가 id 반환
+        """
+        created = time.time() if created is None else created
+        total = sum(item["score"] or 0 for item in items)
+        max_total = sum(item["max_score"] or 0 for item in items)
+        with self._db() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                evaluation_id = conn.execute(
+                    "INSERT INTO evaluations (kind, contractor, project, file_name, created, total, max_total, grade, "
+                    "model, elapsed, timings) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (kind, contractor, project, file_name, created, total, max_total, grade, model, elapsed,
+                     json.dumps(timings or {}))).lastrowid
+                conn.executemany(
+                    "INSERT INTO evaluation_items (evaluation_id, kind, contractor, created, item_key, score, max_score, "
+                    "judgment, evidence, source) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(evaluation_id, kind, contractor, created, item["key"], item["score"], item["max_score"],
+                      item["judgment"], str(item["evidence"] or "")[:MAX_EVIDENCE_CHARS], item["source"])
+                     for item in items])
+                conn.executemany("INSERT OR REPLACE INTO item_labels (kind, item_key, label) VALUES (?, ?, ?)",
+                                 [(kind, item["key"], item["label"]) for item in items])
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return evaluation_id
+
+    # ------------------------------------------------------------------
+    # 조회 (이력 화면)
+    # ------------------------------------------------------------------
+    def summary(self, kind, since=None):
+        """기간 내 평가 수 / 업체 수 / 평균 총점"""
+        with self._db() as conn:
+            row = conn.execute("SELECT COUNT(*) AS evaluations, COUNT(DISTINCT contractor) AS contractors, "
+                               "AVG(total) AS avg_total FROM evaluations WHERE kind = ? AND created >= ?",
+                               (kind, since or 0)).fetchone()
+        return dict(row)
+
+    def contractors(self, kind, since=None, search="", limit=200):
+        """업체별 평가 수 / 평균·최근 총점 (평가 수 순). search: 업체명 일부"""
+        with self._db() as conn:
+            rows = conn.execute(
+                "SELECT contractor, COUNT(*) AS evaluations, AVG(total) AS avg_total, MAX(created) AS last "
+                "FROM evaluations WHERE kind = ? AND created >= ? AND contractor LIKE ? ESCAPE '\\' "
+                "GROUP BY contractor ORDER BY evaluations DESC, contractor LIMIT ?",
+                (kind, since or 0, f"%{_like_escape(search)}%", limit)).fetchall()
+        return [dict(r) for r in rows]
+
+    def trend(self, kind, contractors, since=None, bucket="%Y-%m"):
+        """업체별 기간(기본 월) 평균 총점 [{"contractor", "period", "avg_total", "evaluations"}]"""
+        if not contractors:
+            return []
+        with self._db() as conn:
+            rows = conn.execute(
+                f"SELECT contractor, strftime(?, created, 'unixepoch', 'localtime') AS period, "
+                f"AVG(total) AS avg_total, COUNT(*) AS evaluations FROM evaluations "
+                f"WHERE kind = ? AND contractor IN ({_in(contractors)}) AND created >= ? "
+                f"GROUP BY contractor, period ORDER BY period",
+                (bucket, kind, *contractors, since or 0)).fetchall()
+        return [dict(r) for r in rows]
+
+    def item_scores(self, kind, contractors, since=None):
+        """
+        업체 x 항목 득점률 (항목 점수 합 / 만점 합, 0~1)
+        [{"contractor", "item_key", "label", "rate", "avg_score", "evaluations"}] - 만점이 0인 감점 항목은 rate가 None
+        """
+        if not contractors:
+            return []
+        with self._db() as conn:
+            rows = conn.execute(
+                f"SELECT contractor, item_key, SUM(score) AS score, SUM(max_score) AS max_score, AVG(score) AS avg_score, "
+                f"COUNT(*) AS evaluations FROM evaluation_items "
+                f"WHERE kind = ? AND contractor IN ({_in(contractors)}) AND created >= ? GROUP BY contractor, item_key",
+                (kind, *contractors, since or 0)).fetchall()
+            labels = self._labels(conn, kind)
+        return [{"contractor": r["contractor"], "item_key": r["item_key"], "label": labels.get(r["item_key"], r["item_key"]),
+                 "rate": r["score"] / r["max_score"] if r["max_score"] and r["max_score"] > 0 else None,
+                 "avg_score": r["avg_score"], "evaluations": r["evaluations"]} for r in rows]
+
+    def weakest_items(self, kind, since=None, limit=10):
+        """전체 업체 기준 득점률이 낮은 항목 [{"item_key", "label", "rate", "evaluations"}]"""
+        with self._db() as conn:
+            rows = conn.execute(
+                "SELECT item_key, SUM(score) AS score, SUM(max_score) AS max_score, COUNT(*) AS evaluations "
+                "FROM evaluation_items WHERE kind = ? AND created >= ? "
+                "GROUP BY item_key HAVING SUM(max_score) > 0 ORDER BY score * 1.0 / max_score LIMIT ?",
+                (kind, since or 0, limit)).fetchall()
+            labels = self._labels(conn, kind)
+        return [{"item_key": r["item_key"], "label": labels.get(r["item_key"], r["item_key"]),
+                 "rate": r["score"] / r["max_score"], "evaluations": r["evaluations"]} for r in rows]
+
+    def evaluations(self, kind, contractor=None, since=None, limit=100):
+        """최근 평가 목록 (최신순)"""
+        sql = ("SELECT id, contractor, project, file_name, created, total, max_total, grade, model, elapsed, timings "
+               "FROM evaluations WHERE kind = ? AND created >= ?")
+        params = [kind, since or 0]
+        if contractor is not None:
+            sql += " AND contractor = ?"
+            params.append(contractor)
+        with self._db() as conn:
+            rows = conn.execute(sql + " ORDER BY created DESC LIMIT ?", (*params, limit)).fetchall()
+        return [{**dict(r), "timings": json.loads(r["timings"] or "{}")} for r in rows]
+
+    def items(self, evaluation_id):
+        """평가 1건의 항목별 점수/근거"""
+        with self._db() as conn:
+            rows = conn.execute("SELECT i.item_key, l.label, i.score, i.max_score, i.judgment, i.evidence, i.source "
+                                "FROM evaluation_items i LEFT JOIN item_labels l ON l.kind = i.kind AND l.item_key = i.item_key "
+                                "WHERE i.evaluation_id = ? ORDER BY i.rowid", (evaluation_id,)).fetchall()
+        return [dict(r) for r in rows]
+
+    def _labels(self, conn, kind):
+        return {r["item_key"]: r["label"]
+                for r in conn.execute("SELECT item_key, label FROM item_labels WHERE kind = ?", (kind,)).fetchall()}
+
+
+# 프로세스 전역 저장소 (모든 세션/작업 스레드 공유)
+_history = None
+_history_lock = threading.Lock()
+
+
+def get_eval_history():
+    global _history
+    if _history is None:
+        with _history_lock:
+            if _history is None:
+                _history = EvalHistory()
+    return _history
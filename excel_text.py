@@ -0,0 +1,355 @@
+import io
+import math
+
+from pdf_text import CHARS_PER_TOKEN, estimate_tokens
+from revision_store import unit_hash
+from risk_lint import map_sheet
+
+# ==========================================
+# 1-2. 위험성평가 엑셀 압축 + 토큰 예산 분할
+# ==========================================
+# 시트를 마크다운 표로 그대로 옮기면 빈 열/병합 셀/중복 행과 칸 맞춤 공백 때문에 토큰이 크게 늘고,
+# 큰 통합 문서는 컨텍스트 한도를 넘긴다. 여기서는 로컬에서 먼저 표를 정리한다.
+#   0) 시트를 하나씩 행 단위로 스트리밍해서 읽는다 (openpyxl 읽기 전용, 이미지/서식 무시, 행/글자 수 상한)
+#   1) 실제 머리글 행 찾기 (위쪽의 제목/결재란 행은 "제목" 줄로만 남김, 2단 머리글은 합침)
+#   2) 반복되는 머리글 행(인쇄용) 제거
+#   3) 빈 열 / 앞 열과 내용이 같은 중복 열(병합 셀) 제거, 빈 행 / 완전히 같은 행 제거
+#   4) '|' 구분 간결 표 형식으로 출력
+#   5) 토큰 예산(추정치)에 맞춰 구간으로 분할 (구간마다 시트명/머리글 반복)
+
+CHUNK_TOKENS = 60000        # 구간당 토큰 예산 (추정치, 프롬프트/가이드라인 제외)
+HEADER_SCAN_ROWS = 20       # 머리글 행을 찾을 시트 앞부분 행 수
+MIN_HEADER_CELLS = 2        # 머리글로 인정할 최소 글자 칸 수
+MAX_CELL_CHARS = 300        # 칸 하나의 최대 글자 수 (넘으면 잘라냄)
+MAX_SHEET_ROWS = 20000      # 시트당 최대 행 수 (빈 행 제외, 넘는 행은 읽지 않음)
+MAX_TEXT_CHARS = 2_000_000  # 통합 문서 전체 정리 텍스트 상한 (약 100만 토큰, 넘으면 이후 시트는 읽지 않음)
+MAX_BLANK_ROWS = 1000       # 연속 빈 행이 이만큼 이어지면 시트 끝으로 간주 (서식만 지정된 행)
+OLE_MAGIC = b"\xd0\xcf\x11\xe0"   # 구형 xls(OLE 복합 문서) 시그니처
+
+EXCEL_TEXT_HEADER = """### [위험성평가서 엑셀 데이터 분석] ###
+(표 형식: 시트마다 첫 줄은 열 이름, 이후 한 줄이 한 행이며 칸은 '|'로 구분. 빈 칸은 값이 없거나 위 행과 병합된 칸)
+"""
+
+
+def _cell(value):
+    """칸 값을 한 줄 문자열로 정규화 (빈 값/NaN -> "", 정수형 실수 -> 정수)"""
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        if math.isnan(value):
+            return ""
+        return str(int(value)) if value.is_integer() else f"{value:g}"
+    if hasattr(value, "strftime"):
+        text = str(value)
+        return text[:-9] if text.endswith(" 00:00:00") else text
+    text = " ".join(str(value).split()).replace("|", "/")
+    return text[:MAX_CELL_CHARS] + "…" if len(text) > MAX_CELL_CHARS else text
+
+
+def _is_number(text):
+    try:
+        float(text.replace(",", ""))
+        return True
+    except ValueError:
+        return False
+
+
+def _label_count(row):
+    return sum(1 for c in row if c and not _is_number(c))
+
+
+def find_header_row(rows):
+    """
+    앞부분 행 중 글자 칸이 가장 많은 행과 비슷한 수준(60% 이상)인 첫 행을 머리글로 본다.
+    (제목 행은 칸이 1~2개뿐이라 걸러지고, 데이터 행보다 위에 있는 머리글이 선택됨) 없으면 None
+    """
+    counts = [_label_count(row) for row in rows[:HEADER_SCAN_ROWS]]
+    best = max(counts, default=0)
+    if best < MIN_HEADER_CELLS:
+        return None
+    threshold = max(MIN_HEADER_CELLS, best * 0.6)
+    return next(i for i, n in enumerate(counts) if n >= threshold)
+
+
+def _merge_subheader(header, rows, index):
+    """
+    2단 머리글(예: '위험성' 아래 '빈도/강도') 처리: 머리글 바로 아래 행이 숫자 없이 글자만 있고
+    머리글의 빈 칸(병합 셀)을 채우고 있으면 '상위/하위' 형태로 합친다. 반환: (머리글, 데이터 시작 행)
+    """
+    if index + 1 >= len(rows):
+        return header, index + 1
+    sub = rows[index + 1]
+    filled = [c for c in sub if c]
+    if not filled or any(_is_number(c) for c in filled):
+        return header, index + 1
+    if not any(sub[i] and not header[i] for i in range(len(header))):
+        return header, index + 1
+    merged, parent = [], ""
+    for top, bottom in zip(header, sub):
+        parent = top or parent
+        if bottom and parent and bottom != parent:
+            merged.append(f"{parent}/{bottom}")
+        else:
+            merged.append(top or bottom)
+    return merged, index + 2
+
+
+def _markdown_tokens(rows):
+    """기존 방식(df.to_markdown, 칸 폭 맞춤)으로 보냈을 때의 토큰 수 추정"""
+    if not rows:
+        return 0
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    return estimate_tokens(" " * (sum(w + 3 for w in widths) + 2) * (len(rows) + 1))
+
+
+def compact_sheet(name, raw_rows):
+    """
+    시트 하나를 정리. raw_rows: read_sheets가 내보낸 정규화된 행 목록 (머리글 포함)
+    반환: {"name", "title", "header", "rows", "stats"} (내용이 없는 시트는 None)
+    """
+    width = max((len(r) for r in raw_rows), default=0)
+    rows = [r + [""] * (width - len(r)) for r in raw_rows if any(r)]
+    if not rows:
+        return None
+    raw_tokens = _markdown_tokens(rows)
+
+    index = find_header_row(rows)
+    if index is None:
+        # 머리글이 없는 시트(메모 등): 열 이름 없이 그대로 정리
+        title, header, body, start = [], [f"열{i + 1}" for i in range(width)], rows, 0
+    else:
+        title = [" ".join(c for c in r if c) for r in rows[:index]]
+        header, start = _merge_subheader(rows[index], rows, index)
+        body = rows[start:]
+
+    # 반복 머리글 행(인쇄 페이지마다 머리글을 다시 넣은 경우)은 열 정리 전에 원래 형태로 비교해 뺀다
+    header_rows = {tuple(r) for r in rows[index:start]} if index is not None else set()
+    kept_body = [r for r in body if tuple(r) not in header_rows]
+    repeated_headers, body = len(body) - len(kept_body), kept_body
+
+    # 열 정리: 머리글/데이터가 모두 빈 열, 앞 열과 데이터가 같고 머리글이 같거나 빈 열(병합 셀 복제)
+    keep, seen = [], {}
+    for i in range(width):
+        values = tuple(r[i] for r in body)
+        if not header[i] and not any(values):
+            continue
+        earlier = seen.get(values)
+        if earlier is not None and any(values) and (not header[i] or header[i] == header[earlier]):
+            continue
+        seen.setdefault(values, i)
+        keep.append(i)
+    header = [header[i] or f"열{i + 1}" for i in keep]
+
+    # 행 정리: 빈 행, 완전히 같은 행
+    compact_rows, unique = [], set()
+    duplicates = 0
+    for r in body:
+        row = tuple(r[i] for i in keep)
+        if not any(row):
+            continue
+        if row in unique:
+            duplicates += 1
+            continue
+        unique.add(row)
+        compact_rows.append(row)
+
+    return {
+        "name": name,
+        "title": [t for t in title if t],
+        "header": header,
+        "rows": compact_rows,
+        "stats": {
+            "raw_rows": len(raw_rows),
+            "rows": len(compact_rows),
+            "dropped_columns": width - len(keep),
+            "duplicate_rows": duplicates + repeated_headers,
+            "raw_tokens": raw_tokens,
+        },
+    }
+
+
+def _sheet_head(sheet, part=None):
+    head = f"\n--- Sheet: {sheet['name']}" + (f" (이어서, {part}행부터)" if part else "") + " ---\n"
+    if sheet["title"] and not part:
+        head += "제목: " + " / ".join(sheet["title"]) + "\n"
+    return head + "|".join(sheet["header"]) + "\n"
+
+
+class ChunkWriter:
+    """
+    정리된 시트를 받는 대로 토큰 예산에 맞춘 구간 텍스트로 써 나간다 (시트는 쓰고 나면 버려도 됨).
+    작은 시트는 한 구간에 모으고, 큰 시트는 행 단위로 잘라 구간마다 시트명/머리글을 다시 붙인다.
+    max_chars: 전체 글자 수 상한 (넘으면 그 행부터 버리고 full=True)
+    수정본 비교용으로 쓴 행마다 내용 해시(units)와 (시트명, 행 텍스트)(lines), 시트별 머리글(heads)을 남긴다.
+    """
+
+    def __init__(self, chunk_tokens=CHUNK_TOKENS, max_chars=MAX_TEXT_CHARS):
+        self.budget = int(chunk_tokens * CHARS_PER_TOKEN)   # 추정과 같은 비율로 글자 수 예산 환산
+        self.max_chars = max_chars
+        self.chunks = []
+        self.total = 0
+        self.rows = 0
+        self.full = False
+        self.units = []
+        self.lines = []
+        self.heads = {}
+        self._reset()
+
+    def _reset(self):
+        self._buf = io.StringIO()
+        self._size = 0
+        self._names = []
+        self._rows = 0
+
+    def _write(self, text):
+        self._buf.write(text)
+        self._size += len(text)
+        self.total += len(text)
+
+    def _flush(self):
+        if self._size:
+            self.chunks.append({"text": EXCEL_TEXT_HEADER + self._buf.getvalue(),
+                                "sheets": self._names, "rows": self._rows})
+        self._reset()
+
+    def add(self, sheet):
+        if self.full:
+            return
+        head = _sheet_head(sheet)
+        if self._size and self._size + len(head) > self.budget:
+            self._flush()
+        self._write(head)
+        self._names.append(sheet["name"])
+        self.heads[sheet["name"]] = head.strip("\n")
+        for n, row in enumerate(sheet["rows"]):
+            line = "|".join(row) + "\n"
+            if self.total + len(line) > self.max_chars:
+                self.full = True
+                return
+            if self._size + len(line) > self.budget and self._rows:
+                self._flush()
+                self._write(_sheet_head(sheet, part=n + 1))
+                self._names.append(sheet["name"])
+            self._write(line)
+            self._rows += 1
+            self.rows += 1
+            self.units.append(unit_hash(f"{sheet['name']}|{line}"))
+            self.lines.append([sheet["name"], line.rstrip("\n")])
+
+    def finish(self):
+        """구간 목록 [{"text", "sheets", "rows"}]"""
+        self._flush()
+        return self.chunks
+
+
+def _trimmed(values):
+    """칸 값 정규화 + 끝쪽 빈 칸 제거 (서식만 있는 열까지 읽히는 경우 대비)"""
+    row = [_cell(v) for v in values]
+    while row and not row[-1]:
+        row.pop()
+    return row
+
+
+def _sheet_rows(values_iter, max_rows, limits):
+    """빈 행을 건너뛰며 정규화한 행을 내보낸다. 행 수 상한 또는 연속 빈 행이 길게 이어지면 중단"""
+    count = blank = 0
+    for values in values_iter:
+        row = _trimmed(values)
+        if not row:
+            blank += 1
+            if blank >= MAX_BLANK_ROWS:
+                return
+            continue
+        blank = 0
+        if count >= max_rows:
+            limits["rows_capped"] = True
+            return
+        count += 1
+        yield row
+
+
+def _is_legacy_xls(file_obj):
+    head = file_obj.read(len(OLE_MAGIC))
+    file_obj.seek(0)
+    return head == OLE_MAGIC
+
+
+def read_sheets(file_obj, max_rows=MAX_SHEET_ROWS, limits=None):
+    """
+    시트를 하나씩 읽어 (시트명, 행 목록)을 내보내는 생성기. 행은 정규화된 문자열 목록(빈 행 제외).
+    xlsx는 openpyxl 읽기 전용 모드로 행 단위 스트리밍 (이미지/서식/차트 시트는 읽지 않음),
+    구형 xls만 pandas로 시트별로 읽는다. limits: 전달 시 상한에 걸렸는지("rows_capped") 기록
+    """
+    limits = limits if limits is not None else {}
+    if _is_legacy_xls(file_obj):
+        import pandas as pd # 구형 xls 검토 시에만 로드
+        with pd.ExcelFile(file_obj) as book:
+            for name in book.sheet_names:
+                df = book.parse(name, header=None, nrows=max_rows + 1)
+                yield name, list(_sheet_rows(df.itertuples(index=False, name=None), max_rows, limits))
+        return
+
+    from openpyxl import load_workbook
+    wb = load_workbook(file_obj, read_only=True, data_only=True)
+    try:
+        for ws in wb.worksheets:
+            yield ws.title, list(_sheet_rows(ws.iter_rows(values_only=True), max_rows, limits))
+    finally:
+        wb.close()
+
+
+def prepare_workbook(file_obj, chunk_tokens=CHUNK_TOKENS, max_rows=MAX_SHEET_ROWS, max_chars=MAX_TEXT_CHARS):
+    """
+    엑셀 통합 문서를 시트 단위로 읽어 정리/분할. 정리된 표 텍스트가 max_chars를 넘으면 그 뒤는 읽지 않는다.
+    원본 시트는 하나씩만 메모리에 두지만, 구간 텍스트/수정본 비교 행/점검용 표는 읽은 시트 전체분이 쌓이므로
+    메모리 상한은 시트 단위가 아니라 max_chars(정리된 텍스트 전체 크기)로 정해진다.
+    (복사 의심 행 점검이 시트를 넘나들어 같은 위험요인+대책을 찾으므로 점검용 표도 끝까지 모아 둔다)
+    반환:
+      chunks: 구간 목록 [{"text", "sheets", "rows"}] (작은 문서는 1개)
+      tables: 사전 점검용 표 (risk_lint.map_sheet 결과, 위험요인 열이 있는 시트만)
+      revision: 수정본 비교용 행 단위 정보 {"unit", "units", "lines", "heads"} (risk_eval.review_revision)
+      stats: 시트/행 수, 제거한 열/행 수, 기존 방식 대비 추정 토큰, 상한에 걸려 잘렸는지(truncated)
+    """
+    limits = {}
+    writer = ChunkWriter(chunk_tokens, max_chars)
+    totals = {"sheets": 0, "dropped_columns": 0, "duplicate_rows": 0, "raw_tokens": 0}
+    tables = []
+    # 시트를 하나씩 읽고 정리해 바로 구간 텍스트로 쓴다 (원본 행은 시트 하나분만, 정리된 결과는 max_chars까지 누적)
+    for name, rows in read_sheets(file_obj, max_rows, limits):
+        sheet = compact_sheet(name, rows)
+        if sheet is None:
+            continue
+        writer.add(sheet)
+        mapped = map_sheet(sheet)
+        if mapped is not None:
+            tables.append(mapped)
+        totals["sheets"] += 1
+        for key in ("dropped_columns", "duplicate_rows", "raw_tokens"):
+            totals[key] += sheet["stats"][key]
+        if writer.full:
+            break
+
+    chunks = writer.finish()
+    return {
+        "chunks": chunks,
+        "tables": tables,
+        "revision": {"unit": "행", "units": writer.units, "lines": writer.lines, "heads": writer.heads},
+        "stats": {
+            **totals,
+            "rows": writer.rows,
+            "sent_tokens": sum(estimate_tokens(c["text"]) for c in chunks),
+            "truncated": bool(limits) or writer.full,
+        },
+    }
+
+
+def describe(prep):
+    """화면 표시용 정리 결과 요약"""
+    s = prep["stats"]
+    text = (f"📊 엑셀 {s['sheets']}개 시트 {s['rows']:,}행 · 빈/중복 열 {s['dropped_columns']}개, "
+            f"중복 행 {s['duplicate_rows']}개 제거 · 약 {s['sent_tokens']:,} 토큰 (기존 방식 약 {s['raw_tokens']:,}, 추정)")
+    if len(prep["chunks"]) > 1:
+        text += f" · {len(prep['chunks'])}개 구간으로 나누어 병렬 검토"
+    if s["truncated"]:
+        text += " · 크기 상한을 넘어 일부만 검토"
+    return text
@@ -0,0 +1,296 @@
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from contextlib import contextmanager
+
+# ==========================================
+# 백그라운드 분석 작업 큐 (SQLite 영속 큐 + 작업 스레드 풀)
+# ==========================================
+# 30~90초 걸리는 분석을 Streamlit 스크립트 안에서 동기 실행하면 해당 세션이 멈추고,
+# 브라우저가 재연결되면 진행 중이던 작업도 잃는다.
+# 화면은 작업을 등록(submit)하고 작업 ID만 받아 진행 상황을 조회(polling)하며,
+# 실제 분석은 프로세스 공용 작업 스레드가 수행한다. 입력/결과는 SQLite에 저장되므로
+# 세션이 끊겨도 같은 사용자(owner)가 다시 접속하면 진행 상황과 결과를 그대로 이어서 본다.
+#   - 취소: 대기 중인 작업은 즉시 취소, 실행 중인 작업은 다음 진행 보고 시점에 중단 (협조적 취소)
+#   - 서버 재시작 시 실행 중이던 작업은 대기 상태로 되돌려 다시 실행
+#   - 일괄 작업(batch=True로 등록한 종류)은 일반 작업보다 나중에 꺼내고, 동시에 JOB_BATCH_WORKERS개까지만 실행
+#     -> 누가 수백 건을 일괄 등록해도 다른 사용자의 단건 분석은 남는 작업 스레드에서 바로 시작된다
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+JOB_DB_PATH = os.path.join(BASE_DIR, ".cache", "jobs.sqlite3")
+# 동시 실행 작업 수 (프로세스 전체 공용, 환경 변수 JOB_WORKERS로 조정. API 분당 호출 한도는 공용 속도 제한기가 별도로 지킴)
+JOB_WORKERS = max(1, int(os.environ.get("JOB_WORKERS", "4")))
+# 일괄 작업이 동시에 쓸 수 있는 작업 스레드 수 (환경 변수 JOB_BATCH_WORKERS, 기본: 1개는 일반 작업용으로 남김)
+JOB_BATCH_WORKERS = max(1, int(os.environ.get("JOB_BATCH_WORKERS", str(max(1, JOB_WORKERS - 1)))))
+PRIORITY_NORMAL = 0
+PRIORITY_BATCH = 1          # 값이 클수록 나중에 실행
+POLL_INTERVAL = 0.5         # 작업 스레드가 새 작업을 확인하는 주기 (초, 등록 시에는 즉시 깨움)
+JOB_TTL = 24 * 60 * 60      # 끝난 작업 보관 기간
+
+ACTIVE_STATUSES = ("queued", "running")
+STATUS_LABELS = {
+    "queued": "대기 중",
+    "running": "진행 중",
+    "done": "완료",
+    "failed": "실패",
+    "cancelled": "취소됨",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    title TEXT,
+    owner TEXT,
+    job_group TEXT,
+    status TEXT NOT NULL,
+    message TEXT,
+    partial TEXT,
+    error TEXT,
+    cancel_requested INTEGER DEFAULT 0,
+    priority INTEGER DEFAULT 0,
+    created REAL,
+    started REAL,
+    finished REAL,
+    payload BLOB,
+    result BLOB
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created);
+CREATE INDEX IF NOT EXISTS jobs_owner ON jobs (owner, created);
+"""
+
+# 목록/상태 조회 시 읽는 열 (입력/결과 BLOB 제외)
+_INFO_COLUMNS = "id, kind, title, owner, job_group, status, message, partial, error, cancel_requested, created, started, finished"
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobContext:
+    """작업 함수에 전달되는 진행 보고 / 취소 확인 객체"""
+
+    def __init__(self, queue, job_id):
+        self._queue = queue
+        self.job_id = job_id
+        self.items = []
+
+    def cancelled(self):
+        return self._queue._cancel_requested(self.job_id)
+
+    def check(self):
+        """취소 요청이 있으면 JobCancelled 발생"""
+        if self.cancelled():
+            raise JobCancelled()
+
+    def progress(self, message):
+        self.check()
+        self._queue._update(self.job_id, message=message)
+
+    def emit(self, item):
+        """스트리밍 중 완성된 항목 보고 (화면에서 실시간 표시용)"""
+        self.check()
+        self.items.append(item)
+        self._queue._update(self.job_id, partial=json.dumps(self.items, ensure_ascii=False, default=str))
+
+
+class JobQueue:
+    def __init__(self, db_path=JOB_DB_PATH, workers=JOB_WORKERS, batch_workers=JOB_BATCH_WORKERS):
+        self.db_path = db_path
+        self.workers = workers
+        self.batch_workers = batch_workers
+        self._handlers = {}
+        self._priorities = {}
+        self._threads = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with self._db() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            # priority 열이 없던 이전 버전의 DB
+            if "priority" not in {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}:
+                conn.execute("ALTER TABLE jobs ADD COLUMN priority INTEGER DEFAULT 0")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, priority, created)")
+            # 이전 프로세스에서 실행 중이던 작업은 다시 대기열로
+            conn.execute("UPDATE jobs SET status = 'queued', started = NULL, message = NULL, partial = NULL "
+                         "WHERE status = 'running'")
+        self.purge()
+
+    @contextmanager
+    def _db(self):
+        """자동 커밋 연결 (스레드마다 새로 열고 닫음)"""
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    # ------------------------------------------------------------------
+    # 작업 함수 등록 / 작업 스레드
+    # ------------------------------------------------------------------
+    def register(self, kind, handler, batch=False):
+        """handler(payload, ctx) -> 결과 (pickle 가능한 값). batch=True: 일괄 작업 (낮은 우선순위 + 동시 실행 수 제한)"""
+        self._handlers[kind] = handler
+        self._priorities[kind] = PRIORITY_BATCH if batch else PRIORITY_NORMAL
+
+    def start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker_loop, name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _worker_loop(self):
+        # 큐 자체의 오류(DB 잠김, 결과 pickle 실패 등)로 작업 스레드가 죽으면 작업이 '진행 중'으로 남으므로
+        # 반복마다 예외를 잡아 기록하고 계속 돈다
+        while True:
+            try:
+                job = self._claim()
+            except Exception:
+                traceback.print_exc()
+                job = None
+            if job is None:
+                self._wake.wait(POLL_INTERVAL)
+                self._wake.clear()
+                continue
+            try:
+                self._run(job)
+            except Exception as e:
+                traceback.print_exc()
+                self._fail(job["id"], e)
+
+    def _claim(self):
+        """
+        대기 중인 작업 하나를 실행 상태로 가져온다 (우선순위 -> 등록 순).
+        실행 중인 일괄 작업이 batch_workers개에 이르면 일반 작업만 가져온다
+        """
+        if not self._handlers:
+            return None
+        kinds = list(self._handlers)
+        with self._db() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                running_batch = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'running' AND priority > ?",
+                                             (PRIORITY_NORMAL,)).fetchone()[0]
+                max_priority = PRIORITY_BATCH if running_batch < self.batch_workers else PRIORITY_NORMAL
+                row = conn.execute(
+                    f"SELECT id, kind, payload FROM jobs WHERE status = 'queued' AND kind IN ({','.join('?' * len(kinds))}) "
+                    "AND priority <= ? ORDER BY priority, created LIMIT 1", (*kinds, max_priority)).fetchone()
+                if row is not None:
+                    conn.execute("UPDATE jobs SET status = 'running', started = ? WHERE id = ?", (time.time(), row["id"]))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return row
+
+    def _run(self, job):
+        ctx = JobContext(self, job["id"])
+        try:
+            result = self._handlers[job["kind"]](pickle.loads(job["payload"]), ctx)
+        except JobCancelled:
+            self._finish(job["id"], "cancelled")
+        except Exception as e:
+            traceback.print_exc()
+            self._finish(job["id"], "failed", error=str(e) or type(e).__name__)
+        else:
+            self._finish(job["id"], "done", result=result)
+
+    def _finish(self, job_id, status, result=None, error=None):
+        with self._db() as conn:
+            conn.execute("UPDATE jobs SET status = ?, finished = ?, result = ?, error = ?, payload = NULL WHERE id = ?",
+                         (status, time.time(), pickle.dumps(result) if result is not None else None, error, job_id))
+
+    def _fail(self, job_id, exc):
+        """결과 저장 단계에서 난 오류로 작업을 실패 처리 (이것도 실패하면 재시작 시 다시 대기열로 돌아감)"""
+        try:
+            self._finish(job_id, "failed", error=f"작업 결과 저장 실패: {str(exc) or type(exc).__name__}")
+        except Exception:
+            traceback.print_exc()
+
+    def _update(self, job_id, **fields):
+        columns = ", ".join(f"{key} = ?" for key in fields)
+        with self._db() as conn:
+            conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    def _cancel_requested(self, job_id):
+        with self._db() as conn:
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row is None or bool(row["cancel_requested"])
+
+    # ------------------------------------------------------------------
+    # 화면에서 쓰는 API
+    # ------------------------------------------------------------------
+    def submit(self, kind, payload, title="", owner=None, group=None):
+        """작업 등록 후 작업 ID 반환"""
+        if kind not in self._handlers:
+            raise ValueError(f"등록되지 않은 작업 종류: {kind}")
+        job_id = uuid.uuid4().hex
+        with self._db() as conn:
+            conn.execute("INSERT INTO jobs (id, kind, title, owner, job_group, status, priority, created, payload) "
+                         "VALUES (?, ?, ?, ?, ?, 'queued', ?, ?, ?)",
+                         (job_id, kind, title, owner, group, self._priorities[kind], time.time(), pickle.dumps(payload)))
+        self._wake.set()
+        return job_id
+
+    @staticmethod
+    def _info(row):
+        job = dict(row)
+        job["partial"] = json.loads(job["partial"]) if job["partial"] else []
+        return job
+
+    def get(self, job_id):
+        """작업 상태 (입력/결과 제외). 없으면 None"""
+        with self._db() as conn:
+            row = conn.execute(f"SELECT {_INFO_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._info(row) if row is not None else None
+
+    def result(self, job_id):
+        with self._db() as conn:
+            row = conn.execute("SELECT result FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return pickle.loads(row["result"]) if row is not None and row["result"] is not None else None
+
+    def list(self, owner=None, kind=None, group=None, statuses=None, limit=50):
+        """최근 작업부터"""
+        where, args = [], []
+        for column, value in (("owner", owner), ("kind", kind), ("job_group", group)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                args.append(value)
+        if statuses:
+            where.append(f"status IN ({','.join('?' * len(statuses))})")
+            args.extend(statuses)
+        sql = f"SELECT {_INFO_COLUMNS} FROM jobs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY created DESC LIMIT ?"
+        with self._db() as conn:
+            rows = conn.execute(sql, (*args, limit)).fetchall()
+        return [self._info(row) for row in rows]
+
+    def cancel(self, job_id):
+        """대기 중이면 즉시 취소, 실행 중이면 취소 요청 (작업이 다음 진행 보고 시점에 중단)"""
+        with self._db() as conn:
+            conn.execute("UPDATE jobs SET status = 'cancelled', finished = ?, payload = NULL "
+                         "WHERE id = ? AND status = 'queued'", (time.time(), job_id))
+            conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ?", (job_id,))
+
+    def purge(self, max_age=JOB_TTL):
+        """보관 기간이 지난 끝난 작업 삭제"""
+        with self._db() as conn:
+            conn.execute(f"DELETE FROM jobs WHERE status NOT IN ({','.join('?' * len(ACTIVE_STATUSES))}) "
+                         "AND finished < ?", (*ACTIVE_STATUSES, time.time() - max_age))
+
+    def stats(self):
+        with self._db() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
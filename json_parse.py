@@ -0,0 +1,340 @@
+import json
+import re
+
+from metrics import timed
+
+# ==========================================
+# 모델 응답 JSON 파싱 공용 모듈
+# ==========================================
+# 모든 탭의 응답을 같은 경로로 해석한다.
+#   1. 코드펜스/앞뒤 설명문 제거 후 첫 번째 JSON 값만 균형 괄호로 잘라 파싱
+#   2. max_output_tokens에 걸려 끊긴 응답은 마지막으로 완성된 값까지 살리고 괄호를 닫아 복구
+#   3. 탭별 스키마로 검증/정규화 (필수 키가 빠진 항목은 제외, 숫자 문자열은 숫자로)
+#   4. 끝부분만 잘린 경우 전체 재생성 대신 "이어서 출력" 요청 1회로 나머지만 받음
+
+_FENCE_RE = re.compile(r"```(?:json|JSON)?")
+
+# 끊긴 응답 이어받기 요청문
+CONTINUE_PROMPT = """직전 응답이 출력 길이 제한으로 중간에 끊겼습니다.
+끊긴 지점의 바로 다음 문자부터 JSON을 이어서 출력하십시오.
+이미 출력한 내용을 반복하지 말고, 코드펜스나 설명문 없이 나머지 JSON만 출력하십시오."""
+
+MAX_CONTINUATIONS = 1
+OVERLAP_SCAN_CHARS = 200    # 이어받은 응답이 앞부분을 반복했는지 확인하는 최대 길이
+
+
+class IncrementalArrayParser:
+    """
+    스트리밍 응답을 조각(chunk)째 받아, 최상위 JSON 배열 안의 객체가 완성될 때마다 돌려준다.
+    - 배열 앞의 코드펜스/설명문, {"items": [...]}처럼 dict로 한 번 감싼 배열도 처리
+    - 문자열 안의 괄호/따옴표(이스케이프 포함)는 구조로 보지 않음
+    """
+
+    def __init__(self):
+        self._text = ""
+        self._pos = 0
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._array_depth = None    # 항목을 꺼낼 배열의 깊이
+        self._item_start = None
+        self._root_closed = False   # 첫 배열이 닫힌 뒤 나오는 배열은 무시
+        self.items = []
+
+    def feed(self, chunk):
+        """새 조각을 넣고, 이번에 완성된 객체 목록을 반환"""
+        self._text += chunk
+        text = self._text
+        completed = []
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+            if ch == '"':
+                if self._stack:
+                    self._in_string = True
+            elif ch in "[{":
+                self._stack.append(ch)
+                if ch == "[" and self._array_depth is None and not self._root_closed:
+                    self._array_depth = len(self._stack)
+                elif ch == "{" and self._array_depth is not None and len(self._stack) == self._array_depth + 1:
+                    self._item_start = i
+            elif ch in "]}":
+                if not self._stack:
+                    continue
+                if ch == "}" and self._item_start is not None and len(self._stack) == self._array_depth + 1:
+                    try:
+                        item = json.loads(text[self._item_start:i + 1])
+                        completed.append(item)
+                    except ValueError:
+                        pass
+                    self._item_start = None
+                self._stack.pop()
+                if self._array_depth is not None and len(self._stack) < self._array_depth:
+                    self._array_depth = None
+                    self._root_closed = True
+        self._pos = len(text)
+        self.items.extend(completed)
+        return completed
+
+    @property
+    def text(self):
+        return self._text
+
+
+def _chunk_texts(response):
+    for chunk in response:
+        try:
+            yield chunk.text
+        except ValueError:
+            # 안전 필터 등으로 텍스트가 없는 조각
+            continue
+
+
+def stream_json_items(model, contents, on_item=None, parser=None, **kwargs):
+    """
+    generate_content(stream=True)로 호출하면서 완성된 배열 항목마다 on_item(항목)을 호출.
+    parser를 넘기면 이어서 파싱한다 (끊긴 응답 이어받기용). 이번 호출의 응답 텍스트를 반환한다.
+    """
+    parser = parser or IncrementalArrayParser()
+    pieces = []
+    for piece in _chunk_texts(model.generate_content(contents, stream=True, **kwargs)):
+        pieces.append(piece)
+        for item in parser.feed(piece):
+            if on_item: on_item(item)
+    return "".join(pieces)
+
+
+# ==========================================
+# 관용 파싱 + 끊긴 응답 복구
+# ==========================================
+
+def strip_fences(text):
+    return _FENCE_RE.sub("", text or "").strip()
+
+
+def _scan(text):
+    """
+    첫 번째 JSON 값을 찾아 (값, 잘림 여부)를 반환. 찾지 못하면 (None, 잘림 여부).
+    끊긴 경우 마지막으로 닫힌 객체/배열까지 자르고 열린 괄호를 닫아 복구한다.
+    """
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        return None, False
+    begin = min(starts)
+    stack, in_string, escape = [], False, False
+    last_cut = None     # (자를 위치, 그 시점에 열려 있는 괄호)
+    for i in range(begin, len(text)):
+        ch = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in "[{":
+            stack.append(ch)
+        elif ch in "]}":
+            if not stack:
+                break
+            stack.pop()
+            if not stack:
+                try:
+                    return json.loads(text[begin:i + 1]), False
+                except ValueError:
+                    return None, False
+            last_cut = (i + 1, list(stack))
+
+    if last_cut is None:
+        return None, True
+    end, still_open = last_cut
+    body = text[begin:end].rstrip().rstrip(",")
+    closers = "".join("]" if c == "[" else "}" for c in reversed(still_open))
+    try:
+        return json.loads(body + closers), True
+    except ValueError:
+        return None, True
+
+
+def parse_json(text):
+    """응답 텍스트 -> (값, 잘림 여부). 값을 전혀 복구하지 못하면 값은 None"""
+    cleaned = strip_fences(text)
+    try:
+        return json.loads(cleaned), False
+    except ValueError:
+        return _scan(cleaned)
+
+
+# ==========================================
+# 탭별 스키마 검증
+# ==========================================
+# 스키마는 dict로 표현한다.
+#   array_schema(필수 키, 숫자 키): 객체 배열. {"items": [...]}처럼 dict로 한 번 감싼 배열도 허용
+#   object_schema(키=하위 스키마 또는 None): 객체. None은 형식 검사 없이 dict 여부만 확인
+
+def array_schema(required=(), numeric=()):
+    return {"type": "array", "required": list(required), "numeric": list(numeric)}
+
+
+def object_schema(**fields):
+    return {"type": "object", "fields": fields}
+
+
+def _to_number(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    try:
+        number = float(str(value).strip().replace("점", ""))
+    except ValueError:
+        return value
+    return int(number) if number.is_integer() else number
+
+
+def validate(data, schema):
+    """스키마에 맞게 정규화. (정규화된 값 또는 None, 문제 목록) 반환"""
+    if schema is None:
+        return data, []
+    if schema["type"] == "array":
+        if isinstance(data, dict):
+            lists = [v for v in data.values() if isinstance(v, list)]
+            data = lists[0] if lists else None
+        if not isinstance(data, list):
+            return None, ["배열 형식이 아님"]
+        items, dropped = [], 0
+        for item in data:
+            if not isinstance(item, dict) or any(key not in item for key in schema["required"]):
+                dropped += 1
+                continue
+            for key in schema["numeric"]:
+                if key in item: item[key] = _to_number(item[key])
+            items.append(item)
+        problems = [f"형식이 맞지 않는 항목 {dropped}개 제외"] if dropped else []
+        if data and not items:
+            return None, problems
+        return items, problems
+
+    if not isinstance(data, dict):
+        return None, ["객체 형식이 아님"]
+    problems = []
+    for key, sub_schema in schema["fields"].items():
+        value = data.get(key)
+        if sub_schema is None:
+            if not isinstance(value, dict):
+                data[key] = {}
+                problems.append(f"'{key}' 누락")
+            continue
+        if value is None:
+            problems.append(f"'{key}' 누락")
+        else:
+            value, sub_problems = validate(value, sub_schema)
+            problems.extend(f"{key}: {p}" for p in sub_problems)
+        data[key] = value if value is not None else ([] if sub_schema["type"] == "array" else {})
+    return data, problems
+
+
+def _size(data):
+    """후보 결과 비교용 (복구된 항목 수)"""
+    if isinstance(data, list):
+        return len(data)
+    if isinstance(data, dict):
+        return sum(_size(v) if isinstance(v, (list, dict)) else 1 for v in data.values())
+    return 0
+
+
+# ==========================================
+# 모델 호출 + 파싱 + 이어받기
+# ==========================================
+
+def _continuation_contents(contents, partial_text):
+    parts = contents if isinstance(contents, list) else [contents]
+    return [
+        {"role": "user", "parts": parts},
+        {"role": "model", "parts": [partial_text]},
+        {"role": "user", "parts": [CONTINUE_PROMPT]},
+    ]
+
+
+def _trim_overlap(partial_text, continuation):
+    """이어받은 응답이 끊긴 부분의 끝을 반복해서 시작하면 겹친 부분을 잘라낸다"""
+    continuation = strip_fences(continuation)
+    tail = partial_text[-OVERLAP_SCAN_CHARS:]
+    for size in range(min(len(tail), len(continuation)), 0, -1):
+        if tail.endswith(continuation[:size]):
+            return continuation[size:]
+    return continuation
+
+
+def _response_text(response):
+    try:
+        return response.text
+    except ValueError:
+        # 안전 필터 등으로 텍스트가 없는 응답
+        return ""
+
+
+def generate_json(model, contents, schema=None, on_item=None, info=None, max_continuations=MAX_CONTINUATIONS):
+    """
+    모델을 호출하고 응답을 관용 파싱하여 스키마로 정규화한 값을 반환 (복구 불가 시 None).
+    on_item: 지정 시 스트리밍으로 호출하며 완성된 배열 항목마다 호출
+    info: 전달 시 원문("text"), 복구 여부("salvaged"), 이어받기 횟수("continued"), 문제("problems")를 기록
+    """
+    info = info if info is not None else {}
+    parser = IncrementalArrayParser() if on_item is not None else None
+
+    def call(call_contents):
+        if parser is not None:
+            return stream_json_items(model, call_contents, on_item, parser=parser)
+        return _response_text(model.generate_content(call_contents))
+
+    text = call(contents)
+    with timed("parsing"):
+        data, truncated = parse_json(text)
+    info["continued"] = 0
+
+    # 끝부분만 잘린 경우: 앞부분을 모델 턴으로 넘기고 나머지만 이어받는다
+    while truncated and info["continued"] < max_continuations:
+        info["continued"] += 1
+        if parser is not None:
+            rest = model.generate_content(_continuation_contents(contents, text), stream=True)
+            rest_text = _trim_overlap(text, "".join(_chunk_texts(rest)))
+        else:
+            rest_text = _trim_overlap(text, call(_continuation_contents(contents, text)))
+        with timed("parsing"):
+            joined_data, joined_truncated = parse_json(text + rest_text)
+            # 모델이 처음부터 다시 출력했을 수도 있으므로 단독 파싱 결과와 비교해 더 많이 복구된 쪽을 사용
+            alone_data, alone_truncated = parse_json(rest_text)
+        restarted = _size(alone_data) > _size(joined_data)
+        if restarted:
+            joined_data, joined_truncated = alone_data, alone_truncated
+        if _size(joined_data) >= _size(data):
+            data, truncated = joined_data, joined_truncated
+            if parser is not None:
+                # 이어받은 부분의 항목은 다시 출력 여부를 판단한 뒤에 내보낸다.
+                # 이어서 출력했으면 파서 상태를 유지한 채 이어서 넣고, 처음부터 다시 출력했으면
+                # 새 파서로 읽되 이미 화면에 보낸 개수만큼은 건너뛴다 (중복 표시 방지)
+                if restarted:
+                    emitted = len(parser.items)
+                    parser = IncrementalArrayParser()
+                    new_items = parser.feed(rest_text)[emitted:]
+                else:
+                    new_items = parser.feed(rest_text)
+                for item in new_items:
+                    on_item(item)
+        text = text + rest_text
+
+    info["text"] = text
+    info["salvaged"] = truncated and data is not None
+    with timed("parsing"):
+        data, problems = validate(data, schema) if data is not None else (None, ["JSON을 찾지 못함"])
+    info["problems"] = problems
+    return data
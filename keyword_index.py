@@ -0,0 +1,70 @@
+from collections import deque
+
+# ==========================================
+# 다중 키워드 검색 인덱스 (Aho-Corasick)
+# ==========================================
+# 수십~수백 개 키워드를 문서 텍스트 1회 순회로 모두 찾는다.
+# 공백/대소문자 차이("안전 보건 교육" / "안전보건교육", "msds" / "MSDS")는 무시하고,
+# 결과 위치는 원문 기준 인덱스로 돌려준다.
+
+
+def normalize(text):
+    """공백 제거 + 소문자화. (정규화 문자열, 정규화 인덱스 -> 원문 인덱스 목록) 반환"""
+    chars, positions = [], []
+    for i, ch in enumerate(text):
+        if ch.isspace():
+            continue
+        chars.append(ch.lower())
+        positions.append(i)
+    return "".join(chars), positions
+
+
+class KeywordIndex:
+    def __init__(self, keywords):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for keyword in keywords:
+            self._add(keyword)
+        self._build()
+
+    def _add(self, keyword):
+        norm, _ = normalize(keyword)
+        if not norm:
+            return
+        state = 0
+        for ch in norm:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((keyword, len(norm)))
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                # 루트 바로 아래 노드는 자기 자신이 아니라 루트로 실패 전이
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def scan(self, text):
+        """문서를 한 번 순회하며 (키워드, 원문 시작 위치, 원문 끝 위치)를 yield"""
+        norm, positions = normalize(text)
+        state = 0
+        for i, ch in enumerate(norm):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for keyword, length in self._out[state]:
+                yield keyword, positions[i - length + 1], positions[i] + 1
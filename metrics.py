@@ -0,0 +1,259 @@
+import contextvars
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+from job_queue import JobCancelled
+
+# ==========================================
+# 실행 계측 (단계별 소요 시간 + 토큰 사용량 -> JSONL 로그)
+# ==========================================
+# 분석 작업 1건(run)마다 단계별 시간, 모델 호출 수, 입력/출력 토큰, 예상 비용을 모아
+# .cache/metrics.jsonl에 한 줄씩 기록한다. 관리 화면(views/admin_metrics.py)에서 탭별 p50/p95와
+# 문서당 비용을 집계한다.
+#   - 현재 run은 contextvar로 전달 (작업 스레드 안의 StageTimer / 모델 래퍼가 자동으로 기록)
+#   - 다른 스레드로 넘기는 작업은 StageTimer가 생성 시점의 run을 붙잡거나, copy_context()로 전달
+#   - 프로파일링: 관리 화면에서 요청하면 해당 탭의 다음 실행 1회만 cProfile로 감싼다
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+METRICS_LOG = os.path.join(BASE_DIR, ".cache", "metrics.jsonl")
+PROFILE_DIR = os.path.join(BASE_DIR, ".cache", "profiles")
+PROFILE_TOP = 30            # 프로파일 요약에 남길 함수 수
+
+# 모델별 토큰 단가 (USD / 100만 토큰, 요금제 변경 시 조정. cached_input: 컨텍스트 캐시에서 읽은 입력 토큰)
+MODEL_PRICES = {
+    "models/gemini-2.5-flash": {"input": 0.30, "cached_input": 0.075, "output": 2.50},
+}
+
+_current_run = contextvars.ContextVar("metrics_run", default=None)
+_write_lock = threading.Lock()
+_profile_requests = set()
+_profile_lock = threading.Lock()
+
+
+class Run:
+    """분석 1건의 계측 기록"""
+
+    def __init__(self, tab, title):
+        self.tab = tab
+        self.title = title
+        self.started = time.time()
+        self.stages = {}
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self.cached_tokens = 0
+        self.cost = 0.0
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def add_stage(self, name, seconds):
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def add_count(self, name, n):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + n
+
+    def add_usage(self, model_id, prompt_tokens, output_tokens, cached_tokens=0):
+        """prompt_tokens는 캐시에서 읽은 토큰(cached_tokens)을 포함한 전체 입력 토큰 수"""
+        price = MODEL_PRICES.get(model_id, {"input": 0.0, "output": 0.0})
+        cached_price = price.get("cached_input", price["input"])
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += prompt_tokens
+            self.output_tokens += output_tokens
+            self.cached_tokens += cached_tokens
+            self.cost += ((prompt_tokens - cached_tokens) * price["input"] + cached_tokens * cached_price
+                          + output_tokens * price["output"]) / 1_000_000
+
+    def record(self, status, error=None, profile=None):
+        return {
+            "ts": self.started,
+            "tab": self.tab,
+            "title": self.title,
+            "status": status,
+            "error": error,
+            "elapsed": round(time.time() - self.started, 3),
+            "stages": {k: round(v, 3) for k, v in self.stages.items()},
+            "calls": self.calls,
+            "prompt_tokens": self.prompt_tokens,
+            "output_tokens": self.output_tokens,
+            "cached_tokens": self.cached_tokens,
+            "cost_usd": round(self.cost, 6),
+            "counts": dict(self.counts),
+            "profile": profile,
+        }
+
+
+def current_run():
+    return _current_run.get()
+
+
+def record_stage(name, seconds, run=None):
+    run = run or current_run()
+    if run is not None:
+        run.add_stage(name, seconds)
+
+
+def record_count(name, n, run=None):
+    """단계 시간 외에 건별로 집계할 수치 (예: 로컬 사전 채점으로 확정한 항목 수)"""
+    run = run or current_run()
+    if run is not None:
+        run.add_count(name, n)
+
+
+@contextmanager
+def timed(name):
+    """StageTimer가 없는 구간의 소요 시간을 현재 run에 기록"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - started)
+
+
+def record_usage(model_id, response, run=None):
+    """응답의 usage_metadata(입력/출력/캐시 입력 토큰 수)를 현재 run에 기록"""
+    run = run or current_run()
+    usage = getattr(response, "usage_metadata", None)
+    if run is None or usage is None:
+        return
+    run.add_usage(model_id, getattr(usage, "prompt_token_count", 0) or 0,
+                  getattr(usage, "candidates_token_count", 0) or 0,
+                  getattr(usage, "cached_content_token_count", 0) or 0)
+
+
+def write_record(record, path=None):
+    path = path or METRICS_LOG
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    line = json.dumps(record, ensure_ascii=False)
+    with _write_lock:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+# ------------------------------------------------------------------------------
+# 프로파일링 (요청한 탭의 다음 실행 1회)
+# ------------------------------------------------------------------------------
+def request_profile(tab):
+    with _profile_lock:
+        _profile_requests.add(tab)
+
+
+def pending_profiles():
+    with _profile_lock:
+        return set(_profile_requests)
+
+
+def _take_profile_request(tab):
+    with _profile_lock:
+        if tab in _profile_requests:
+            _profile_requests.discard(tab)
+            return True
+    return False
+
+
+def _save_profile(profiler, tab):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f"{tab}_{time.strftime('%Y%m%d_%H%M%S')}.prof")
+    profiler.dump_stats(path)
+    summary = io.StringIO()
+    pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(PROFILE_TOP)
+    with open(path[:-len(".prof")] + ".txt", "w", encoding="utf-8") as f:
+        f.write(summary.getvalue())
+    return path
+
+
+def instrument(tab, handler):
+    """작업 함수를 run 계측(+ 요청 시 프로파일링)으로 감싼다. handler(payload, ctx)"""
+    def run_handler(payload, ctx):
+        run = Run(tab, payload.get("file_name") or (payload.get("p_info") or {}).get("name") or "")
+        token = _current_run.set(run)
+        profiler = cProfile.Profile() if _take_profile_request(tab) else None
+        status, error, profile_path = "done", None, None
+        if profiler is not None:
+            # Python 3.12+에서는 다른 프로파일러가 이미 켜져 있으면 ValueError -> 분석은 그대로 진행하고 프로파일링만 생략
+            try:
+                profiler.enable()
+            except ValueError:
+                profiler = None
+        try:
+            return handler(payload, ctx)
+        except Exception as e:
+            status, error = ("cancelled", None) if isinstance(e, JobCancelled) else ("failed", str(e))
+            raise
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                profile_path = _save_profile(profiler, tab)
+            _current_run.reset(token)
+            try:
+                write_record(run.record(status, error, profile_path))
+            except OSError:
+                pass
+    return run_handler
+
+
+# ------------------------------------------------------------------------------
+# 집계 (관리 화면용)
+# ------------------------------------------------------------------------------
+def read_records(path=None, since=None):
+    path = path or METRICS_LOG
+    if not os.path.exists(path):
+        return []
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if since is None or record["ts"] >= since:
+                records.append(record)
+    return records
+
+
+def percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def summarize(records):
+    """탭별 실행 수, 소요 시간 p50/p95, 문서당 평균 토큰/비용, 단계별 평균 시간"""
+    by_tab = {}
+    for record in records:
+        by_tab.setdefault(record["tab"], []).append(record)
+    rows = []
+    for tab, tab_records in sorted(by_tab.items()):
+        done = [r for r in tab_records if r["status"] == "done"]
+        elapsed = [r["elapsed"] for r in done]
+        stage_totals, count_totals = {}, {}
+        for r in done:
+            for name, seconds in r["stages"].items():
+                stage_totals[name] = stage_totals.get(name, 0.0) + seconds
+            for name, value in r.get("counts", {}).items():
+                count_totals[name] = count_totals.get(name, 0) + value
+        n = max(1, len(done))
+        rows.append({
+            "tab": tab,
+            "runs": len(tab_records),
+            "failed": sum(1 for r in tab_records if r["status"] == "failed"),
+            "p50": percentile(elapsed, 0.5),
+            "p95": percentile(elapsed, 0.95),
+            "calls": sum(r["calls"] for r in done) / n,
+            "prompt_tokens": sum(r["prompt_tokens"] for r in done) / n,
+            "output_tokens": sum(r["output_tokens"] for r in done) / n,
+            "cached_tokens": sum(r.get("cached_tokens", 0) for r in done) / n,
+            "cost_usd": sum(r["cost_usd"] for r in done) / n,
+            "stages": {name: total / n for name, total in stage_totals.items()},
+            "counts": {name: total / n for name, total in count_totals.items()},
+        })
+    return rows
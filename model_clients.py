@@ -0,0 +1,65 @@
+import json
+import threading
+
+# ==========================================
+# Gemini 클라이언트 공용 모듈
+# ==========================================
+# google.generativeai는 import에만 약 1초가 걸리므로, 실제로 API를 호출하는 경로에서 처음 필요할 때 불러온다.
+# GenerativeModel은 (모델, 생성 설정, 시스템 지시문) 조합별로 프로세스당 1개만 만들어
+# 모든 세션/페이지/작업 스레드가 함께 쓴다. (재실행마다 모델 객체를 다시 만들지 않음)
+# 돌려주는 모델은 속도 제한/재시도/헤지 래퍼(resilient_client.ResilientModel)로 감싸져 있다.
+
+_lock = threading.Lock()
+_api_key = None
+_configured = False
+_models = {}
+_backend = None     # 벤치마크 등에서 쓰는 대체 백엔드 (genai와 같은 함수를 가진 객체)
+
+
+def set_api_key(api_key):
+    """API 키 등록 (SDK import와 설정은 처음 사용할 때 수행)"""
+    global _api_key, _configured
+    with _lock:
+        if api_key != _api_key:
+            _api_key = api_key
+            _configured = False
+
+
+def set_backend(backend):
+    """
+    google.generativeai 대신 쓸 백엔드 지정 (None이면 원래 SDK).
+    configure / GenerativeModel / upload_file / get_file / delete_file을 제공해야 한다. (예: bench/fake_gemini.py)
+    """
+    global _backend
+    with _lock:
+        _backend = backend
+        _models.clear()
+
+
+def load_genai():
+    """google.generativeai 모듈 (처음 호출 시 import + API 키 설정)"""
+    global _configured
+    if _backend is not None:
+        return _backend
+    import google.generativeai as genai
+    if not _configured:
+        with _lock:
+            if not _configured:
+                if _api_key is not None:
+                    genai.configure(api_key=_api_key)
+                _configured = True
+    return genai
+
+
+def get_model(model_id, generation_config=None, system_instruction=None):
+    """설정 조합별 GenerativeModel (프로세스 공용, 안정화 래퍼 적용)"""
+    key = (model_id, json.dumps(generation_config, sort_keys=True, default=str), system_instruction)
+    with _lock:
+        model = _models.get(key)
+    if model is None:
+        from resilient_client import ResilientModel
+        model = ResilientModel(load_genai().GenerativeModel(model_name=model_id, generation_config=generation_config,
+                                                            system_instruction=system_instruction), model_id)
+        with _lock:
+            model = _models.setdefault(key, model)
+    return model
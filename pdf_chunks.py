@@ -0,0 +1,90 @@
+import contextvars
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+from pypdf import PdfReader, PdfWriter
+
+from context_cache import get_guided_model
+from json_parse import generate_json
+from model_clients import get_model
+
+# ==========================================
+# 대용량 PDF 페이지 구간 분할 + 병렬 분석 (map 단계)
+# ==========================================
+# 200페이지 이상 스캔본을 한 번에 보내면 느리고 max_output_tokens에 걸려 통째로 실패한다.
+# 페이지 구간별로 PDF를 잘라 동시에 분석하고, 구간별 결과를 호출 측에서 병합(reduce)한다.
+# 전체 소요 시간은 총 페이지 수가 아니라 가장 큰 구간 하나의 처리 시간에 비례한다.
+
+DEFAULT_CHUNK_PAGES = 30    # 구간당 페이지 수
+CHUNK_WORKERS = 6           # 구간 동시 분석 수
+
+CHUNK_GENERATION_CONFIG = {
+    "temperature": 0.0,
+    "response_mime_type": "application/json",
+    "max_output_tokens": 8000,
+}
+
+
+def page_count(pdf_bytes):
+    return len(PdfReader(io.BytesIO(pdf_bytes)).pages)
+
+
+def split_pdf(pdf_bytes, pages_per_chunk=DEFAULT_CHUNK_PAGES):
+    """PDF를 페이지 구간별로 자른다. [(시작 페이지, 끝 페이지, PDF 바이트)] (페이지 번호는 1부터)"""
+    reader = PdfReader(io.BytesIO(pdf_bytes))
+    total = len(reader.pages)
+    chunks = []
+    for start in range(0, total, pages_per_chunk):
+        end = min(start + pages_per_chunk, total)
+        writer = PdfWriter()
+        for i in range(start, end):
+            writer.add_page(reader.pages[i])
+        buf = io.BytesIO()
+        writer.write(buf)
+        chunks.append((start + 1, end, buf.getvalue()))
+    return chunks
+
+
+def _analyze_chunk(registry, chunk, build_prompt, model_id, system_instruction, generation_config, schema, guide):
+    start, end, data = chunk
+    file_hash, handle = registry.acquire(data, "application/pdf")
+    try:
+        if guide is not None:
+            model = get_guided_model(model_id, generation_config, system_instruction, *guide)
+        else:
+            model = get_model(model_id, generation_config, system_instruction)
+        data = generate_json(model, [build_prompt(start, end), handle], schema)
+        if data is None:
+            raise ValueError("구간 응답에서 JSON을 찾지 못했습니다")
+        return data
+    except Exception as e:
+        registry.report_error(file_hash, e)
+        raise
+    finally:
+        registry.release(file_hash)
+
+
+def map_chunks(registry, pdf_bytes, build_prompt, model_id, pages_per_chunk=DEFAULT_CHUNK_PAGES,
+               system_instruction=None, generation_config=None, max_workers=CHUNK_WORKERS, schema=None, guide=None):
+    """
+    구간별 분석을 병렬 실행. build_prompt(시작, 끝) -> 구간 프롬프트, schema: 구간 응답 검증용 스키마.
+    guide: (이름, 가이드라인) 지정 시 모든 구간 프롬프트 앞에 두는 가이드라인 (컨텍스트 캐시 사용)
+    반환: (성공 결과 [(시작, 끝, JSON)], 실패 목록 [(시작, 끝, 오류 메시지)])
+    일부 구간이 실패해도 나머지 결과는 살린다 (모두 실패하면 예외).
+    """
+    chunks = split_pdf(pdf_bytes, pages_per_chunk)
+    generation_config = generation_config or CHUNK_GENERATION_CONFIG
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks))), thread_name_prefix="pdf-chunk") as pool:
+        futures = [(c[0], c[1], pool.submit(contextvars.copy_context().run, _analyze_chunk, registry, c, build_prompt, model_id,
+                                            system_instruction, generation_config, schema, guide))
+                   for c in chunks]
+        results, failures = [], []
+        for start, end, future in futures:
+            try:
+                results.append((start, end, future.result()))
+            except Exception as e:
+                failures.append((start, end, str(e)))
+
+    if not results:
+        raise RuntimeError(f"모든 페이지 구간 분석에 실패했습니다: {failures[0][2]}")
+    return results, failures
@@ -0,0 +1,140 @@
+import hashlib
+import io
+import re
+import uuid
+
+from pypdf import PdfReader, PdfWriter
+
+# ==========================================
+# PDF 로컬 텍스트 추출 사전 처리
+# ==========================================
+# 대부분의 계획서는 텍스트 레이어가 있는 디지털 PDF다.
+# 텍스트가 추출되는 페이지는 "p.12: ..." 형태의 압축 텍스트로 프롬프트에 직접 넣고,
+# 스캔본/이미지 위주 페이지만 따로 잘라 업로드하여 업로드·서버 처리·이미지 토큰 비용을 줄인다.
+
+MIN_PAGE_CHARS = 50         # 이보다 글자가 적은 페이지는 스캔/이미지 페이지로 간주
+MAX_SCAN_RATIO = 0.5        # 스캔 페이지 비율이 이보다 높으면 원본 전체를 업로드
+PDF_PAGE_TOKENS = 258       # Gemini가 PDF 페이지 1장을 이미지로 처리할 때의 토큰 수
+CHARS_PER_TOKEN = 2.0       # 한글 위주 텍스트의 대략적인 글자/토큰 비율 (추정치)
+
+TEXT_HEADER = "[문서 내용 - PDF 텍스트 추출본 (각 줄의 p.N은 원본 페이지 번호)]"
+
+
+def _compact(text):
+    text = re.sub(r"[ \t\u00a0\u3000]+", " ", text or "")
+    lines = [line.strip() for line in text.splitlines()]
+    return " / ".join(line for line in lines if line)
+
+
+def estimate_tokens(text):
+    return int(len(text) / CHARS_PER_TOKEN)
+
+
+def extract_pages(pdf_bytes):
+    """페이지별 텍스트 추출 (실패한 페이지는 빈 문자열)"""
+    reader = PdfReader(io.BytesIO(pdf_bytes))
+    pages = []
+    for page in reader.pages:
+        try:
+            pages.append(_compact(page.extract_text()))
+        except Exception:
+            pages.append("")
+    return reader, pages
+
+
+def _page_hash(page, text):
+    """페이지 내용 해시 (수정본 비교용). 텍스트 페이지는 추출 텍스트, 스캔 페이지는 내용 스트림과 이미지 데이터 기준"""
+    digest = hashlib.sha1()
+    if len(text) >= MIN_PAGE_CHARS:
+        digest.update(text.encode("utf-8"))
+        return digest.hexdigest()[:20]
+    try:
+        contents = page.get_contents()
+        digest.update(contents.get_data() if contents is not None else b"")
+        xobjects = (page.get("/Resources") or {}).get("/XObject") or {}
+        for name in sorted(xobjects):
+            digest.update(xobjects[name].get_object().get_data())
+    except Exception:
+        # 읽을 수 없는 페이지는 매번 바뀐 페이지로 본다
+        return uuid.uuid4().hex[:20]
+    return "scan:" + digest.hexdigest()[:15]
+
+
+def prepare_document(pdf_bytes):
+    """
+    PDF를 텍스트 전송분 / 업로드분으로 나눈다.
+    반환 dict:
+      mode: "text"(전부 텍스트) / "mixed"(텍스트 + 스캔 페이지 업로드) / "upload"(원본 전체 업로드)
+      text: 페이지 태그가 붙은 텍스트 ("p.12: ...")
+      upload_bytes: 업로드할 PDF 바이트 (없으면 None)
+      scan_pages: 업로드 대상 페이지 번호 목록
+      pages: 페이지별 압축 텍스트 (스캔 페이지는 빈 문자열에 가까움)
+      page_hashes: 페이지별 내용 해시 (수정본 비교용, 원본 전체 업로드 시 빈 목록)
+      stats: 원본/전송 바이트 및 토큰 추정치
+    """
+    reader, pages = extract_pages(pdf_bytes)
+    total = len(pages)
+    scan_pages = [i + 1 for i, text in enumerate(pages) if len(text) < MIN_PAGE_CHARS]
+
+    if total == 0 or len(scan_pages) / total > MAX_SCAN_RATIO:
+        mode, text, upload_bytes, scan_pages = "upload", "", pdf_bytes, list(range(1, total + 1))
+    else:
+        text = "\n".join(f"p.{i + 1}: {t}" for i, t in enumerate(pages) if len(t) >= MIN_PAGE_CHARS)
+        upload_bytes = None
+        if scan_pages:
+            writer = PdfWriter()
+            for page_no in scan_pages:
+                writer.add_page(reader.pages[page_no - 1])
+            buf = io.BytesIO()
+            writer.write(buf)
+            upload_bytes = buf.getvalue()
+        mode = "mixed" if scan_pages else "text"
+    page_hashes = [] if mode == "upload" else [_page_hash(reader.pages[i], t) for i, t in enumerate(pages)]
+
+    # 원본 전체 업로드 시: 페이지당 이미지 토큰 + 텍스트 레이어 토큰
+    full_tokens = total * PDF_PAGE_TOKENS + estimate_tokens("".join(pages))
+    sent_tokens = estimate_tokens(text) + len(scan_pages) * PDF_PAGE_TOKENS
+    sent_bytes = len(text.encode("utf-8")) + (len(upload_bytes) if upload_bytes else 0)
+    return {
+        "mode": mode,
+        "text": text,
+        "upload_bytes": upload_bytes,
+        "scan_pages": scan_pages,
+        "pages": pages,
+        "page_hashes": page_hashes,
+        "stats": {
+            "pages": total,
+            "text_pages": total - len(scan_pages),
+            "original_bytes": len(pdf_bytes),
+            "sent_bytes": sent_bytes,
+            "saved_bytes": max(0, len(pdf_bytes) - sent_bytes),
+            "saved_tokens": max(0, full_tokens - sent_tokens),
+        },
+    }
+
+
+def text_parts(prep):
+    """프롬프트 뒤에 붙일 텍스트 파트 목록"""
+    if prep["mode"] == "upload":
+        return []
+    parts = [f"{TEXT_HEADER}\n{prep['text']}"]
+    if prep["mode"] == "mixed":
+        pages = ", ".join(f"p.{n}" for n in prep["scan_pages"])
+        parts.append(f"[첨부 PDF 안내] 함께 첨부된 PDF는 텍스트 추출이 되지 않는 원본의 {pages} 페이지만 모은 것입니다.")
+    return parts
+
+
+def _format_bytes(n):
+    return f"{n / (1024 * 1024):.1f}MB" if n >= 1024 * 1024 else f"{n / 1024:.0f}KB"
+
+
+def describe(prep):
+    """화면 표시용 처리 경로 요약"""
+    s = prep["stats"]
+    if prep["mode"] == "upload":
+        return f"📎 파일 업로드 경로: 텍스트 레이어가 부족하여 원본 {s['pages']}페이지 전체를 업로드했습니다."
+    if prep["mode"] == "text":
+        path = f"📄 텍스트 추출 경로: {s['pages']}페이지 전체를 텍스트로 전송 (업로드 생략)"
+    else:
+        path = f"📄 혼합 경로: {s['text_pages']}페이지 텍스트 전송 + 스캔 {len(prep['scan_pages'])}페이지만 업로드"
+    return f"{path} · 절감 약 {_format_bytes(s['saved_bytes'])} / 약 {s['saved_tokens']:,} 토큰 (추정)"
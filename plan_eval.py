@@ -0,0 +1,393 @@
+import re
+
+from guide_data import MASTER_GUIDE_TEXT
+from eval_cache import make_key
+from upload_pipeline import StageTimer, start_upload
+from pdf_chunks import page_count, map_chunks
+from pdf_text import prepare_document, text_parts
+from rubric import prescore, keyword_pages, keyword_signature
+from revision_store import diff_units, signature
+from json_parse import array_schema, generate_json
+from context_cache import get_guided_model
+from metrics import record_count
+
+# ==========================================
+# 1-1. 안전보건관리계획서 정량 평가 로직
+# ==========================================
+# 단건 평가(화면)와 일괄 평가(작업 스레드)가 같은 프롬프트/모델/캐시를 쓰도록 분리.
+# Streamlit 호출이 없으므로 작업 스레드에서 안전하게 실행할 수 있다.
+
+EVAL_MODEL_ID = "models/gemini-2.5-flash"
+
+EVAL_SYSTEM_INSTRUCTION = "당신은 창의성이 없는 '안전보건 점수 계산기'입니다. 문서를 해석하려 하지 말고, 텍스트에 키워드가 있는지만 확인하십시오."
+
+EVAL_GENERATION_CONFIG = {
+    "temperature": 0.0,
+    "response_mime_type": "application/json",
+}
+
+# 모든 1-1 호출의 앞부분 (가이드라인 컨텍스트 캐시 대상, 캐시를 못 쓰면 프롬프트 앞에 그대로 붙임)
+EVAL_GUIDE_NAME = "plan_guide"
+EVAL_GUIDE_SECTION = f"""
+[참조: 가이드라인]
+{MASTER_GUIDE_TEXT}
+"""
+
+# [중요] 기존 프롬프트 절대 유지 (EVAL_GUIDE_SECTION + EVAL_PROMPT = 기존 프롬프트)
+EVAL_PROMPT = """
+[마스터 가이드라인]을 기준으로 수급업체 계획서를 채점하십시오.
+변덕스러운 점수를 막기 위해, 각 항목별로 **반드시 PDF 내의 '증거 문장'을 먼저 찾고** 점수를 매기십시오.
+
+[🚫 절대적 채점 규칙 (Tie-Breaker Rule)]
+1. **증거 우선주의**: "잘 할 것으로 보임", "계획된 것으로 추정됨" 같은 추측은 절대 금지. PDF에 명시된 문구가 없으면 0점.
+2. **하향 평가 원칙**:
+    - 5점 줄까 3점 줄까 고민되면 -> **3점** 부여.
+    - 3점 줄까 1점 줄까 고민되면 -> **1점** 부여.
+    - **즉, 확실한 근거가 없는 한 높은 점수를 주지 마시오.**
+3. **공종 일치성**: PDF 제목의 공사명과 본문의 작업 내용이 불일치(복사 붙여넣기 의심)하면 해당 항목 0점 처리.
+4. **중대재해(17번)**: '해당없음' 또는 '무재해'라는 명확한 텍스트나 증명서가 없으면, 확인 불가로 간주하여 0점 처리.
+
+[출력 형식]
+[
+    {
+        "item_no": 1,
+        "category": "항목명",
+        "score": 0,
+        "max_score": 5,
+        "evidence": "증거 내용",
+        "judgment": "등급"
+    }
+]
+"""
+
+# 대용량 PDF 분할 분석용: 구간별 증거 추출(map) -> 증거 목록으로 최종 채점(reduce)
+CHUNK_EVIDENCE_PROMPT = """
+이 PDF는 수급업체 계획서 전체 중 {start}~{end} 페이지 구간입니다.
+[마스터 가이드라인]의 17개 항목 각각에 대해, 이 구간에서 발견되는 **증거 문장만** 원문 그대로 추출하십시오.
+- 점수를 매기지 마십시오. 추측하지 마십시오.
+- 증거가 없는 항목은 빈 배열로 두십시오.
+- 각 증거 앞에 원본 기준 페이지 번호를 "p.12: " 형식으로 붙이십시오. (이 구간의 첫 페이지 = p.{start})
+
+[출력 형식]
+[
+    {{"item_no": 1, "evidence": ["p.{start}: 증거 문장"]}}
+]
+"""
+
+EVIDENCE_SECTION = """
+[문서 내용]
+PDF 원문 대신, 계획서 전체를 페이지 구간별로 나누어 추출한 아래 [항목별 증거 문장]을 문서 내용으로 간주하여 채점하십시오.
+목록에 없는 내용은 PDF에 없는 것으로 판단합니다.
+
+[항목별 증거 문장]
+{evidence}
+"""
+
+# 로컬 키워드 사전 채점 후 애매한 항목만 LLM에 맡길 때 붙이는 안내문
+SUBSET_SECTION = """
+[채점 대상 항목]
+나머지 항목은 이미 채점이 끝났습니다. 아래 항목 번호만 채점하여 같은 출력 형식으로 출력하십시오.
+{item_nos}
+"""
+
+# 수정 제출본: 바뀐 페이지 위주로 발췌해 다시 채점할 항목만 보낼 때 붙이는 안내문
+REVISION_SECTION = """
+[수정 제출본 안내]
+이 계획서는 이전에 채점한 계획서의 수정본입니다. 아래 문서 내용은 수정본 중 바뀌거나 추가된 페이지와
+채점 대상 항목에 관련된 페이지만 발췌한 것입니다. 채점 대상 항목의 증거는 발췌된 페이지에서 찾으십시오.
+"""
+
+REVISION_KIND = "plan_eval"
+MAX_EXCERPT_RATIO = 0.5     # 발췌할 페이지가 텍스트 페이지의 이 비율을 넘으면 전체 텍스트를 보냄
+
+_PAGE_REF_RE = re.compile(r"p\.(\d+)")
+
+# 응답 검증 스키마 (채점 결과 / 구간별 증거 추출 결과)
+EVAL_SCHEMA = array_schema(required=["item_no", "score"], numeric=["item_no", "score", "max_score"])
+CHUNK_EVIDENCE_SCHEMA = array_schema(required=["item_no"], numeric=["item_no"])
+
+# 적격 수급업체 선정 커트라인 (가이드라인 기준 90 / 80 / 70)
+ELIGIBILITY_BANDS = [
+    (90, "success", "✅ **[고위험군 / 일반군 모두 적격]**", "고위험군/일반군 적격"),
+    (80, "warning", "⚠️ **[일반군 적격 / 고위험군 부적격]**", "일반군 적격"),
+    (70, "error", "❌ **[부적격]** (80점 미달)", "부적격"),
+    (None, "error", "🚫 **[절대 선정 불가]** (70점 미만)", "선정 불가"),
+]
+
+
+def total_score(eval_data):
+    return sum(item['score'] for item in eval_data)
+
+
+def eligibility(total):
+    """총점 -> (표시 종류, 화면 문구, 요약 문구)"""
+    for cutoff, kind, message, label in ELIGIBILITY_BANDS:
+        if cutoff is None or total >= cutoff:
+            return kind, message, label
+
+
+def _evidence_pages(item):
+    return {int(n) for n in _PAGE_REF_RE.findall(str(item.get("evidence") or ""))}
+
+
+def _renumber(item, page_map):
+    """이전 결과를 그대로 쓰는 항목: 근거의 페이지 번호를 수정본 기준으로 바꾼다"""
+    evidence = _PAGE_REF_RE.sub(lambda m: f"p.{page_map.get(int(m.group(1)), int(m.group(1)))}",
+                                str(item.get("evidence") or ""))
+    return dict(item, evidence=evidence, source="carried")
+
+
+def merge_chunk_evidence(chunk_results, failures=()):
+    """구간별 증거 추출 결과를 항목 번호별로 합쳐 reduce 프롬프트용 텍스트로 만든다"""
+    evidence = {}
+    for _, _, data in sorted(chunk_results, key=lambda r: r[0]):
+        for item in data if isinstance(data, list) else []:
+            try:
+                item_no = int(item.get("item_no"))
+            except (TypeError, ValueError):
+                continue
+            found = evidence.setdefault(item_no, [])
+            # 증거를 목록 대신 문자열 하나로 돌려준 응답도 있으므로 (글자 단위로 나뉘지 않도록) 목록으로 맞춘다
+            sentences = item.get("evidence")
+            sentences = [sentences] if isinstance(sentences, str) else sentences or []
+            for sentence in sentences:
+                if sentence and sentence not in found:
+                    found.append(sentence)
+
+    lines = []
+    for item_no in range(1, 18):
+        lines.append(f"{item_no}번 항목:")
+        sentences = evidence.get(item_no) or ["(증거 없음)"]
+        lines.extend(f"  - {s}" for s in sentences)
+    for start, end, error in failures:
+        lines.append(f"※ p.{start}~{end} 구간은 분석에 실패하여 증거가 누락되었을 수 있음")
+    return "\n".join(lines)
+
+
+class PlanEvaluator:
+    def __init__(self, registry, cache, model_id=EVAL_MODEL_ID, use_text_layer=True, local_prescore=True,
+                 revisions=None):
+        """revisions: 수정 제출본 부분 재평가용 저장소 (revision_store.RevisionStore, 텍스트 경로 + 로컬 사전 채점에서만 사용)"""
+        self.registry = registry
+        self.cache = cache
+        self.model_id = model_id
+        self.use_text_layer = use_text_layer
+        self.local_prescore = local_prescore
+        self.revisions = revisions if use_text_layer and local_prescore else None
+
+    def revision_signature(self):
+        """이전 평가를 수정본 비교 기준으로 쓸 수 있는지 (프롬프트/가이드라인/모델/키워드 표가 같아야 함)"""
+        return signature(EVAL_GUIDE_SECTION + EVAL_PROMPT + SUBSET_SECTION + REVISION_SECTION, self.model_id,
+                         EVAL_SYSTEM_INSTRUCTION, keyword_signature())
+
+    def cache_key(self, pdf_bytes, chunk_pages=None):
+        prompt = EVAL_GUIDE_SECTION + EVAL_PROMPT
+        if chunk_pages: prompt += CHUNK_EVIDENCE_PROMPT + f"[chunk:{chunk_pages}]"
+        if self.use_text_layer: prompt += "[text-prepass]"
+        if self.use_text_layer and self.local_prescore: prompt += "[local-prescore]" + keyword_signature()
+        return make_key(pdf_bytes, prompt, self.model_id,
+                        system_instruction=EVAL_SYSTEM_INSTRUCTION,
+                        config=EVAL_GENERATION_CONFIG)
+
+    def evaluate(self, pdf_bytes, timer=None, on_progress=None, on_generate=None, chunk_pages=None, info=None,
+                 on_item=None, title=""):
+        """
+        계획서 PDF 채점. (eval_data, from_cache) 반환.
+        on_progress: 업로드 대기 중 호출 (상태, 경과초) / on_generate: 생성 호출 직전 호출
+        on_item: 지정 시 스트리밍 응답으로 받아 항목이 완성될 때마다 호출
+        chunk_pages: 지정 시 이 페이지 수보다 긴 PDF는 구간 분할 분석
+        info: 전달 시 처리 경로("prepass")와 경고("notes")를 기록. 잘린 응답을 복구한 경우 "partial"=True (캐시하지 않음)
+              이전에 평가한 문서의 수정본이면 "revision"에 이전 결과와의 비교를 기록
+        title: 수정본 비교 기록에 남길 문서 이름
+        """
+        info = info if info is not None else {}
+        info.setdefault("notes", [])
+
+        if chunk_pages and page_count(pdf_bytes) <= chunk_pages:
+            chunk_pages = None
+
+        cache_key = self.cache_key(pdf_bytes, chunk_pages)
+        eval_data = self.cache.get(cache_key)
+        if eval_data is not None:
+            return eval_data, True
+
+        timer = timer or StageTimer()
+        prep = None
+        if self.use_text_layer:
+            with timer.stage("text_extraction"):
+                prep = prepare_document(pdf_bytes)
+            info["prepass"] = prep
+
+        # 텍스트 레이어가 있는 문서는 압축 텍스트로 충분히 작으므로 구간 분할 없이 처리
+        if chunk_pages and (prep is None or prep["mode"] == "upload"):
+            return self._evaluate_chunked(pdf_bytes, chunk_pages, cache_key, timer, on_generate, info, on_item)
+
+        base = None
+        if self.revisions is not None and prep["mode"] != "upload":
+            with timer.stage("revision_diff"):
+                base = self.revisions.find_base(REVISION_KIND, self.revision_signature(), prep["page_hashes"])
+
+        # 수정본이면 바뀐 부분만 다시 채점 (전체 재평가가 필요하면 None)
+        eval_data = self._evaluate_revision(prep, base, timer, on_progress, on_generate, info, on_item) if base else None
+        if eval_data is None and prep is not None and prep["mode"] != "upload" and self.local_prescore:
+            eval_data = self._evaluate_with_prescore(prep, timer, on_progress, on_generate, info, on_item)
+        elif eval_data is None and prep is not None:
+            contents = [EVAL_PROMPT] + text_parts(prep)
+            eval_data = self._generate(contents, prep["upload_bytes"], timer, on_progress, on_generate, on_item, info)
+        elif eval_data is None:
+            eval_data = self._generate([EVAL_PROMPT], pdf_bytes, timer, on_progress, on_generate, on_item, info)
+
+        # 정상 형식의 완전한 결과만 캐시에 저장 (이전 결과를 이어받은 부분 재평가 결과는 캐시하지 않음)
+        if isinstance(eval_data, list) and not info.get("partial"):
+            if not info.get("revision", {}).get("incremental"):
+                self.cache.put(cache_key, eval_data)
+            if self.revisions is not None and prep["mode"] != "upload" and info.get("revision", {}).get("changed", True):
+                self.revisions.save(REVISION_KIND, self.revision_signature(), title, prep["page_hashes"],
+                                    {"eval_data": eval_data})
+        return eval_data, False
+
+    def _generate(self, contents, upload_bytes, timer, on_progress=None, on_generate=None, on_item=None, info=None):
+        """(필요 시) 업로드와 모델 준비를 겹쳐 실행한 뒤 채점 호출"""
+        parse_info = {}
+        # 업로드는 백그라운드에서 진행 (같은 PDF가 이미 업로드되어 있으면 재사용)
+        upload_job = start_upload(self.registry, upload_bytes, timer=timer) if upload_bytes else None
+        try:
+            # 업로드가 진행되는 동안 모델 준비 (가이드라인은 컨텍스트 캐시, 없으면 인라인)
+            eval_model = get_guided_model(self.model_id, EVAL_GENERATION_CONFIG, EVAL_SYSTEM_INSTRUCTION,
+                                          EVAL_GUIDE_NAME, EVAL_GUIDE_SECTION)
+            if upload_job is not None:
+                contents = contents + [upload_job.wait(on_progress=on_progress)]
+            if on_generate: on_generate()
+            with timer.stage("generation"):
+                eval_data = generate_json(eval_model, contents, EVAL_SCHEMA, on_item=on_item, info=parse_info)
+        except Exception as e:
+            if upload_job is not None: upload_job.report_error(e)
+            raise
+        finally:
+            if upload_job is not None: upload_job.close()
+
+        if eval_data is None:
+            raise ValueError("AI 응답에서 채점 결과(JSON)를 찾지 못했습니다. 다시 시도해 주세요.")
+        if info is not None:
+            if parse_info["salvaged"]:
+                info["partial"] = True
+                info["notes"].append(f"AI 응답이 출력 길이 제한으로 잘려 완성된 {len(eval_data)}개 항목만 복구했습니다.")
+            elif parse_info["continued"]:
+                info["notes"].append("AI 응답이 잘려 나머지 부분만 이어서 받았습니다.")
+        return eval_data
+
+    def _evaluate_with_prescore(self, prep, timer, on_progress, on_generate, info, on_item=None):
+        # 키워드 인덱스 1회 스캔으로 명확한 항목은 로컬 채점 (스캔 페이지가 있으면 '문구 없음' 판정은 보류)
+        with timer.stage("local_prescore"):
+            local, ambiguous = prescore(prep["text"], text_complete=prep["mode"] == "text")
+        info["local_items"] = len(local)
+        info["llm_items"] = len(ambiguous)
+        # 실제 계획서에서 로컬 확정 비율을 관리 화면에서 확인할 수 있도록 건별로 기록
+        record_count("prescore_local_items", len(local))
+        record_count("prescore_items", len(local) + len(ambiguous))
+        if on_item is not None:
+            for item in local:
+                on_item(item)
+        if not ambiguous:
+            return local
+
+        def on_llm_item(item):
+            if isinstance(item, dict) and item.get("item_no") in ambiguous:
+                on_item(dict(item, source="llm"))
+
+        prompt = EVAL_PROMPT + SUBSET_SECTION.format(item_nos=", ".join(str(n) for n in ambiguous))
+        llm_data = self._generate([prompt] + text_parts(prep), prep["upload_bytes"], timer, on_progress, on_generate,
+                                  on_llm_item if on_item is not None else None, info)
+        if not isinstance(llm_data, list):
+            return llm_data
+        llm_items = [dict(item, source="llm") for item in llm_data
+                     if isinstance(item, dict) and item.get("item_no") in ambiguous]
+        return sorted(local + llm_items, key=lambda item: item["item_no"])
+
+    def _evaluate_revision(self, prep, base, timer, on_progress, on_generate, info, on_item=None):
+        """
+        수정 제출본 부분 재평가. 바뀐/추가/삭제된 페이지와 관계없는 항목은 이전 결과를 이어받고,
+        근거나 관련 키워드가 바뀐 페이지에 있는 항목만 다시 채점한다. 전체 재평가가 필요하면 None
+        """
+        with timer.stage("revision_diff"):
+            diff = diff_units(base["units"], prep["page_hashes"])
+        changed = sorted(i + 1 for i in diff["new"])
+        removed = sorted(i + 1 for i in diff["removed"])
+        page_map = {old + 1: new + 1 for old, new in diff["mapping"].items()}
+        info["revision"] = {"base_title": base["title"], "base_created": base["created"], "overlap": base["overlap"],
+                            "unit": "페이지", "changed_units": changed, "removed_units": removed,
+                            "changed": bool(changed or removed), "incremental": False,
+                            "previous": [{"key": item.get("item_no"),
+                                          "label": f"{item.get('item_no')}. {item.get('category', '')}",
+                                          "score": item.get("score") or 0}
+                                         for item in base["result"]["eval_data"] if isinstance(item, dict)]}
+        # 스캔 페이지가 바뀌었거나 표지(공사명, 규칙 3 공종 일치성 판단 기준)가 바뀌면 전체 재평가
+        if set(changed) & set(prep["scan_pages"]) or 1 in changed or 1 in removed:
+            return None
+
+        previous = {item.get("item_no"): item for item in base["result"]["eval_data"] if isinstance(item, dict)}
+        with timer.stage("local_prescore"):
+            local, ambiguous = prescore(prep["text"], text_complete=prep["mode"] == "text")
+            hits = keyword_pages(prep["text"])
+
+        carried, rescore = [], []
+        for item_no in ambiguous:
+            old = previous.get(item_no)
+            if (old is None or old.get("source") == "local" or _evidence_pages(old) & set(removed)
+                    or hits.get(item_no, set()) & set(changed)):
+                rescore.append(item_no)
+            else:
+                carried.append(_renumber(old, page_map))
+        info["local_items"] = len(local)
+        info["llm_items"] = len(rescore)
+        info["revision"].update({"incremental": True, "rescored": rescore,
+                                 "carried": [item["item_no"] for item in carried]})
+        if on_item is not None:
+            for item in local + carried:
+                on_item(item)
+        if not rescore:
+            return sorted(local + carried, key=lambda item: item["item_no"])
+
+        # 바뀐 페이지 + 다시 채점할 항목의 이전 근거 페이지 + 관련 키워드가 나온 페이지만 발췌
+        excerpt_pages = set(changed)
+        for item_no in rescore:
+            excerpt_pages |= {page_map[p] for p in _evidence_pages(previous.get(item_no) or {}) if p in page_map}
+            excerpt_pages |= hits.get(item_no, set())
+        text_pages = [n for n in range(1, len(prep["pages"]) + 1) if n not in prep["scan_pages"]]
+        prompt = EVAL_PROMPT + SUBSET_SECTION.format(item_nos=", ".join(str(n) for n in rescore))
+        doc = prep
+        if len(excerpt_pages & set(text_pages)) <= len(text_pages) * MAX_EXCERPT_RATIO:
+            prompt += REVISION_SECTION
+            doc = dict(prep, text="\n".join(f"p.{n}: {prep['pages'][n - 1]}" for n in text_pages if n in excerpt_pages))
+            info["revision"]["excerpt_pages"] = len(excerpt_pages & set(text_pages))
+
+        def on_llm_item(item):
+            if isinstance(item, dict) and item.get("item_no") in rescore:
+                on_item(dict(item, source="llm"))
+
+        llm_data = self._generate([prompt] + text_parts(doc), prep["upload_bytes"], timer, on_progress, on_generate,
+                                  on_llm_item if on_item is not None else None, info)
+        if not isinstance(llm_data, list):
+            return llm_data
+        llm_items = [dict(item, source="llm") for item in llm_data
+                     if isinstance(item, dict) and item.get("item_no") in rescore]
+        return sorted(local + carried + llm_items, key=lambda item: item["item_no"])
+
+    def _evaluate_chunked(self, pdf_bytes, chunk_pages, cache_key, timer, on_generate, info, on_item=None):
+        # map: 구간별 증거 추출 (병렬)
+        build_prompt = lambda start, end: CHUNK_EVIDENCE_PROMPT.format(start=start, end=end)
+        with timer.stage("chunk_analysis"):
+            chunk_results, failures = map_chunks(self.registry, pdf_bytes, build_prompt, self.model_id,
+                                                 pages_per_chunk=chunk_pages,
+                                                 system_instruction=EVAL_SYSTEM_INSTRUCTION, schema=CHUNK_EVIDENCE_SCHEMA,
+                                                 guide=(EVAL_GUIDE_NAME, EVAL_GUIDE_SECTION))
+        info["notes"].extend(f"p.{start}~{end} 구간 분석 실패: {error}" for start, end, error in failures)
+
+        # reduce: 병합된 증거 목록(텍스트)만으로 17개 항목 최종 채점
+        prompt = EVAL_PROMPT + EVIDENCE_SECTION.format(evidence=merge_chunk_evidence(chunk_results, failures))
+        eval_data = self._generate([prompt], None, timer, on_generate=on_generate, on_item=on_item, info=info)
+
+        # 일부 구간이 실패했거나 응답이 잘린 결과는 캐시하지 않음 (다음 실행에서 다시 시도)
+        if isinstance(eval_data, list) and not failures and not info.get("partial"):
+            self.cache.put(cache_key, eval_data)
+        return eval_data, False
@@ -0,0 +1,60 @@
+import threading
+import time
+
+# ==========================================
+# 프로세스 공용 요청 속도 제한기 (토큰 버킷)
+# ==========================================
+# 여러 작업 스레드/세션이 동시에 Gemini를 호출해도 분당 요청 수(RPM) 할당량을 넘지 않도록 한다.
+
+API_RPM_LIMIT = 60      # 분당 최대 generate_content 호출 수 (API 할당량에 맞춰 조정)
+API_BURST = 10          # 순간적으로 허용하는 동시 요청 수
+
+
+class RateLimiter:
+    def __init__(self, rate_per_min=API_RPM_LIMIT, burst=API_BURST):
+        self.rate = rate_per_min / 60.0
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def set_rate(self, rate_per_min, burst=None):
+        with self._lock:
+            self._refill()
+            self.rate = rate_per_min / 60.0
+            if burst is not None:
+                self.capacity = max(1, burst)
+                self.tokens = min(self.tokens, self.capacity)
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, tokens=1, timeout=None):
+        """토큰을 얻을 때까지 대기. timeout(초) 안에 못 얻으면 False"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return True
+                wait = (tokens - self.tokens) / self.rate
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(min(wait, 1.0))
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter():
+    """모든 탭/세션이 공유하는 전역 속도 제한기"""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter()
+    return _limiter
@@ -0,0 +1,231 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+from metrics import current_run, record_usage
+from rate_limiter import get_limiter
+
+# ==========================================
+# 모델 호출 안정화 래퍼 (속도 제한 + 재시도 + 호출 기한 + 헤지 요청)
+# ==========================================
+# 모든 탭/작업이 get_model()로 받는 모델은 이 래퍼로 감싸져 있어, 호출부는 generate_content만 부르면 된다.
+#   - 속도 제한: 시도(재시도/헤지 포함)마다 프로세스 공용 토큰 버킷에서 토큰을 받는다
+#   - 재시도: 429/5xx/시간 초과 등 일시적 오류만 지수 백오프 + 지터로 재시도
+#   - 기한: 시도별 타임아웃 + 호출 전체 기한 (기한을 넘길 재시도는 하지 않음)
+#   - 헤지: 비스트리밍 호출이 최근 p95 지연을 넘기면 같은 요청을 한 번 더 보내 먼저 끝난 응답을 사용
+#     (토큰이 바로 없거나 헤지 스레드가 모두 사용 중이면 헤지하지 않음 -> 부하가 높을 때 429를 늘리지 않음)
+#     원 요청은 풀을 거치지 않고 호출마다 전용 스레드에서 바로 시작하므로 동시 호출 수가 풀 크기에 묶이지 않고,
+#     p95 대기는 제한기 토큰을 받아 실제로 요청을 보낸 시점부터 잰다. 풀은 헤지 요청에만 쓴다.
+# 스트리밍 호출은 첫 조각을 받기 전의 오류만 재시도한다. (이미 화면에 보낸 항목이 있으므로)
+# 응답의 토큰 수는 실행 계측(metrics)에 기록한다. (헤지에서 늦게 끝나 버려진 응답도 비용이 들므로 포함)
+
+MAX_ATTEMPTS = 4            # 최초 시도 포함
+BACKOFF_BASE = 1.0          # 재시도 대기 기준 (초, 시도마다 2배)
+BACKOFF_MAX = 30.0
+ATTEMPT_TIMEOUT = 180.0     # 시도별 타임아웃 (초)
+CALL_DEADLINE = 420.0       # 재시도를 포함한 호출 전체 기한 (초)
+
+HEDGE_ENABLED = True
+HEDGE_MIN_SAMPLES = 20      # p95를 믿을 수 있을 만큼 지연 기록이 쌓인 뒤에만 헤지
+HEDGE_MIN_DELAY = 5.0       # p95가 아무리 짧아도 이 시간 전에는 헤지하지 않음 (초)
+LATENCY_WINDOW = 200        # 모델별 최근 지연 기록 수
+HEDGE_WORKERS = 16          # 동시에 진행할 수 있는 헤지 요청 수 (원 요청은 제한 없음)
+
+
+def _retryable_errors():
+    from google.api_core import exceptions as api_exceptions
+    return (api_exceptions.TooManyRequests, api_exceptions.ResourceExhausted, api_exceptions.ServiceUnavailable,
+            api_exceptions.InternalServerError, api_exceptions.GatewayTimeout, api_exceptions.DeadlineExceeded,
+            ConnectionError, TimeoutError)
+
+
+class LatencyTracker:
+    """모델별 최근 성공 호출 지연 (헤지 기준 p95 계산용)"""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, key, seconds):
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, key, q, min_samples=1):
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if len(samples) < min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+_tracker = LatencyTracker()
+_counters = {"calls": 0, "attempts": 0, "retries": 0, "hedges": 0, "hedge_wins": 0, "failures": 0}
+_counters_lock = threading.Lock()
+_hedge_pool = None
+_pool_lock = threading.Lock()
+_hedge_slots = threading.BoundedSemaphore(HEDGE_WORKERS)
+
+
+def _count(name, n=1):
+    with _counters_lock:
+        _counters[name] += n
+
+
+def _get_hedge_pool():
+    global _hedge_pool
+    if _hedge_pool is None:
+        with _pool_lock:
+            if _hedge_pool is None:
+                _hedge_pool = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix="model-hedge")
+    return _hedge_pool
+
+
+def _start_thread(fn, *args):
+    """fn을 전용 스레드에서 바로 실행 (풀 대기 없음)하고 Future 반환"""
+    future = Future()
+    future.set_running_or_notify_cancel()
+
+    def target():
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=target, name="model-primary", daemon=True).start()
+    return future
+
+
+def _record_discarded(future, key, run):
+    """헤지에서 쓰지 않은 쪽 응답도 끝나면 토큰 사용량을 기록"""
+    def record(done):
+        if not done.cancelled() and done.exception() is None:
+            record_usage(key, done.result(), run)
+    future.add_done_callback(record)
+
+
+def client_stats():
+    """호출/재시도/헤지 횟수"""
+    with _counters_lock:
+        return dict(_counters)
+
+
+def backoff_delay(attempt):
+    """attempt번째 재시도 전 대기 시간 (full jitter)"""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+class _NoLimit:
+    """이미 토큰을 받은 헤지 요청용"""
+
+    def acquire(self, tokens=1, timeout=None):
+        return True
+
+
+class _UsageStream:
+    """스트리밍 응답을 그대로 넘기면서, 끝까지 읽으면 마지막 조각의 토큰 사용량을 기록"""
+
+    def __init__(self, response, key):
+        self._response = response
+        self._key = key
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+    def __iter__(self):
+        last = None
+        for chunk in self._response:
+            if getattr(chunk, "usage_metadata", None) is not None:
+                last = chunk
+            yield chunk
+        record_usage(self._key, last)
+
+
+class ResilientModel:
+    """GenerativeModel 래퍼. generate_content 외의 속성은 원본 모델로 전달"""
+
+    def __init__(self, model, key, limiter=None, tracker=None):
+        self._model = model
+        self._key = key
+        self._limiter = limiter or get_limiter()
+        self._tracker = tracker or _tracker
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
+
+    def _attempt(self, contents, stream, timeout, kwargs, sent=None):
+        self._limiter.acquire()
+        if sent is not None: sent.set()
+        _count("attempts")
+        request_options = dict(kwargs.pop("request_options", None) or {})
+        request_options.setdefault("timeout", timeout)
+        started = time.monotonic()
+        response = self._model.generate_content(contents, stream=stream, request_options=request_options, **kwargs)
+        if not stream:
+            self._tracker.record(self._key, time.monotonic() - started)
+        return response
+
+    def _hedged_attempt(self, contents, timeout, kwargs):
+        """p95를 넘기면 같은 요청을 한 번 더 보내고 먼저 성공한 응답 사용"""
+        hedge_after = self._tracker.percentile(self._key, 0.95, HEDGE_MIN_SAMPLES)
+        if not HEDGE_ENABLED or hedge_after is None:
+            return self._attempt(contents, False, timeout, dict(kwargs))
+
+        # 원 요청은 전용 스레드에서 바로 시작하고, 제한기 대기가 끝나 실제로 보낸 시점부터 p95를 잰다
+        sent = threading.Event()
+        primary = _start_thread(self._attempt, contents, False, timeout, dict(kwargs), sent)
+        primary.add_done_callback(lambda _: sent.set())
+        sent.wait()
+        done, _ = wait([primary], timeout=max(HEDGE_MIN_DELAY, hedge_after))
+        if done or not _hedge_slots.acquire(blocking=False):
+            return primary.result()
+        if not self._limiter.acquire(timeout=0):
+            _hedge_slots.release()
+            return primary.result()
+        # 헤지 요청은 이미 토큰을 받았으므로 제한기를 다시 거치지 않는다
+        _count("hedges")
+        hedge = _get_hedge_pool().submit(ResilientModel(self._model, self._key, _NoLimit(), self._tracker)._attempt,
+                                         contents, False, timeout, dict(kwargs))
+        hedge.add_done_callback(lambda _: _hedge_slots.release())
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge: _count("hedge_wins")
+                    other = primary if future is hedge else hedge
+                    _record_discarded(other, self._key, current_run())
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def generate_content(self, contents, stream=False, deadline=None, **kwargs):
+        """
+        재시도/기한/헤지를 적용한 generate_content.
+        deadline: time.monotonic 기준 호출 전체 기한 (미지정 시 CALL_DEADLINE초 후)
+        """
+        _count("calls")
+        retryable = _retryable_errors()
+        deadline = deadline if deadline is not None else time.monotonic() + CALL_DEADLINE
+        for attempt in range(MAX_ATTEMPTS):
+            timeout = min(ATTEMPT_TIMEOUT, deadline - time.monotonic())
+            try:
+                if stream:
+                    return _UsageStream(self._attempt(contents, True, timeout, dict(kwargs)), self._key)
+                response = self._hedged_attempt(contents, timeout, kwargs)
+                record_usage(self._key, response)
+                return response
+            except retryable:
+                delay = backoff_delay(attempt)
+                if attempt == MAX_ATTEMPTS - 1 or time.monotonic() + delay >= deadline:
+                    _count("failures")
+                    raise
+                _count("retries")
+                time.sleep(delay)
+            except Exception:
+                _count("failures")
+                raise
+
@@ -0,0 +1,109 @@
+import itertools
+import sys
+import time
+from collections import OrderedDict
+
+# ==========================================
+# 세션별 결과 보관소
+# ==========================================
+# Streamlit은 위젯을 조작할 때마다(다운로드 버튼 클릭 포함) 스크립트를 다시 실행하므로,
+# `if st.button(...)` 안에서만 만든 결과는 바로 사라지고 사용자는 같은 분석을 다시 요청하게 된다.
+# 파싱된 결과와 생성된 엑셀 바이트를 세션에 보관하여 재실행 시 API 호출 없이 다시 그린다.
+# 메모리 사용량은 항목 수 / 총 바이트 상한으로 제한하고, 초과 시 오래된 결과부터 버린다.
+# (업로드 파일 핸들은 프로세스 공용 업로드 레지스트리가 이미 해시 기준으로 유지한다)
+
+MAX_ENTRIES = 20
+MAX_BYTES = 50 * 1024 * 1024
+
+SESSION_KEY = "result_store"
+
+
+def _sizeof(value):
+    """보관 용량 계산용 대략적인 크기 (bytes)"""
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    if isinstance(value, dict):
+        return sum(_sizeof(k) + _sizeof(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return sum(_sizeof(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class ResultStore:
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()   # id -> 결과 (오래된 순)
+        self._current = {}              # 탭 -> 화면에 표시할 결과 id
+        self._ids = itertools.count(1)
+        self._bytes = 0
+
+    def put(self, tab, title, data, files=None):
+        """
+        결과 저장 후 해당 탭의 표시 대상으로 지정. 결과 id 반환.
+        data: 화면을 다시 그리는 데 필요한 파싱 결과 / files: {이름: 바이트} (다운로드용)
+        """
+        entry_id = next(self._ids)
+        files = {name: (f.getvalue() if hasattr(f, "getvalue") else f) for name, f in (files or {}).items()}
+        entry = {
+            "id": entry_id,
+            "tab": tab,
+            "title": title,
+            "created": time.time(),
+            "data": data,
+            "files": files,
+            "size": _sizeof(data) + _sizeof(files),
+        }
+        self._entries[entry_id] = entry
+        self._bytes += entry["size"]
+        self._current[tab] = entry_id
+        self._evict(keep=entry_id)
+        return entry_id
+
+    def _evict(self, keep):
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            oldest_id = next(iter(self._entries))
+            if oldest_id == keep:
+                break
+            self._remove(oldest_id)
+
+    def _remove(self, entry_id):
+        entry = self._entries.pop(entry_id)
+        self._bytes -= entry["size"]
+        if self._current.get(entry["tab"]) == entry_id:
+            del self._current[entry["tab"]]
+
+    def get(self, entry_id):
+        return self._entries.get(entry_id)
+
+    def current(self, tab):
+        """탭에 표시할 결과 (없으면 None)"""
+        entry_id = self._current.get(tab)
+        return self._entries.get(entry_id) if entry_id is not None else None
+
+    def select(self, entry_id):
+        """이력에서 고른 결과를 해당 탭의 표시 대상으로 지정"""
+        entry = self._entries.get(entry_id)
+        if entry is not None:
+            self._current[entry["tab"]] = entry_id
+        return entry
+
+    def dismiss(self, tab):
+        """탭 화면에서 결과 닫기 (이력에는 남김)"""
+        self._current.pop(tab, None)
+
+    def history(self):
+        """최근 결과부터"""
+        return list(reversed(self._entries.values()))
+
+    def stats(self):
+        return {"entries": len(self._entries), "bytes": self._bytes}
+
+
+def get_session_store(session_state):
+    """세션(st.session_state)별 결과 보관소"""
+    if SESSION_KEY not in session_state:
+        session_state[SESSION_KEY] = ResultStore()
+    return session_state[SESSION_KEY]
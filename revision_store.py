@@ -0,0 +1,189 @@
+import difflib
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+# ==========================================
+# 평가 이력의 단위(페이지/행) 해시 보관 (수정 제출본 부분 재평가용)
+# ==========================================
+# 반려 후 다시 제출되는 계획서/위험성평가표는 대부분 몇 페이지(몇 행)만 고친 것이다.
+# 평가할 때마다 문서를 단위(PDF 페이지 / 엑셀 행)별 내용 해시 목록과 함께 저장해 두고,
+# 새 문서가 들어오면 같은 해시를 가장 많이 공유하는 이전 평가(같은 평가 방식)를 찾아 수정본으로 본다.
+#   - 찾기: 단위 해시 -> 평가 id 색인으로 겹치는 단위 수를 세고, 비율이 MIN_OVERLAP 이상인 것 중 최대
+#   - 비교: 해시 목록을 순서대로 맞춰(difflib) 유지/변경·추가/삭제 단위를 구분 (페이지가 밀려도 추적)
+# 평가 방식(프롬프트/가이드라인/모델)이 바뀌면 signature가 달라져 이전 평가를 기준으로 쓰지 않는다.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+REVISION_DB_PATH = os.path.join(BASE_DIR, ".cache", "revisions.sqlite3")
+MIN_OVERLAP = 0.5               # 이전 제출본과 같은 단위 비율이 이 이상이면 수정본으로 본다
+REVISION_TTL = 180 * 24 * 60 * 60   # 이 기간이 지난 평가는 기준으로 쓰지 않고 삭제
+QUERY_BATCH = 500               # 색인 조회 시 한 번에 넘기는 해시 수 (SQLite 변수 개수 제한)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS revisions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    signature TEXT NOT NULL,
+    title TEXT,
+    created REAL,
+    unit_count INTEGER,
+    payload BLOB
+);
+CREATE TABLE IF NOT EXISTS revision_units (
+    unit_hash TEXT NOT NULL,
+    revision_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS revision_units_hash ON revision_units (unit_hash);
+CREATE INDEX IF NOT EXISTS revision_units_revision ON revision_units (revision_id);
+"""
+
+
+def unit_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:20]
+
+
+def signature(*parts):
+    """평가 방식 식별자 (프롬프트/가이드라인/모델 등이 하나라도 바뀌면 달라짐)"""
+    return hashlib.sha256("\x00".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+
+def diff_units(old, new):
+    """
+    이전/새 단위 해시 목록 비교.
+    반환: {"mapping": {이전 번호: 새 번호} (내용이 같은 단위), "new": [변경·추가된 새 번호],
+           "removed": [변경·삭제된 이전 번호]} (번호는 0부터)
+    """
+    matcher = difflib.SequenceMatcher(None, old, new, autojunk=False)
+    mapping = {}
+    for a, b, size in matcher.get_matching_blocks():
+        for k in range(size):
+            mapping[a + k] = b + k
+    matched_new = set(mapping.values())
+    return {"mapping": mapping,
+            "new": [i for i in range(len(new)) if i not in matched_new],
+            "removed": [i for i in range(len(old)) if i not in mapping]}
+
+
+def describe(revision):
+    """
+    화면 표시용 수정본 비교 요약.
+    revision: {"base_title", "base_created", "overlap", "unit", "changed_units", "removed_units", "changed",
+               "incremental", "rescored", "carried", "previous"} (평가 함수가 info["revision"]에 기록)
+    """
+    when = time.strftime("%m-%d %H:%M", time.localtime(revision["base_created"]))
+    unit = revision["unit"]
+    text = (f"🔁 수정 제출본: 이전 평가({revision['base_title'] or '이름 없음'}, {when})와 "
+            f"{unit} {revision['overlap']:.0%} 일치")
+    if not revision["changed"] and not revision.get("rescored"):
+        return text + " · 바뀐 내용이 없어 이전 결과를 그대로 사용 (API 호출 없음)"
+    text += f" · 변경/추가 {len(revision['changed_units'])}{unit}, 삭제 {len(revision['removed_units'])}{unit}"
+    if not revision["incremental"]:
+        return text + " · 전체 재평가"
+    return text + f" · {len(revision['rescored'])}개 항목 다시 평가 / {len(revision['carried'])}개 항목 이전 결과 사용"
+
+
+class RevisionStore:
+    def __init__(self, db_path=REVISION_DB_PATH, min_overlap=MIN_OVERLAP, ttl=REVISION_TTL):
+        self.db_path = db_path
+        self.min_overlap = min_overlap
+        self.ttl = ttl
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with self._db() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _db(self):
+        """자동 커밋 연결 (스레드마다 새로 열고 닫음)"""
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def save(self, kind, sig, title, units, result):
+        """평가 1건 저장. units: 단위 해시 목록, result: 다음 비교 때 필요한 평가 결과 (JSON 직렬화 가능). id 반환"""
+        payload = zlib.compress(json.dumps({"units": units, "result": result}, ensure_ascii=False).encode("utf-8"))
+        with self._db() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                revision_id = conn.execute(
+                    "INSERT INTO revisions (kind, signature, title, created, unit_count, payload) VALUES (?, ?, ?, ?, ?, ?)",
+                    (kind, sig, title, time.time(), len(set(units)), payload)).lastrowid
+                conn.executemany("INSERT INTO revision_units (unit_hash, revision_id) VALUES (?, ?)",
+                                 [(h, revision_id) for h in set(units)])
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return revision_id
+
+    def find_base(self, kind, sig, units):
+        """
+        units와 가장 많이 겹치는 이전 평가 (같은 kind/signature, 겹치는 비율 MIN_OVERLAP 이상, 같으면 최신).
+        반환: {"id", "title", "created", "overlap", "units", "result"} 또는 None
+        """
+        wanted = list(set(units))
+        if not wanted:
+            return None
+        counts = {}
+        with self._db() as conn:
+            for i in range(0, len(wanted), QUERY_BATCH):
+                batch = wanted[i:i + QUERY_BATCH]
+                rows = conn.execute(f"SELECT revision_id, COUNT(*) AS n FROM revision_units WHERE unit_hash IN "
+                                    f"({','.join('?' * len(batch))}) GROUP BY revision_id", batch).fetchall()
+                for r in rows:
+                    counts[r["revision_id"]] = counts.get(r["revision_id"], 0) + r["n"]
+            if not counts:
+                return None
+            ids = list(counts)
+            meta = conn.execute(f"SELECT id, title, created, unit_count FROM revisions WHERE kind = ? AND signature = ? "
+                                f"AND created >= ? AND id IN ({','.join('?' * len(ids))})",
+                                (kind, sig, time.time() - self.ttl, *ids)).fetchall()
+            best = None
+            for r in meta:
+                overlap = counts[r["id"]] / max(len(wanted), r["unit_count"] or 1)
+                if overlap >= self.min_overlap and (best is None or (overlap, r["id"]) > (best[0], best[1]["id"])):
+                    best = (overlap, r)
+            if best is None:
+                return None
+            overlap, r = best
+            payload = conn.execute("SELECT payload FROM revisions WHERE id = ?", (r["id"],)).fetchone()["payload"]
+        data = json.loads(zlib.decompress(payload).decode("utf-8"))
+        return {"id": r["id"], "title": r["title"], "created": r["created"], "overlap": round(overlap, 3),
+                "units": data["units"], "result": data["result"]}
+
+    def purge(self):
+        """보관 기간이 지난 평가 삭제"""
+        with self._db() as conn:
+            old = [r["id"] for r in conn.execute("SELECT id FROM revisions WHERE created < ?",
+                                                 (time.time() - self.ttl,)).fetchall()]
+            conn.executemany("DELETE FROM revision_units WHERE revision_id = ?", [(i,) for i in old])
+            conn.executemany("DELETE FROM revisions WHERE id = ?", [(i,) for i in old])
+        return len(old)
+
+    def stats(self):
+        with self._db() as conn:
+            rows = conn.execute("SELECT kind, COUNT(*) AS n FROM revisions GROUP BY kind").fetchall()
+        return {r["kind"]: r["n"] for r in rows}
+
+
+# 프로세스 전역 저장소 (모든 세션/작업 스레드 공유)
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_revision_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = RevisionStore()
+                _store.purge()
+    return _store
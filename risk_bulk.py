@@ -0,0 +1,155 @@
+import csv
+import io
+import re
+import tempfile
+import zipfile
+
+from excel_text import find_header_row, read_sheets
+from keyword_index import normalize
+
+# ==========================================
+# 2-1. 일괄 생성 (공사 목록 CSV/엑셀 -> 공사별 위험성평가표)
+# ==========================================
+# 목록의 공사마다 2-1 작업을 하나씩 작업 큐에 등록하여 공용 작업 풀에서 동시에 생성한다.
+# (일괄 작업은 단건 작업보다 나중에 실행되고 동시 실행 수는 JOB_BATCH_WORKERS로 제한, API 호출 한도는 공용 속도 제한기가 지킴.
+#  공사 1건이 실패해도 나머지는 계속)
+# 결과 내려받기는 버튼을 누른 시점에 작업 결과를 한 건씩 읽어 zip(공사별 엑셀) 또는 시트별 통합 문서로
+# 임시 파일에 써 나간다. 다만 download_button에는 바이트로 넘겨야 하므로 완성된 파일 전체를 마지막에 메모리로 읽는다.
+# (파일 크기는 공사 수에 비례하며 MAX_PROJECTS건까지. 메모리 사용량은 공사 수와 무관하게 고정되지 않는다)
+
+HAZARDS = ["화기", "전기", "고소", "중량물", "위험물", "밀폐"]
+MAX_PROJECTS = 200      # 한 번에 등록할 수 있는 최대 공사 수
+
+# 목록 머리글 별칭 (공백 제거/소문자 비교, 앞쪽 별칭 우선)
+FIELD_ALIASES = {
+    "name": ["공사명", "작업명", "공사이름", "name"],
+    "loc": ["장소", "위치", "location", "loc"],
+    "period": ["기간", "일정", "period"],
+    "content": ["작업내용", "공사내용", "내용", "content"],
+    "hazards": ["위험요인", "위험작업", "hazard"],
+}
+TRUE_VALUES = {"o", "○", "●", "v", "✓", "✔", "y", "yes", "true", "1", "예", "해당"}
+TEMPLATE_HEADER = ["공사명", "장소", "기간", "작업 내용", *HAZARDS]
+TEMPLATE_EXAMPLE = ["3층 객실 욕실 리모델링", "본관 3층", "26.02.01 ~ 02.15", "욕실 타일 철거 및 방수, 위생기구 교체",
+                    "O", "O", "", "", "", ""]
+
+_SPLIT_RE = re.compile(r"[,/·;\s]+")
+_FILE_NAME_RE = re.compile(r'[\\/:*?"<>|\s]+')
+
+
+def template_csv():
+    """목록 양식 (엑셀에서 한글이 깨지지 않도록 BOM 포함 UTF-8)"""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(TEMPLATE_HEADER)
+    writer.writerow(TEMPLATE_EXAMPLE)
+    return buf.getvalue().encode("utf-8-sig")
+
+
+def _csv_rows(data):
+    for encoding in ("utf-8-sig", "cp949"):
+        try:
+            text = data.decode(encoding)
+            break
+        except UnicodeDecodeError:
+            continue
+    else:
+        raise ValueError("CSV 인코딩을 알 수 없습니다. UTF-8 또는 CP949(엑셀 기본)로 저장해 주세요.")
+    return [[cell.strip() for cell in row] for row in csv.reader(io.StringIO(text)) if any(c.strip() for c in row)]
+
+
+def _column_map(header):
+    """필드 -> 열 번호, 위험요인 표시 열 -> 위험요인 이름"""
+    normalized = [normalize(h)[0] for h in header]
+    columns = {}
+    for field, aliases in FIELD_ALIASES.items():
+        for alias in aliases:
+            i = next((i for i, h in enumerate(normalized) if alias in h and i not in columns.values()), None)
+            if i is not None:
+                columns[field] = i
+                break
+    flags = {i: hazard for hazard in HAZARDS for i, h in enumerate(normalized)
+             if hazard in h and i not in columns.values()}
+    return columns, flags
+
+
+def read_projects(file_name, data):
+    """
+    공사 목록 CSV/엑셀(첫 시트) -> (공사 목록 [{"row", "p_info", "selected_risks"}], 문제 목록 [(행 번호, 내용)])
+    위험요인은 위험요인별 표시 열(O/✓/1/예 등) 또는 '위험요인' 열의 쉼표 구분 목록으로 지정한다.
+    """
+    if file_name.lower().endswith(".csv"):
+        rows = _csv_rows(data)
+    else:
+        rows = next(iter(read_sheets(io.BytesIO(data), max_rows=MAX_PROJECTS + 20)), ("", []))[1]
+    index = find_header_row(rows)
+    if index is None:
+        raise ValueError("머리글 행(공사명, 작업 내용 등)을 찾지 못했습니다. 양식을 내려받아 사용해 주세요.")
+    columns, flags = _column_map(rows[index])
+    if "name" not in columns:
+        raise ValueError("'공사명' 열을 찾지 못했습니다.")
+
+    projects, problems = [], []
+    for row_no, row in enumerate(rows[index + 1:], index + 2):
+        def value(field):
+            i = columns.get(field)
+            return row[i] if i is not None and i < len(row) else ""
+
+        if not value("name"):
+            problems.append((row_no, "공사명이 비어 있어 건너뜁니다."))
+            continue
+        selected = [hazard for i, hazard in flags.items() if i < len(row) and row[i].strip().lower() in TRUE_VALUES]
+        for token in _SPLIT_RE.split(value("hazards")):
+            if token in HAZARDS:
+                selected.append(token)
+            elif token:
+                problems.append((row_no, f"알 수 없는 위험요인 '{token}'은 제외합니다. (가능: {', '.join(HAZARDS)})"))
+        projects.append({"row": row_no,
+                         "p_info": {key: value(key) for key in ("name", "loc", "period", "content")},
+                         "selected_risks": [h for h in HAZARDS if h in selected]})
+    if len(projects) > MAX_PROJECTS:
+        problems.append((projects[MAX_PROJECTS]["row"], f"한 번에 {MAX_PROJECTS}건까지 등록할 수 있어 이후 행은 제외합니다."))
+        projects = projects[:MAX_PROJECTS]
+    return projects, problems
+
+
+# ------------------------------------------------------------------------------
+# 결과 내려받기 (작업 결과를 한 건씩 읽어 써 나감)
+# ------------------------------------------------------------------------------
+def iter_results(queue, job_ids):
+    """(순번, 작업 결과 또는 None) - 결과(엑셀 바이트 포함)는 한 번에 한 건만 읽는다"""
+    for n, job_id in enumerate(job_ids, 1):
+        yield n, queue.result(job_id)
+
+
+def _file_name(n, name):
+    return f"{n:03d}_{_FILE_NAME_RE.sub('_', name).strip('_')[:60] or '공사'}.xlsx"
+
+
+def _read_back(output):
+    output.seek(0)
+    return output.read()
+
+
+def build_zip(queue, job_ids, summary_rows):
+    """공사별 엑셀 + 결과 요약 CSV를 담은 zip 바이트 (성공한 공사만, 파일명은 목록 순번_공사명)"""
+    with tempfile.TemporaryFile() as output:
+        with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as zf:
+            for n, result in iter_results(queue, job_ids):
+                if result and "files" in result:
+                    zf.writestr(_file_name(n, result["title"]), result["files"]["excel"])
+            summary = io.StringIO()
+            writer = csv.DictWriter(summary, fieldnames=list(summary_rows[0]) if summary_rows else ["번호"])
+            writer.writeheader()
+            writer.writerows(summary_rows)
+            zf.writestr("_결과요약.csv", summary.getvalue().encode("utf-8-sig"))
+        return _read_back(output)
+
+
+def build_workbook(queue, job_ids):
+    """성공한 공사를 시트별로 담은 통합 문서 바이트 (시트명은 목록 순번. 공사명)"""
+    from risk_excel import write_combined_workbook
+    with tempfile.TemporaryFile() as output:
+        write_combined_workbook(((f"{n}. {result['title']}", result["data"]["p_info"], result["data"]["risk_data"])
+                                 for n, result in iter_results(queue, job_ids) if result and "data" in result), output)
+        return _read_back(output)
@@ -0,0 +1,238 @@
+import contextvars
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from guide_data2 import MASTER_GUIDE_TEXT2
+from excel_text import CHUNK_TOKENS
+from json_parse import array_schema, generate_json
+from model_clients import get_model
+from pdf_text import estimate_tokens
+from revision_store import diff_units, signature
+
+# ==========================================
+# 1-2. 위험성평가 적정성 검토 로직
+# ==========================================
+
+RISK_REVIEW_MODEL_ID = "models/gemini-2.5-flash"
+
+RISK_REVIEW_CONFIG = {
+    "temperature": 0.0,
+    "response_mime_type": "application/json",
+}
+
+# 1-2 검토 결과 응답 검증 스키마
+RISK_REVIEW_SCHEMA = array_schema(required=["category", "score"], numeric=["score", "max_score"])
+
+RISK_REVIEW_PROMPT = f"""
+당신은 '위험성평가 적정성 검토 전문가'입니다.
+제출된 문서를 아래 [위험성평가 가이드라인]에 따라 평가하고 결과를 JSON으로 출력하세요.
+
+[위험성평가 가이드라인 (MASTER_GUIDE_TEXT2)]
+{MASTER_GUIDE_TEXT2}
+
+[평가 기준]
+- 각 항목별로 문서 내에서 구체적인 근거를 찾아 평가할 것.
+- 내용이 부실하거나 형식적인 경우 감점할 것.
+
+[출력 형식]
+[
+    {{
+        "category": "평가 항목명 (예: 위험요인 도출)",
+        "score": 25,
+        "max_score": 30,
+        "status": "양호/미흡",
+        "comment": "평가 의견 및 보완 필요 사항"
+    }}
+]
+"""
+
+
+REVIEW_CHUNK_WORKERS = 6    # 엑셀 구간 동시 검토 수
+
+RISK_REVIEW_CHUNK_NOTE = """
+[분할 검토 안내]
+제출된 엑셀이 커서 {total}개 부분으로 나누어 검토합니다. 아래 데이터는 그중 {index}번째 부분(시트: {sheets})입니다.
+- 이 부분에 포함된 내용만 근거로 각 평가 항목을 채점하세요.
+- 다른 부분에 있을 수 있는 내용(다른 시트/행)이 없다는 이유로 감점하지 마세요.
+- 이 부분에서 판단 근거를 전혀 찾을 수 없는 항목은 출력하지 마세요.
+"""
+
+
+# 수정 제출본: 이전 검토 결과와 바뀐/삭제된 행(페이지)만 보내 영향받는 항목만 다시 평가
+RISK_REVISION_KIND = "risk_review"
+
+RISK_REVIEW_REVISION_NOTE = """
+[수정 제출본 검토 안내]
+이 문서는 이전에 검토한 위험성평가서의 수정본입니다. 이전 검토 결과는 다음과 같습니다.
+{previous}
+
+아래 데이터는 수정본에서 바뀌거나 추가된 내용과 삭제된 내용만 모은 것이며, 나머지 내용은 이전 제출본과 같습니다.
+- 바뀐 내용 때문에 점수나 의견이 달라지는 평가 항목만 이전 결과와 같은 category 이름으로 출력하세요.
+- 점수는 바뀌지 않은 내용까지 포함한 문서 전체를 기준으로 매기세요.
+- 바뀐 내용과 관계없는 항목은 출력하지 마세요. (이전 결과를 그대로 사용합니다)
+"""
+
+MAX_REVISION_TOKENS = CHUNK_TOKENS  # 바뀐 내용이 이보다 많으면 전체를 다시 검토
+
+
+def _category_key(item):
+    return " ".join(str(item.get("category", "")).split())
+
+
+def merge_review_chunks(chunk_results):
+    """
+    구간별 검토 결과를 항목(category)별로 병합 (reduce).
+    chunk_results: [(구간 행 수, 항목 목록)]
+      - score: 해당 항목을 평가한 구간들의 행 수 가중 평균 (정수 반올림)
+      - max_score: 구간 중 최댓값 / status: 한 구간이라도 '미흡'이면 '미흡'
+      - comment: 구간별 의견을 중복 없이 이어붙임
+    항목 순서는 처음 등장한 순서를 따른다.
+    """
+    merged = {}
+    for weight, items in chunk_results:
+        weight = max(1, weight)
+        for item in items:
+            key = _category_key(item)
+            entry = merged.setdefault(key, {"category": key, "weighted": 0.0, "weight": 0,
+                                            "max_score": None, "status": "", "comments": []})
+            entry["weighted"] += (item.get("score") or 0) * weight
+            entry["weight"] += weight
+            if item.get("max_score") is not None:
+                entry["max_score"] = max(entry["max_score"] or 0, item["max_score"])
+            status = str(item.get("status") or "")
+            if "미흡" in status or not entry["status"]:
+                entry["status"] = status
+            comment = str(item.get("comment") or "").strip()
+            if comment and comment not in entry["comments"]:
+                entry["comments"].append(comment)
+
+    return [{"category": e["category"],
+             "score": round(e["weighted"] / e["weight"]),
+             "max_score": e["max_score"],
+             "status": e["status"],
+             "comment": "\n".join(e["comments"])} for e in merged.values()]
+
+
+def review_model():
+    """1-2 검토 모델 (프로세스 공용 클라이언트. 가이드라인이 컨텍스트 캐시 최소 크기보다 작아 프롬프트에 인라인)"""
+    return get_model(RISK_REVIEW_MODEL_ID, RISK_REVIEW_CONFIG)
+
+
+def _review_chunk(chunk, index, total, facts):
+    model = review_model()
+    note = RISK_REVIEW_CHUNK_NOTE.format(total=total, index=index, sheets=", ".join(dict.fromkeys(chunk["sheets"])))
+    data = generate_json(model, [RISK_REVIEW_PROMPT + facts + note, chunk["text"]], RISK_REVIEW_SCHEMA)
+    if not isinstance(data, list):
+        raise ValueError("구간 응답에서 JSON 배열을 찾지 못했습니다")
+    return data
+
+
+def review_chunks(chunks, facts="", on_done=None, max_workers=REVIEW_CHUNK_WORKERS):
+    """
+    엑셀 구간들을 병렬 검토(map)한 뒤 항목별로 병합(reduce).
+    facts: 통합 문서 전체의 사전 점검 결과 (risk_lint.findings_text, 모든 구간 프롬프트에 공통으로 넣음)
+    on_done(완료 수, 전체 수): 구간 하나가 끝날 때마다 호출 (진행 표시용)
+    반환: (병합된 항목 목록, 실패 목록 [(구간 번호, 오류 메시지)]) - 모두 실패하면 예외
+    """
+    total = len(chunks)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, total)), thread_name_prefix="excel-chunk") as pool:
+        futures = {pool.submit(contextvars.copy_context().run, _review_chunk, chunk, i + 1, total, facts): i
+                   for i, chunk in enumerate(chunks)}
+        results, failures = {}, []
+        for done, future in enumerate(as_completed(futures), 1):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+            except Exception as e:
+                failures.append((i + 1, str(e)))
+            if on_done is not None:
+                on_done(done, total)
+
+    if not results:
+        raise RuntimeError(f"모든 엑셀 구간 검토에 실패했습니다: {failures[0][1]}")
+    merged = merge_review_chunks([(chunks[i]["rows"], results[i]) for i in sorted(results)])
+    return merged, sorted(failures)
+
+
+# ------------------------------------------------------------------------------
+# 수정 제출본 부분 재검토
+# ------------------------------------------------------------------------------
+def revision_signature():
+    """이전 검토를 수정본 비교 기준으로 쓸 수 있는지 (프롬프트/가이드라인/모델이 같아야 함)"""
+    return signature(RISK_REVIEW_PROMPT, RISK_REVIEW_REVISION_NOTE, RISK_REVIEW_MODEL_ID)
+
+
+def pdf_revision_units(prep):
+    """텍스트 추출 PDF의 페이지 단위 비교 정보 (스캔 페이지가 있으면 None: 업로드분은 비교하지 않음)"""
+    if prep["mode"] != "text":
+        return None
+    return {"unit": "페이지", "units": prep["page_hashes"],
+            "lines": [["", f"p.{n}: {text}"] for n, text in enumerate(prep["pages"], 1)], "heads": {}}
+
+
+def find_revision(store, units):
+    return store.find_base(RISK_REVISION_KIND, revision_signature(), units["units"])
+
+
+def save_revision(store, title, units, items):
+    """검토 결과 저장 (삭제된 내용을 다음 비교 때 보여줄 수 있도록 행 텍스트도 함께)"""
+    store.save(RISK_REVISION_KIND, revision_signature(), title, units["units"],
+               {"items": items, "lines": units["lines"], "heads": units["heads"]})
+
+
+def _excerpt(title, indices, lines, heads):
+    out, group = [title], None
+    for i in indices:
+        name, text = lines[i]
+        if name != group:
+            group = name
+            if heads.get(name):
+                out.append(heads[name])
+        out.append(text)
+    return "\n".join(out)
+
+
+def review_revision(base, units, facts=""):
+    """
+    수정 제출본 검토. 바뀐 내용이 없으면 이전 결과를 그대로 쓰고, 있으면 바뀐/삭제된 행(페이지)만 보내
+    영향받는 항목만 다시 평가한다. units: prepare_workbook의 "revision" 또는 pdf_revision_units 결과
+    반환: (항목 목록, 수정본 비교 정보) - 바뀐 내용이 많아 전체 검토가 필요하면 항목 목록은 None
+    """
+    previous = base["result"]["items"]
+    diff = diff_units(base["units"], units["units"])
+    revision = {"base_title": base["title"], "base_created": base["created"], "overlap": base["overlap"],
+                "unit": units["unit"], "changed_units": [i + 1 for i in diff["new"]],
+                "removed_units": [i + 1 for i in diff["removed"]],
+                "changed": bool(diff["new"] or diff["removed"]), "incremental": False,
+                "previous": [{"key": _category_key(item), "label": item.get("category", ""),
+                              "score": item.get("score") or 0} for item in previous]}
+    if not revision["changed"]:
+        revision.update(incremental=True, rescored=[], carried=[item.get("category", "") for item in previous])
+        return [dict(item, source="carried") for item in previous], revision
+
+    parts = []
+    if diff["new"]:
+        parts.append(_excerpt("[수정본에서 바뀌거나 추가된 내용]", diff["new"], units["lines"], units["heads"]))
+    if diff["removed"]:
+        old = base["result"]
+        parts.append(_excerpt("[수정본에서 삭제된 내용]", diff["removed"], old["lines"], old["heads"]))
+    excerpt = "\n\n".join(parts)
+    if estimate_tokens(excerpt) > MAX_REVISION_TOKENS:
+        return None, revision
+
+    shown = [{k: item.get(k) for k in ("category", "score", "max_score", "status", "comment")} for item in previous]
+    note = RISK_REVIEW_REVISION_NOTE.format(previous=json.dumps(shown, ensure_ascii=False, indent=1))
+    data = generate_json(review_model(), [RISK_REVIEW_PROMPT + facts + note, excerpt], RISK_REVIEW_SCHEMA)
+    if not isinstance(data, list):
+        raise ValueError("수정본 검토 응답에서 JSON 배열을 찾지 못했습니다")
+
+    updated = {_category_key(item): item for item in data if isinstance(item, dict)}
+    items = []
+    for item in previous:
+        new = updated.pop(_category_key(item), None)
+        items.append(dict(new, source="llm") if new is not None else dict(item, source="carried"))
+    items.extend(dict(item, source="llm") for item in updated.values())
+    revision.update(incremental=True,
+                    rescored=[item.get("category", "") for item in items if item["source"] == "llm"],
+                    carried=[item.get("category", "") for item in items if item["source"] == "carried"])
+    return items, revision
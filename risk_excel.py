@@ -0,0 +1,189 @@
+import io
+import re
+from copy import copy
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Alignment, Border, Side, PatternFill, NamedStyle
+from openpyxl.styles.borders import DEFAULT_BORDER
+from openpyxl.styles.fonts import DEFAULT_FONT
+from openpyxl.utils import get_column_letter
+
+# ==========================================
+# 2-1 / 2-2. 위험성평가표 엑셀 양식 생성 및 데이터 입력 함수
+# ==========================================
+# openpyxl은 엑셀을 만드는 2-1 / 2-2 페이지에서만 불러온다.
+# 셀마다 서식 객체를 새로 만들지 않고, 통합 문서에 등록한 이름 있는 스타일(NamedStyle)을 셀에 지정한다.
+# 행이 많으면(현장 전체 통합 평가표 등) write-only 모드로 한 행씩 내보내 메모리를 일정하게 유지한다.
+
+STREAMING_ROWS = 2000   # 위험요인 행이 이보다 많으면 write-only(스트리밍) 모드로 작성
+
+FIRST_COL = 2           # 표는 B열부터
+LAST_COL = 6            # F열까지
+TABLE_HEADERS = ["구분 (장비/작업)", "위험요인 (What)", "위험성", "안전대책 (How)", "담당자"]
+COL_WIDTHS = [20, 40, 10, 50, 15]   # B~F열 너비
+OVERVIEW_LABELS = ["공사명", "공사 장소", "공사 기간", "작업 내용"]
+OVERVIEW_KEYS = ["name", "loc", "period", "content"]
+ROW_KEYS = ["equipment", "risk_factor", "risk_level", "countermeasure", "manager"]
+_SHEET_NAME_RE = re.compile(r"[\[\]:*?/\\]")   # 시트명에 쓸 수 없는 문자
+
+
+def _named_styles():
+    """
+    양식에 쓰는 스타일 (통합 문서마다 한 번 등록, 셀에는 이름만 지정).
+    NamedStyle의 기본 글꼴/테두리는 통합 문서 기본값과 다르므로 바꾸지 않는 속성도 기본값(DEFAULT_*)을 명시
+    """
+    # 1. 테두리 스타일 (얇은 실선)
+    thin = Side(style='thin')
+    thin_border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    # 2. 헤더 스타일 (회색 배경, 굵은 글씨, 중앙 정렬)
+    header_fill = PatternFill(start_color="DDDDDD", end_color="DDDDDD", fill_type="solid")
+    center_align = Alignment(horizontal="center", vertical="center", wrap_text=True)
+    left_align = Alignment(horizontal="left", vertical="center", wrap_text=True)
+    return [
+        # 3. 제목 스타일
+        NamedStyle("risk_title", font=Font(bold=True, size=16), alignment=center_align, border=DEFAULT_BORDER),
+        # 개요 레이블 / 표 헤더
+        NamedStyle("risk_header", font=Font(bold=True, size=11), fill=header_fill,
+                   alignment=center_align, border=thin_border),
+        # 개요 값 (병합 셀 첫 칸) / 병합 셀 나머지 칸 (테두리만)
+        NamedStyle("risk_value", font=DEFAULT_FONT, alignment=left_align, border=thin_border),
+        NamedStyle("risk_border", font=DEFAULT_FONT, border=thin_border),
+        # 데이터 셀 (대책만 왼쪽 정렬, 줄바꿈 허용)
+        NamedStyle("risk_cell", font=DEFAULT_FONT, alignment=center_align, border=thin_border),
+        NamedStyle("risk_cell_left", font=DEFAULT_FONT, alignment=left_align, border=thin_border),
+        # 결재 문구
+        NamedStyle("risk_center", font=DEFAULT_FONT, alignment=center_align, border=DEFAULT_BORDER),
+    ]
+
+
+class _SheetWriter:
+    """
+    행을 위에서부터 차례로 쓰는 도우미. 일반 모드와 write-only 모드에서 같은 호출로 같은 결과를 만든다.
+    row(): [(열 번호, 값, 스타일 이름 또는 None)]으로 한 행을 씀 (write-only는 행을 건너뛸 수 없으므로 빈 행도 직접 씀)
+    """
+
+    def __init__(self, ws, streaming):
+        self.ws = ws
+        self.streaming = streaming
+        self.current = 0
+        self._styles = {}
+
+    def _style_of(self, name):
+        """이름 있는 스타일을 셀 서식 배열로 한 번만 변환해 두고 복사해서 쓴다 (셀마다 이름 조회 생략)"""
+        if name not in self._styles:
+            probe = WriteOnlyCell(self.ws)
+            probe.style = name
+            self._styles[name] = probe._style
+        return copy(self._styles[name])
+
+    def row(self, cells=()):
+        self.current += 1
+        if self.streaming:
+            values = [None] * (max((c[0] for c in cells), default=0))
+            for col, value, style in cells:
+                cell = WriteOnlyCell(self.ws, value=value)
+                if style:
+                    cell._style = self._style_of(style)
+                values[col - 1] = cell
+            self.ws.append(values)
+            return
+        for col, value, style in cells:
+            cell = self.ws.cell(row=self.current, column=col, value=value)
+            if style:
+                cell._style = self._style_of(style)
+
+    def merge(self, first_col, last_col):
+        """현재 행의 열 범위 병합 (write-only도 병합 범위는 마지막에 기록됨)"""
+        self.ws.merged_cells.add(f"{get_column_letter(first_col)}{self.current}:"
+                                 f"{get_column_letter(last_col)}{self.current}")
+
+
+def _new_workbook(streaming):
+    wb = Workbook(write_only=streaming)
+    for style in _named_styles():
+        wb.add_named_style(style)
+    return wb
+
+
+def write_risk_sheet(ws, p_info, risk_data, streaming):
+    """위험성평가표 양식 한 장을 시트에 작성 (스타일이 등록된 통합 문서의 시트)"""
+    # 열 너비 (write-only는 행을 쓰기 전에 지정해야 함)
+    for i, width in enumerate(COL_WIDTHS):
+        ws.column_dimensions[get_column_letter(FIRST_COL + i)].width = width
+
+    out = _SheetWriter(ws, streaming)
+    merged_rest = [(col, None, "risk_border") for col in range(FIRST_COL + 2, LAST_COL + 1)]   # D~F열
+
+    # --- 1. 문서 제목 작성 (B2:F2 병합) ---
+    out.row()
+    out.row([(FIRST_COL, "공사 및 작업 안전보건 위험성평가서", "risk_title")])
+    out.merge(FIRST_COL, LAST_COL)
+    out.row()
+
+    # --- 2. 공사 개요 (표 상단): 레이블(B열) + 값(C~F열 병합, 병합 셀 전체 테두리) ---
+    for label, key in zip(OVERVIEW_LABELS, OVERVIEW_KEYS):
+        out.row([(FIRST_COL, label, "risk_header"), (FIRST_COL + 1, p_info[key], "risk_value"), *merged_rest])
+        out.merge(FIRST_COL + 1, LAST_COL)
+    out.row()
+
+    # --- 3. 위험성평가 표 헤더 작성 ---
+    out.row([(FIRST_COL + i, header, "risk_header") for i, header in enumerate(TABLE_HEADERS)])
+
+    # --- 4. AI 데이터 채우기 (대책만 왼쪽 정렬) ---
+    cell_styles = ["risk_cell_left" if key == "countermeasure" else "risk_cell" for key in ROW_KEYS]
+    for item in risk_data:
+        out.row([(FIRST_COL + i, item.get(key, ''), cell_styles[i]) for i, key in enumerate(ROW_KEYS)])
+
+    # --- 5. 결재란 만들기 (표 아래 두 줄 띄움) ---
+    out.row()
+    out.row()
+    out.row([(FIRST_COL, "위와 같이 위험성평가를 실시하고 안전조치를 이행하겠습니다.", "risk_center")])
+    out.merge(FIRST_COL, LAST_COL)
+    out.row()
+    out.row([(4, "작성자(시공사): (인)", None), (6, "확인자(감독자): (인)", None)])
+
+
+def generate_excel_from_scratch(p_info, risk_data, streaming=None):
+    """
+    빈 엑셀이 아니라, 코드로 스타일(테두리, 색상)을 직접 그려서
+    완성된 형태의 엑셀 파일을 생성하는 함수.
+    streaming: None이면 행 수(STREAMING_ROWS)로 자동 결정, True/False로 강제 가능 (결과 모양은 같음)
+    """
+    if streaming is None:
+        streaming = len(risk_data) > STREAMING_ROWS
+    wb = _new_workbook(streaming)
+    if streaming:
+        ws = wb.create_sheet("위험성평가서")
+    else:
+        ws = wb.active
+        ws.title = "위험성평가서"
+    write_risk_sheet(ws, p_info, risk_data, streaming)
+
+    # 파일 저장 (메모리)
+    output = io.BytesIO()
+    wb.save(output)
+    output.seek(0)
+    return output
+
+
+def write_combined_workbook(projects, output):
+    """
+    여러 공사의 위험성평가표를 시트별로 담은 통합 문서를 output(파일 객체)에 저장.
+    projects: (시트명, 공사 개요, 위험요인 행) 반복자 - write-only 모드로 한 시트씩 써 나가므로
+    한 번에 한 공사 분량만 메모리에 있으면 된다. 시트명은 엑셀 규칙(31자, 금지 문자, 중복)에 맞게 고친다.
+    """
+    wb = _new_workbook(True)
+    used = set()
+    for title, p_info, risk_data in projects:
+        title = _SHEET_NAME_RE.sub("_", str(title)).strip("'") or "공사"
+        base, n = title[:31], 2
+        title = base
+        while title.lower() in used:
+            suffix = f" ({n})"
+            title, n = base[:31 - len(suffix)] + suffix, n + 1
+        used.add(title.lower())
+        write_risk_sheet(wb.create_sheet(title), p_info, risk_data, True)
+    if not used:
+        wb.create_sheet("위험성평가서")
+    wb.save(output)
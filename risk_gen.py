@@ -0,0 +1,101 @@
+from pdf_chunks import map_chunks
+from json_parse import array_schema, object_schema
+
+# ==========================================
+# 2-1 / 2-2. 위험성평가 생성 로직 (직접 입력형 / 계획서 PDF 기반)
+# ==========================================
+
+RISK_MODEL_ID = "models/gemini-2.5-flash"
+
+RISK_GEN_CONFIG = {
+    "temperature": 0.2, # 위험성평가 생성은 약간의 창의성이 필요하므로 0.2로 설정
+    "top_p": 0.95,
+    "top_k": 40,
+    "max_output_tokens": 8000,
+}
+
+# 2-1. 공사 정보 직접 입력형 프롬프트 (hazard: 항목이 속한 위험요인, 위험요인 라이브러리 등록용)
+RISK_MANUAL_PROMPT = """
+[공사정보] {name} / {content} / 위험요인: {risks}
+위험요인별 5~7개 항목 도출하여 JSON 출력 (hazard에는 해당 항목이 속한 위험요인을 위 목록의 이름 그대로 기재):
+[ {{ "hazard": "...", "equipment": "...", "risk_factor": "...", "risk_level": "...", "countermeasure": "...", "manager": "..." }} ]
+"""
+
+# [프롬프트 가이드 수정] 키값을 엄격하게 지정
+RISK_PDF_PROMPT = """
+PDF를 분석하여 다음 두 가지를 JSON으로 추출하세요.
+반드시 아래 '키(Key)' 이름을 정확하게 지켜야 합니다.
+1. project_info: name, loc, period, content
+2. risk_data: equipment, risk_factor, risk_level, countermeasure, manager
+출력 형식: { "project_info": {"name": "...", "loc": "...", "period": "...", "content": "..."}, "risk_data": [...] }
+"""
+
+# 대용량 PDF 분할 분석용 구간 안내문 (RISK_PDF_PROMPT 뒤에 붙임, 구간별 결과는 로컬에서 병합)
+RISK_CHUNK_SUFFIX = """
+이 PDF는 계획서 전체 중 {start}~{end} 페이지 구간입니다.
+- 이 구간에 공사 개요가 없으면 project_info의 값은 빈 문자열("")로 두십시오.
+- risk_data는 이 구간에 나오는 작업/장비의 위험요인만 도출하십시오.
+"""
+
+RISK_CHUNK_CONFIG = {
+    "temperature": 0.2,
+    "top_p": 0.95,
+    "top_k": 40,
+    "max_output_tokens": 8000,
+    "response_mime_type": "application/json",
+}
+
+PROJECT_INFO_KEYS = ["name", "loc", "period", "content"]
+RISK_KEYS = ["equipment", "risk_factor", "risk_level", "countermeasure", "manager"]
+
+# 응답 검증 스키마 (2-1: 위험요인 행 배열 / 2-2: 공사 개요 + 위험요인 행)
+RISK_ROWS_SCHEMA = array_schema(required=["risk_factor"])
+RISK_PDF_SCHEMA = object_schema(project_info=None, risk_data=RISK_ROWS_SCHEMA)
+
+
+def finalize_project_info(p_info):
+    """
+    엑셀에 넣을 공사 개요. 'name' 키가 없거나 분석 실패 시 기본값 강제 할당
+    (.get() 메서드와 'or' 연산자로 빈 문자열 대응)
+    """
+    p_info = p_info or {}
+    return {
+        "name": p_info.get("name") or "분석된 공사명 없음",
+        "loc": p_info.get("loc") or "분석된 장소 없음",
+        "period": p_info.get("period") or "분석된 기간 없음",
+        "content": p_info.get("content") or "분석된 내용 없음"
+    }
+
+
+def merge_risk_chunks(chunk_results):
+    """
+    구간별 추출 결과 병합.
+    - project_info: 페이지 순서상 처음 나온 값 사용
+    - risk_data: 이어 붙이되 (장비, 위험요인)이 같은 중복 행은 제거
+    """
+    project_info = {key: "" for key in PROJECT_INFO_KEYS}
+    risk_data, seen = [], set()
+    for _, _, data in sorted(chunk_results, key=lambda r: r[0]):
+        if not isinstance(data, dict):
+            continue
+        for key, value in (data.get("project_info") or {}).items():
+            if key in project_info and value and not project_info[key]:
+                project_info[key] = value
+        for row in data.get("risk_data") or []:
+            if not isinstance(row, dict):
+                continue
+            dedupe_key = (str(row.get("equipment", "")).strip(), str(row.get("risk_factor", "")).strip())
+            if dedupe_key in seen:
+                continue
+            seen.add(dedupe_key)
+            risk_data.append({key: row.get(key, "") for key in RISK_KEYS})
+    return {"project_info": project_info, "risk_data": risk_data}
+
+
+def analyze_pdf_chunked(registry, pdf_bytes, model_id, chunk_pages):
+    """페이지 구간별 병렬 추출 후 병합. (full_data, 실패 구간 목록) 반환"""
+    build_prompt = lambda start, end: RISK_PDF_PROMPT + RISK_CHUNK_SUFFIX.format(start=start, end=end)
+    chunk_results, failures = map_chunks(registry, pdf_bytes, build_prompt, model_id,
+                                         pages_per_chunk=chunk_pages,
+                                         generation_config=RISK_CHUNK_CONFIG, schema=RISK_PDF_SCHEMA)
+    return merge_risk_chunks(chunk_results), failures
@@ -0,0 +1,212 @@
+import hashlib
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from keyword_index import normalize
+
+# ==========================================
+# 2-1. 검증된 위험요인 행 라이브러리 (문자 n-gram 유사도 검색)
+# ==========================================
+# 호텔 리모델링 작업은 반복이 많아, 선택한 위험요인(화기/전기/고소/...)별로 모델이 만드는 행 대부분이
+# 예전에 만든 행과 거의 같다. 사용자가 결과 화면에서 등록한 행을 SQLite에 보관하고,
+# 공사명 + 작업 내용과의 문자 n-gram(2~3글자) 유사도로 검색한다.
+#   - 위험요인마다 충분히 비슷한 행이 MIN_ITEMS개 이상 있으면 그 위험요인은 라이브러리로 바로 구성
+#   - 부족한 위험요인만 모델에 요청 (전부 채워지면 AI 호출 없음)
+# 검색 색인은 메모리에 두고, 조회 시 DB에 새로 추가된 행만 읽어 갱신한다.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+LIBRARY_DB_PATH = os.path.join(BASE_DIR, ".cache", "risk_library.sqlite3")
+NGRAM_SIZES = (2, 3)        # 공백 제거 후 2~3글자 조각 (한글 단어가 짧아 2글자 포함)
+MIN_SIMILARITY = 0.3        # 이보다 덜 비슷한 행은 재사용하지 않음 (코사인 유사도, 0~1)
+MIN_ITEMS = 5               # 위험요인별로 이만큼 찾으면 AI 생성 생략 (프롬프트의 5~7개 기준)
+ITEMS_PER_HAZARD = 6        # 라이브러리로 구성할 때 위험요인별 행 수
+
+ROW_KEYS = ["equipment", "risk_factor", "risk_level", "countermeasure", "manager"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS risk_items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    item_key TEXT UNIQUE NOT NULL,
+    hazard TEXT NOT NULL,
+    context TEXT,
+    equipment TEXT,
+    risk_factor TEXT NOT NULL,
+    risk_level TEXT,
+    countermeasure TEXT,
+    manager TEXT,
+    source TEXT,
+    uses INTEGER DEFAULT 0,
+    created REAL
+);
+CREATE INDEX IF NOT EXISTS risk_items_hazard ON risk_items (hazard);
+"""
+
+
+def ngrams(text):
+    norm, _ = normalize(text or "")
+    return {norm[i:i + n] for n in NGRAM_SIZES for i in range(len(norm) - n + 1)}
+
+
+def item_key(hazard, row):
+    """같은 위험요인 분류 + 위험요인 + 대책이면 같은 행 (공백/대소문자 무시)"""
+    parts = [hazard, row.get("risk_factor", ""), row.get("countermeasure", "")]
+    return hashlib.sha1("\x00".join(normalize(str(p))[0] for p in parts).encode("utf-8")).hexdigest()
+
+
+def project_query(p_info):
+    return f"{p_info.get('name', '')} {p_info.get('content', '')}"
+
+
+class RiskLibrary:
+    def __init__(self, db_path=LIBRARY_DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._items = {}        # id -> {"hazard", "row", "size"}
+        self._postings = {}     # 위험요인 분류 -> {n-gram -> [id]}
+        self._last_id = 0
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with self._db() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _db(self):
+        """자동 커밋 연결 (스레드마다 새로 열고 닫음)"""
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    # ------------------------------------------------------------------
+    # 등록
+    # ------------------------------------------------------------------
+    def add(self, rows, context="", source=""):
+        """
+        검증된 행 등록. rows: hazard(위험요인 분류)가 붙은 행 목록 (분류가 없는 행은 건너뜀)
+        context: 그 행을 만든 공사의 공사명 + 작업 내용 (검색 대상). 반환: 새로 추가된 행 수
+        """
+        now = time.time()
+        records = [(item_key(row["hazard"], row), row["hazard"], context,
+                    *(str(row.get(key, "") or "") for key in ROW_KEYS), source, now)
+                   for row in rows if row.get("hazard") and row.get("risk_factor")]
+        with self._db() as conn:
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO risk_items (item_key, hazard, context, equipment, risk_factor, "
+                             "risk_level, countermeasure, manager, source, created) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                             records)
+            return conn.total_changes - before
+
+    def remove(self, item_ids):
+        with self._db() as conn:
+            conn.executemany("DELETE FROM risk_items WHERE id = ?", [(i,) for i in item_ids])
+        with self._lock:
+            for item_id in item_ids:
+                item = self._items.pop(item_id, None)
+                if item is not None:
+                    postings = self._postings.get(item["hazard"], {})
+                    for gram in item["grams"]:
+                        ids = postings.get(gram)
+                        if ids and item_id in ids:
+                            ids.remove(item_id)
+
+    # ------------------------------------------------------------------
+    # 검색 색인 (메모리, 새로 추가된 행만 반영)
+    # ------------------------------------------------------------------
+    def _refresh(self):
+        with self._db() as conn:
+            rows = conn.execute("SELECT * FROM risk_items WHERE id > ? ORDER BY id", (self._last_id,)).fetchall()
+        for r in rows:
+            grams = ngrams(f"{r['context']} {r['equipment']} {r['risk_factor']}")
+            self._items[r["id"]] = {"hazard": r["hazard"], "grams": grams, "size": len(grams), "uses": r["uses"],
+                                    "row": {key: r[key] for key in ROW_KEYS}}
+            postings = self._postings.setdefault(r["hazard"], {})
+            for gram in grams:
+                postings.setdefault(gram, []).append(r["id"])
+            self._last_id = r["id"]
+
+    def search(self, query, hazard, limit=ITEMS_PER_HAZARD, min_similarity=MIN_SIMILARITY):
+        """
+        위험요인 분류 안에서 query와 비슷한 행을 찾는다 (같은 위험요인/대책 중복 제외).
+        반환: [(유사도, id, 행)] 유사도 내림차순
+        """
+        query_grams = ngrams(query)
+        if not query_grams:
+            return []
+        with self._lock:
+            self._refresh()
+            postings = self._postings.get(hazard, {})
+            shared = Counter()
+            for gram in query_grams:
+                shared.update(postings.get(gram, ()))
+            scored = []
+            for item_id, count in shared.items():
+                item = self._items[item_id]
+                score = count / math.sqrt(len(query_grams) * item["size"])
+                if score >= min_similarity:
+                    scored.append((score, item["uses"], item_id, item["row"]))
+        scored.sort(key=lambda s: (s[0], s[1]), reverse=True)
+
+        results, seen = [], set()
+        for score, _, item_id, row in scored:
+            factor = normalize(row["risk_factor"])[0]
+            if factor in seen:
+                continue
+            seen.add(factor)
+            results.append((round(score, 3), item_id, row))
+            if len(results) >= limit:
+                break
+        return results
+
+    def lookup(self, p_info, hazards):
+        """
+        2-1 입력으로 위험요인별 라이브러리 행 구성.
+        반환: (재사용 행 목록 [hazard/library_id 포함], 라이브러리로 채운 위험요인, 모델이 생성해야 할 위험요인)
+        """
+        query = project_query(p_info)
+        rows, covered, gaps, used = [], [], [], []
+        for hazard in hazards:
+            hits = self.search(query, hazard)
+            if len(hits) < MIN_ITEMS:
+                gaps.append(hazard)
+                continue
+            covered.append(hazard)
+            for _, item_id, row in hits:
+                rows.append({**row, "hazard": hazard, "library_id": item_id})
+                used.append(item_id)
+        if used:
+            self._mark_used(used)
+        return rows, covered, gaps
+
+    def _mark_used(self, item_ids):
+        with self._db() as conn:
+            conn.executemany("UPDATE risk_items SET uses = uses + 1 WHERE id = ?", [(i,) for i in item_ids])
+        with self._lock:
+            for item_id in item_ids:
+                if item_id in self._items:
+                    self._items[item_id]["uses"] += 1
+
+    def stats(self):
+        with self._db() as conn:
+            rows = conn.execute("SELECT hazard, COUNT(*) AS n FROM risk_items GROUP BY hazard").fetchall()
+        return {r["hazard"]: r["n"] for r in rows}
+
+
+# 프로세스 전역 라이브러리 (모든 세션/작업 스레드 공유)
+_library = None
+_library_lock = threading.Lock()
+
+
+def get_risk_library():
+    global _library
+    if _library is None:
+        with _library_lock:
+            if _library is None:
+                _library = RiskLibrary()
+    return _library
@@ -0,0 +1,173 @@
+import re
+
+from risk_gen import RISK_KEYS
+
+# ==========================================
+# 1-2. 위험성평가표 로컬 사전 점검 (LLM 검토 전)
+# ==========================================
+# 대책 누락, 위험성 미기재, 담당자 미지정, 공종만 바꿔 복사한 행처럼 기계적으로 확인할 수 있는 결함은
+# 표를 2-1/2-2 생성 양식과 같은 필드(equipment / risk_factor / risk_level / countermeasure / manager)로
+# 맞춘 뒤 pandas 벡터 연산으로 한 번에 집계한다. 결과는 "확인된 사실"로 프롬프트에 넣어
+# 모델이 행을 일일이 세지 않고 내용의 적정성 판단에 집중하게 한다.
+
+# 필드별 머리글 별칭 (공백 제거/소문자 비교, 앞쪽 별칭 우선)
+COLUMN_ALIASES = {
+    "equipment": ["장비", "구분", "세부작업", "작업내용", "단위작업", "작업", "공종", "공정"],
+    "risk_factor": ["위험요인", "유해위험요인", "위험요소", "유해요인", "what"],
+    "risk_level": ["위험성등급", "위험등급", "위험도", "위험성크기", "위험수준", "위험성/등급", "등급"],
+    "countermeasure": ["감소대책", "개선대책", "안전대책", "대책", "how", "조치"],
+    "manager": ["담당자", "관리자", "책임자", "조치자", "담당"],
+}
+# 머리글 전체가 일치할 때만 쓰는 별칭 (부분 일치로 찾으면 "위험성 감소대책" 같은 열을 잘못 잡음, 부분 일치 별칭 다음 순서)
+EXACT_ALIASES = {
+    "risk_level": ["위험성"],
+}
+# 위험성 필드로 잡지 않을 머리글 (빈도/강도 등 구성 요소, 개선 후 위험성)
+LEVEL_EXCLUDES = ["빈도", "강도", "가능성", "중대성", "개선후", "감소후", "조치후"]
+FREQUENCY_ALIASES = ["빈도", "가능성"]
+SEVERITY_ALIASES = ["강도", "중대성"]
+
+SHORT_COUNTERMEASURE = 8    # 이보다 짧은 대책은 형식적 기재로 본다 (글자 수, 공백 제외)
+MAX_EXAMPLES = 5            # 점검 항목별로 보여줄 예시 행 수
+
+CHECK_LABELS = {
+    "missing_countermeasure": "감소대책 미기재",
+    "short_countermeasure": f"감소대책이 {SHORT_COUNTERMEASURE}자 미만 (형식적 기재 의심)",
+    "missing_level": "위험성(등급) 미기재",
+    "missing_manager": "담당자 미지정",
+    "copied_rows": "공종/장비만 다르고 위험요인·대책이 같은 행 (복사 의심)",
+}
+
+# 점검 항목별로 필요한 필드. 시트에 해당 열이 없으면 그 시트의 행은 점검하지 않고 "열 없음"으로 따로 보고한다
+# (열이 없다고 모든 행을 미기재로 세면 모델에게 사실처럼 전달된다)
+CHECK_COLUMNS = {
+    "missing_countermeasure": "countermeasure",
+    "short_countermeasure": "countermeasure",
+    "missing_level": "risk_level",
+    "missing_manager": "manager",
+    "copied_rows": "countermeasure",
+}
+COLUMN_LABELS = {"risk_level": "위험성(등급)", "countermeasure": "감소대책", "manager": "담당자"}
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def _norm(text):
+    return _SPACE_RE.sub("", text).lower()
+
+
+def _find_column(header, aliases, excludes=(), exact=()):
+    """별칭 순서대로 머리글에서 찾은 첫 열 번호, 없으면 exact 별칭과 머리글 전체가 같은 열 (없으면 None)"""
+    normalized = [_norm(h) for h in header]
+    for alias in aliases:
+        for i, h in enumerate(normalized):
+            if alias in h and not any(ex in h for ex in excludes):
+                return i
+    for alias in exact:
+        if alias in normalized:
+            return normalized.index(alias)
+    return None
+
+
+def map_sheet(sheet):
+    """
+    excel_text.compact_sheet 결과를 점검용 행으로 변환. 위험요인 열이 없는 시트(표지/결재란 등)는 None.
+    반환: {"name", "level_computed", "missing": [열을 찾지 못한 점검 필드],
+           "rows": [(데이터 행 번호, equipment, risk_factor, risk_level, countermeasure, manager)]}
+    위험성 열이 없고 빈도/강도 열이 있으면 둘의 곱을 위험성으로 사용한다.
+    """
+    header = sheet["header"]
+    columns = {key: _find_column(header, COLUMN_ALIASES[key], LEVEL_EXCLUDES if key == "risk_level" else (),
+                                 EXACT_ALIASES.get(key, ()))
+               for key in RISK_KEYS}
+    if columns["risk_factor"] is None:
+        return None
+    frequency = _find_column(header, FREQUENCY_ALIASES)
+    severity = _find_column(header, SEVERITY_ALIASES)
+    computed = columns["risk_level"] is None and frequency is not None and severity is not None
+    missing = [key for key in COLUMN_LABELS if columns[key] is None and not (key == "risk_level" and computed)]
+
+    def value(row, i):
+        return row[i] if i is not None and i < len(row) else ""
+
+    rows = []
+    for n, row in enumerate(sheet["rows"], 1):
+        level = value(row, columns["risk_level"])
+        if computed:
+            f, s = value(row, frequency), value(row, severity)
+            level = f"{f}x{s}" if f and s else ""
+        rows.append((n, *(level if key == "risk_level" else value(row, columns[key]) for key in RISK_KEYS)))
+    return {"name": sheet["name"], "level_computed": computed, "missing": missing, "rows": rows}
+
+
+def lint(mapped_sheets):
+    """
+    점검 실행 (pandas 벡터 연산). mapped_sheets: map_sheet 결과 목록 (None 제외)
+    반환: {"rows": 점검 행 수, "sheets": 시트 수, "findings": [{"check", "label", "count", "examples"}],
+           "missing_columns": [{"column", "label", "sheets": [시트 이름]}]}
+    결함이 없는 점검 항목은 findings에 넣지 않는다. 열이 없는 시트의 행은 그 열이 필요한 점검에서 뺀다.
+    """
+    import pandas as pd # 엑셀 검토 시에만 로드
+    sheets = [m for m in mapped_sheets if m["rows"]]
+    frames = [pd.DataFrame(m["rows"], columns=["row", *RISK_KEYS])
+              .assign(sheet=m["name"], **{f"has_{key}": key not in m["missing"] for key in COLUMN_LABELS})
+              for m in sheets]
+    if not frames:
+        return {"rows": 0, "sheets": 0, "findings": [], "missing_columns": []}
+    missing_columns = [{"column": key, "label": label, "sheets": names}
+                       for key, label in COLUMN_LABELS.items()
+                       for names in [[m["name"] for m in sheets if key in m["missing"]]] if names]
+    df = pd.concat(frames, ignore_index=True)
+    # 위험요인이 빈 행은 병합 셀의 이어지는 행이거나 소제목이므로 점검 대상에서 뺀다
+    df = df[df["risk_factor"].str.strip() != ""]
+
+    measure_len = df["countermeasure"].str.replace(r"\s+", "", regex=True).str.len()
+    masks = {
+        "missing_countermeasure": measure_len == 0,
+        "short_countermeasure": (measure_len > 0) & (measure_len < SHORT_COUNTERMEASURE),
+        "missing_level": df["risk_level"].str.strip() == "",
+        "missing_manager": df["manager"].str.strip() == "",
+    }
+
+    # 위험요인+대책이 같은데 공종/장비가 2종 이상인 묶음: 첫 행을 뺀 나머지를 복사 의심으로 본다
+    key = (df["risk_factor"].str.replace(r"\s+", "", regex=True) + "|"
+           + df["countermeasure"].str.replace(r"\s+", "", regex=True))
+    equipment_kinds = df["equipment"].where(df["equipment"].str.strip() != "").groupby(key).transform("nunique")
+    masks["copied_rows"] = (equipment_kinds >= 2) & key.duplicated() & (measure_len > 0)
+
+    findings = []
+    for check, mask in masks.items():
+        hits = df[mask & df[f"has_{CHECK_COLUMNS[check]}"]]
+        if hits.empty:
+            continue
+        examples = [f"{r.sheet} {r.row}번째 행: {r.risk_factor[:40]}" for r in hits.head(MAX_EXAMPLES).itertuples()]
+        findings.append({"check": check, "label": CHECK_LABELS[check], "count": len(hits), "examples": examples})
+    return {"rows": len(df), "sheets": df["sheet"].nunique(), "findings": findings, "missing_columns": missing_columns}
+
+
+def findings_text(result):
+    """프롬프트에 넣을 사전 점검 결과 (점검 대상이 없으면 빈 문자열)"""
+    if not result["rows"]:
+        return ""
+    lines = [f"\n[사전 자동 점검 결과 - 로컬에서 표 전체({result['sheets']}개 시트, {result['rows']:,}행)를 집계한 확인된 사실]"]
+    missing_columns = result.get("missing_columns", [])
+    for column in missing_columns:
+        lines.append(f"- {column['label']} 열 없음 ({', '.join(column['sheets'])}): 해당 시트는 행별 {column['label']} 점검 생략")
+    if not result["findings"]:
+        lines.append("- 그 밖의 점검 항목: 결함 발견되지 않음" if missing_columns
+                     else "- 대책 누락/위험성 미기재/담당자 미지정/복사 행: 발견되지 않음")
+    for finding in result["findings"]:
+        lines.append(f"- {finding['label']}: {finding['count']:,}행 (예: {'; '.join(finding['examples'][:3])})")
+    lines.append("위 수치는 다시 세지 말고 그대로 근거로 사용하며, 표 데이터는 내용의 구체성과 적정성 판단에 활용하세요.")
+    return "\n".join(lines) + "\n"
+
+
+def describe(result):
+    """화면 표시용 요약"""
+    if not result["rows"]:
+        return "🔎 사전 점검: 위험요인 열을 찾지 못해 생략했습니다."
+    notes = [f"{c['label']} 열 없음" for c in result.get("missing_columns", [])]
+    notes += [f"{f['label']} {f['count']:,}" for f in result["findings"]]
+    if not notes:
+        return f"🔎 사전 점검 {result['rows']:,}행: 기계적 결함 없음"
+    return f"🔎 사전 점검 {result['rows']:,}행: " + ", ".join(notes)
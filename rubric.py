@@ -0,0 +1,170 @@
+import bisect
+import re
+
+from guide_data import MASTER_GUIDE_TEXT
+from keyword_index import KeywordIndex
+
+# ==========================================
+# 17개 항목 평가표 구조화 + 로컬 키워드 사전 채점
+# ==========================================
+# MASTER_GUIDE_TEXT를 (5개 분야 / 17개 항목 / 우수·보통·미흡 기준과 배점) 구조로 파싱하고,
+# 추출된 문서 텍스트를 키워드 인덱스로 1회 스캔하여 판단이 명확한 항목은 로컬에서 채점한다.
+# 나머지는 LLM으로 넘긴다. 채점 원칙은 1-1 프롬프트의 절대 규칙을 그대로 따른다.
+#   - 관련 문구가 전혀 없으면 0점 (증거 우선주의) -> 로컬 채점
+#   - 관련 문구가 있으면 점수는 LLM이 판단 (키워드만으로는 공종 일치성/하향 평가 원칙을 확인할 수 없으므로
+#     로컬에서 보통·우수 점수를 주지 않는다)
+
+_SECTION_RE = re.compile(r"^\((\d+)\)\s*(.+)$")
+_ITEM_RE = re.compile(r"^(\d+)\.\s*(.+?)\s*\[(.+?)점\]\s*$")
+_CRITERION_RE = re.compile(r"^(우수|보통|미흡|발\s*생|미\s*발\s*생)\s*:\s*(.*?)\s*\[(-?\d+)\]\s*$")
+
+
+def parse_rubric(text=MASTER_GUIDE_TEXT):
+    """가이드라인 텍스트 -> [{"no", "title", "items": [{"item_no", "category", "max_score", "criteria"}]}]"""
+    sections = []
+    item = None
+    for raw_line in text.splitlines():
+        line = raw_line.strip()
+        if not line:
+            continue
+        m = _SECTION_RE.match(line)
+        if m:
+            sections.append({"no": int(m.group(1)), "title": m.group(2).strip(), "items": []})
+            item = None
+            continue
+        m = _ITEM_RE.match(line)
+        if m and sections:
+            # "[5점]" / "[0 or -40점]" -> 만점은 기준 중 최고 점수로 계산
+            item = {"item_no": int(m.group(1)), "category": m.group(2).strip(), "max_score": None, "criteria": {}}
+            sections[-1]["items"].append(item)
+            continue
+        m = _CRITERION_RE.match(line)
+        if m and item is not None:
+            grade = re.sub(r"\s+", "", m.group(1))
+            item["criteria"][grade] = {"text": m.group(2).strip(" -"), "score": int(m.group(3))}
+
+    for section in sections:
+        for it in section["items"]:
+            scores = [c["score"] for c in it["criteria"].values()]
+            it["max_score"] = max(scores) if scores else 0
+    return sections
+
+
+def rubric_items(sections=None):
+    """항목 번호 -> 항목 dict"""
+    sections = sections or RUBRIC
+    return {it["item_no"]: it for section in sections for it in section["items"]}
+
+
+RUBRIC = parse_rubric()
+
+# 항목별 고유 문구. 하나도 문서에 나타나지 않으면 로컬에서 0점 판정 (하나라도 있으면 LLM 판단).
+# "기계/점검/책임"처럼 거의 모든 계획서에 나오는 일반어는 넣지 않는다 (그러면 어떤 항목도 로컬에서 정해지지 않음).
+# 공백/대소문자는 무시하고 비교한다. 항목을 다룬 계획서라면 빠지기 어려운 문구만 둔다.
+ITEM_KEYWORDS = {
+    1: ["본사"],
+    2: ["협의체", "순회점검", "합동점검", "합동안전점검", "합동안전보건점검", "성과지표", "KPI"],
+    3: ["기계기구", "기계·기구", "기계ㆍ기구", "설비점검", "장비점검", "설비관리", "장비관리", "정비"],
+    4: ["자격증", "자격현황", "자격보유", "경력", "면허", "투입인원", "작업자현황"],
+    5: ["경영방침", "안전보건방침"],
+    6: ["이행계획", "추진계획", "추진일정", "재해예방계획", "재해예방활동"],
+    7: ["조직도", "안전보건조직", "조직구성", "업무분장", "역할분담"],
+    8: ["위험성평가", "유해위험요인", "유해·위험요인", "아차사고"],
+    9: ["안전점검", "점검표", "체크리스트", "보호구"],
+    10: ["이행확인", "이행여부", "조치완료", "완료확인", "시정조치", "개선조치", "작업중지"],
+    11: ["안전보건교육", "안전교육", "교육계획", "교육일지"],
+    12: ["작업허가", "허가서"],
+    13: ["신호수", "신호체계", "신호방법", "수신호", "연락체계", "비상연락", "연락망", "무전"],
+    14: ["MSDS", "물질안전보건자료", "방호장치", "방호조치"],
+    15: ["비상대응", "비상조치", "비상사태", "대피", "비상훈련"],
+    16: ["재해율", "무재해", "재해발생현황", "재해현황"],
+}
+
+# 17번(중대재해): 발생 문구가 보이면 LLM 판단, 없으면 '확인 불가' 0점
+SERIOUS_ACCIDENT_ITEM = 17
+SERIOUS_ACCIDENT_KEYWORDS = ["중대재해발생", "사망사고", "사망재해", "중대재해 1건", "중대산업재해 발생"]
+
+SNIPPET_CHARS = 40
+
+
+def keyword_signature():
+    """캐시 키용 (키워드 표가 바뀌면 로컬 채점 결과도 무효)"""
+    return repr(sorted(ITEM_KEYWORDS.items())) + repr(SERIOUS_ACCIDENT_KEYWORDS) + "[zero-only:phrases]"
+
+
+def _build_index():
+    keywords = {kw for phrases in ITEM_KEYWORDS.values() for kw in phrases}
+    keywords.update(SERIOUS_ACCIDENT_KEYWORDS)
+    return KeywordIndex(sorted(keywords))
+
+
+_INDEX = _build_index()
+_KEYWORD_ITEMS = {}
+for _item_no, _phrases in ITEM_KEYWORDS.items():
+    for _kw in _phrases:
+        _KEYWORD_ITEMS.setdefault(_kw, []).append(_item_no)
+
+
+def _evidence(text, line_starts, start, end):
+    """매칭 위치 주변 문장 + 페이지 태그 ("p.12: ...")"""
+    line_no = bisect.bisect_right(line_starts, start) - 1
+    line_start = line_starts[line_no]
+    line_end = text.find("\n", line_start)
+    line_end = len(text) if line_end < 0 else line_end
+    m = re.match(r"p\.(\d+):\s*", text[line_start:line_end])
+    body_start = line_start + (m.end() if m else 0)
+    snippet = text[max(body_start, start - SNIPPET_CHARS):min(line_end, end + SNIPPET_CHARS)].strip()
+    return f"p.{m.group(1)}: {snippet}" if m else snippet
+
+
+def prescore(doc_text, text_complete=True, sections=None):
+    """
+    문서 텍스트를 1회 스캔하여 관련 문구가 전혀 없는 항목을 로컬에서 0점 처리.
+    text_complete=False(스캔 페이지가 따로 업로드된 경우)면 '문구 없음 -> 0점'은 판단하지 않는다.
+    반환: (로컬 채점 결과 목록, LLM이 판단할 항목 번호 목록)
+    """
+    items = rubric_items(sections)
+    line_starts = [0] + [m.end() for m in re.finditer("\n", doc_text)]
+
+    found_items = set()     # 관련 문구가 하나라도 나온 항목
+    accident_evidence = None
+    for keyword, start, end in _INDEX.scan(doc_text):
+        if keyword in SERIOUS_ACCIDENT_KEYWORDS and accident_evidence is None:
+            accident_evidence = _evidence(doc_text, line_starts, start, end)
+        found_items.update(_KEYWORD_ITEMS.get(keyword, []))
+
+    local, ambiguous = [], []
+    for item_no, item in sorted(items.items()):
+        result = {"item_no": item_no, "category": item["category"], "max_score": item["max_score"], "source": "local"}
+
+        if item_no == SERIOUS_ACCIDENT_ITEM:
+            if accident_evidence is None and text_complete:
+                local.append({**result, "score": 0, "judgment": "미발생(확인 불가)",
+                              "evidence": "문서 내 중대재해 발생 기록 없음 (규칙 4: 명확한 증빙 없으면 0점)"})
+            else:
+                ambiguous.append(item_no)
+            continue
+
+        if item_no in ITEM_KEYWORDS and item_no not in found_items and text_complete:
+            local.append({**result, "score": 0, "judgment": "미흡(근거 없음)",
+                          "evidence": "문서 내 관련 문구 없음 (규칙 1: 명시된 문구가 없으면 0점)"})
+        else:
+            ambiguous.append(item_no)
+    return local, ambiguous
+
+
+def keyword_pages(doc_text):
+    """항목 번호 -> 관련 키워드가 나온 페이지 번호 집합 (수정본 부분 재평가 시 다시 볼 항목 판단용)"""
+    line_starts = [0] + [m.end() for m in re.finditer("\n", doc_text)]
+    line_pages = [int(m.group(1)) if m else None
+                  for m in (re.match(r"p\.(\d+):", doc_text[s:s + 12]) for s in line_starts)]
+    pages = {}
+    for keyword, start, _end in _INDEX.scan(doc_text):
+        page = line_pages[bisect.bisect_right(line_starts, start) - 1]
+        if page is None:
+            continue
+        if keyword in SERIOUS_ACCIDENT_KEYWORDS:
+            pages.setdefault(SERIOUS_ACCIDENT_ITEM, set()).add(page)
+        for item_no in _KEYWORD_ITEMS.get(keyword, []):
+            pages.setdefault(item_no, set()).add(page)
+    return pages
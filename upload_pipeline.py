@@ -0,0 +1,149 @@
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+
+from metrics import current_run, record_stage
+from model_clients import load_genai
+
+# ==========================================
+# 비동기 업로드 / 처리 대기 파이프라인
+# ==========================================
+# - 업로드와 PROCESSING 대기는 백그라운드 스레드에서 수행하고,
+#   Streamlit 스크립트 스레드는 그동안 프롬프트 작성 등 로컬 작업을 진행한다.
+# - 상태 조회는 1초 고정 간격 대신 지수 백오프(0.2초 -> 최대 3초)로 수행한다.
+# - 업로드 / 처리 대기 / 생성 단계별 소요 시간을 기록한다. (실행 계측 run에도 함께 기록)
+
+POLL_INITIAL = 0.2      # 첫 상태 조회 간격 (초)
+POLL_FACTOR = 1.7       # 조회 간격 증가 배수
+POLL_MAX = 3.0          # 최대 조회 간격 (초)
+PROCESSING_DEADLINE = 300   # 업로드 + 처리 대기 최대 허용 시간 (초)
+
+STAGE_LABELS = {
+    "text_extraction": "텍스트 추출",
+    "staging": "업로드 준비",
+    "local_prescore": "로컬 사전 채점",
+    "revision_diff": "수정본 비교",
+    "upload": "업로드",
+    "processing": "처리 대기",
+    "rate_limit": "호출 대기",
+    "chunk_analysis": "구간 분할 분석",
+    "generation": "AI 분석",
+    "parsing": "응답 파싱",
+    "excel_read": "엑셀 읽기",
+    "lint": "사전 점검",
+    "library": "라이브러리 검색",
+    "excel_build": "엑셀 생성",
+}
+
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="gemini-upload")
+
+
+class StageTimer:
+    """단계별 소요 시간 누적 기록 (생성 시점의 계측 run에도 기록, 다른 스레드에서 add해도 같은 run)"""
+
+    def __init__(self):
+        self.timings = {}
+        self.run = current_run()
+
+    def add(self, name, seconds):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+        record_stage(name, seconds, self.run)
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def summary(self):
+        return " / ".join(f"{STAGE_LABELS.get(k, k)} {v:.1f}초" for k, v in self.timings.items())
+
+
+def wait_until_active(handle, deadline=None, on_status=None,
+                      initial=POLL_INITIAL, factor=POLL_FACTOR, max_interval=POLL_MAX):
+    """
+    PROCESSING 상태가 끝날 때까지 지수 백오프로 조회.
+    deadline(time.monotonic 기준)을 넘기면 TimeoutError 발생.
+    """
+    interval = initial
+    while handle.state.name == "PROCESSING":
+        if deadline is not None and time.monotonic() + interval > deadline:
+            raise TimeoutError("파일 처리 대기 시간이 초과되었습니다.")
+        if on_status: on_status("처리 대기")
+        time.sleep(interval)
+        interval = min(interval * factor, max_interval)
+        handle = load_genai().get_file(handle.name)
+    return handle
+
+
+class UploadJob:
+    """
+    레지스트리 업로드를 백그라운드에서 시작하고, 결과를 기다리는 동안
+    호출 스레드(Streamlit)에서 진행 상황 콜백을 실행한다.
+    with 블록을 벗어나면 레지스트리 참조를 반드시 해제한다.
+    """
+
+    def __init__(self, registry, data, mime_type="application/pdf", timeout=PROCESSING_DEADLINE, timer=None):
+        self.registry = registry
+        self.timer = timer or StageTimer()
+        self.status = "업로드 준비"
+        self.started = time.monotonic()
+        self.file_hash = None
+        self._closed = False
+        # 업로드 스레드에서도 같은 계측 run에 기록되도록 컨텍스트 전달
+        self.future = _executor.submit(
+            contextvars.copy_context().run, registry.acquire, data, mime_type,
+            timer=self.timer, on_status=self._set_status,
+            deadline=self.started + timeout,
+        )
+
+    def _set_status(self, status):
+        self.status = status
+
+    def wait(self, on_progress=None, poll=0.2):
+        """업로드 완료까지 대기하며 on_progress(상태, 경과초)를 주기적으로 호출"""
+        while True:
+            try:
+                self.file_hash, handle = self.future.result(timeout=poll)
+                return handle
+            except FutureTimeout:
+                if on_progress: on_progress(self.status, time.monotonic() - self.started)
+
+    def report_error(self, exc):
+        if self.file_hash is not None:
+            self.registry.report_error(self.file_hash, exc)
+
+    def close(self):
+        # 결과를 받지 않고 끝난 경우에도 업로드가 끝나는 시점에 참조 해제
+        if self._closed:
+            return
+        self._closed = True
+
+        def _release(future):
+            if future.exception() is None:
+                self.registry.release(future.result()[0])
+        self.future.add_done_callback(_release)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None: self.report_error(exc)
+        self.close()
+        return False
+
+
+def start_upload(registry, data, mime_type="application/pdf", timeout=PROCESSING_DEADLINE, timer=None):
+    return UploadJob(registry, data, mime_type, timeout=timeout, timer=timer)
+
+
+def upload_status_text(status, elapsed):
+    return f"⏳ {status}... ({elapsed:.0f}초 경과)"
+
+
+def progress_writer(placeholder):
+    """st.empty() 자리에 업로드 진행 상황을 표시하는 콜백 생성"""
+    return lambda status, elapsed: placeholder.caption(upload_status_text(status, elapsed))
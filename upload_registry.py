@@ -0,0 +1,210 @@
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+
+from model_clients import load_genai
+from upload_pipeline import StageTimer, wait_until_active
+from upload_staging import get_staging
+
+# ==========================================
+# Gemini 업로드 파일 공유 레지스트리
+# ==========================================
+# 같은 PDF가 1-1(채점) -> 2-2(위험성평가 생성) 순으로 들어와도 한 번만 업로드한다.
+# - 키: 파일 바이트의 SHA-256
+# - 원격 파일 핸들은 TTL(Gemini 보관기간 48시간보다 약간 짧게) 동안 재사용
+# - 탭/세션 간 참조 카운트를 관리하고, 아무도 쓰지 않는 만료 핸들은 백그라운드에서 삭제
+# - 재업로드/무효화로 교체된 이전 핸들은 빌려 간 쪽이 아직 생성 중일 수 있으므로 참조가 0이 될 때 삭제
+
+FILE_TTL = 47 * 60 * 60        # 원격 파일 재사용 기한 (Gemini 파일 보관기간 48시간)
+IDLE_TTL = 2 * 60 * 60         # 참조가 없는 상태로 이 시간이 지나면 원격 파일 삭제
+SWEEP_INTERVAL = 60            # 백그라운드 정리 주기 (초)
+
+
+def _is_stale_handle_error(exc):
+    """원격 파일이 삭제/만료되었음을 뜻하는 오류인지 (이 경우에만 핸들을 버리고 재업로드)"""
+    from google.api_core import exceptions as api_exceptions
+    return isinstance(exc, (api_exceptions.NotFound, api_exceptions.PermissionDenied, api_exceptions.FailedPrecondition))
+
+
+class _Entry:
+    def __init__(self, file_hash):
+        self.file_hash = file_hash
+        self.handle = None
+        self.expires_at = 0.0
+        self.refcount = 0
+        self.retired = []              # 교체됐지만 아직 빌려 간 쪽이 있을 수 있는 이전 핸들 (참조 0이 되면 삭제)
+        self.last_used = time.time()
+        self.lock = threading.Lock()   # 같은 파일의 동시 업로드 방지
+
+    def is_live(self, now):
+        return self.handle is not None and now < self.expires_at
+
+
+class UploadRegistry:
+    def __init__(self, ttl=FILE_TTL, idle_ttl=IDLE_TTL, sweep_interval=SWEEP_INTERVAL):
+        self.ttl = ttl
+        self.idle_ttl = idle_ttl
+        self.sweep_interval = sweep_interval
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._sweeper = None
+
+    # ------------------------------------------
+    # 업로드 / 대기
+    # ------------------------------------------
+    def _upload(self, data, mime_type, file_hash, timer, on_status, deadline):
+        suffix = ".pdf" if mime_type == "application/pdf" else ""
+        # 요청별 스테이징 (메모리 바이트를 그대로 스트리밍하거나 고유 임시 파일 사용, 총 용량 상한)
+        with get_staging().stage(data, suffix=suffix, deadline=deadline) as source:
+            if on_status: on_status("업로드 중")
+            with timer.stage("upload"):
+                uploaded = load_genai().upload_file(source, mime_type=mime_type,
+                                                    display_name=f"upload_{file_hash[:12]}{suffix}")
+
+        with timer.stage("processing"):
+            try:
+                uploaded = wait_until_active(uploaded, deadline=deadline, on_status=on_status)
+            except TimeoutError:
+                self._delete_remote(uploaded)
+                raise
+        if uploaded.state.name != "ACTIVE":
+            self._delete_remote(uploaded)
+            raise RuntimeError(f"파일 처리 실패 (상태: {uploaded.state.name})")
+        return uploaded
+
+    def _delete_remote(self, handle):
+        try:
+            load_genai().delete_file(handle.name)
+        except Exception:
+            pass
+
+    # ------------------------------------------
+    # 참조 관리
+    # ------------------------------------------
+    def acquire(self, data, mime_type="application/pdf", timer=None, on_status=None, deadline=None):
+        """
+        파일 핸들을 빌려온다 (없거나 만료됐으면 업로드). 사용 후 release() 필수.
+        timer(StageTimer)에 업로드/처리 대기 시간을 기록하고, deadline(time.monotonic 기준)을 넘기면 TimeoutError.
+        """
+        timer = timer or StageTimer()
+        file_hash = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            entry = self._entries.setdefault(file_hash, _Entry(file_hash))
+            entry.refcount += 1
+            entry.last_used = time.time()
+        self._ensure_sweeper()
+
+        try:
+            with entry.lock:
+                if not entry.is_live(time.time()):
+                    stale = entry.handle
+                    entry.handle = None
+                    # 재업로드 직후 TTL을 시작해야 하므로 업로드 시작 시각 기준으로 계산
+                    started = time.time()
+                    entry.handle = self._upload(data, mime_type, file_hash, timer, on_status, deadline)
+                    entry.expires_at = started + self.ttl
+                    if stale is not None:
+                        with self._lock:
+                            entry.retired.append(stale)
+                elif on_status:
+                    on_status("기존 업로드 재사용")
+                return file_hash, entry.handle
+        except Exception:
+            self.release(file_hash)
+            raise
+
+    def release(self, file_hash):
+        retired = []
+        with self._lock:
+            entry = self._entries.get(file_hash)
+            if entry is not None and entry.refcount > 0:
+                entry.refcount -= 1
+                entry.last_used = time.time()
+                if entry.refcount == 0:
+                    retired, entry.retired = entry.retired, []
+        # 네트워크 호출은 락 밖에서 수행
+        for handle in retired:
+            self._delete_remote(handle)
+
+    def invalidate(self, file_hash):
+        """원격 파일이 사라졌거나 오류가 난 경우 다음 acquire 때 재업로드하도록 표시"""
+        with self._lock:
+            entry = self._entries.get(file_hash)
+            if entry is not None:
+                entry.expires_at = 0.0
+
+    def report_error(self, file_hash, exc):
+        """호출 실패 원인이 원격 파일 소실이면 핸들을 무효화"""
+        if _is_stale_handle_error(exc):
+            self.invalidate(file_hash)
+
+    @contextmanager
+    def lease(self, data, mime_type="application/pdf"):
+        file_hash, handle = self.acquire(data, mime_type)
+        try:
+            yield handle
+        except Exception as e:
+            self.report_error(file_hash, e)
+            raise
+        finally:
+            self.release(file_hash)
+
+    # ------------------------------------------
+    # 백그라운드 정리
+    # ------------------------------------------
+    def sweep(self):
+        now = time.time()
+        to_delete = []
+        with self._lock:
+            for file_hash, entry in list(self._entries.items()):
+                if entry.refcount > 0:
+                    continue
+                expired = not entry.is_live(now)
+                idle = now - entry.last_used > self.idle_ttl
+                if expired or idle:
+                    del self._entries[file_hash]
+                    if entry.handle is not None:
+                        to_delete.append(entry.handle)
+                to_delete.extend(entry.retired)
+                entry.retired = []
+        # 네트워크 호출은 락 밖에서 수행
+        for handle in to_delete:
+            self._delete_remote(handle)
+        return len(to_delete)
+
+    def _sweep_loop(self):
+        while True:
+            time.sleep(self.sweep_interval)
+            try:
+                self.sweep()
+            except Exception:
+                pass
+
+    def _ensure_sweeper(self):
+        if self._sweeper is None:
+            with self._lock:
+                if self._sweeper is None:
+                    self._sweeper = threading.Thread(target=self._sweep_loop, name="upload-registry-sweeper", daemon=True)
+                    self._sweeper.start()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "files": len(self._entries),
+                "in_use": sum(1 for e in self._entries.values() if e.refcount > 0),
+            }
+
+
+# 프로세스 전역 레지스트리 (모든 탭/세션 공유)
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = UploadRegistry()
+    return _registry
@@ -0,0 +1,110 @@
+import inspect
+import io
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from metrics import record_stage
+from model_clients import load_genai
+
+# ==========================================
+# 업로드 전 파일 스테이징 (요청별 격리 + 용량 상한)
+# ==========================================
+# 업로드할 바이트는 요청마다 별도의 원본(source)으로 준비하고, 사용이 끝나면 반드시 정리한다.
+#   - SDK가 파일 객체 업로드를 지원하면 메모리의 바이트를 BytesIO로 그대로 넘긴다 (디스크 복사 없음)
+#   - 경로만 받는 SDK라면 요청마다 고유한 임시 파일을 만들어 넘기고, 끝나면 삭제
+# 동시에 스테이징 중인 총 바이트에 상한을 두어, 여러 사용자가 한꺼번에 큰 파일을 올려도
+# 메모리/디스크 사용량이 일정 수준을 넘지 않게 한다. (상한 초과 시 자리가 날 때까지 대기)
+
+MAX_STAGED_BYTES = 256 * 1024 * 1024    # 동시에 스테이징할 수 있는 총 바이트
+STAGING_WAIT = 120                      # 자리가 나기를 기다리는 최대 시간 (초, deadline 미지정 시)
+
+
+def _client_accepts_streams():
+    """설치된 SDK의 upload_file이 파일 객체(IOBase)를 받는지"""
+    try:
+        annotation = inspect.signature(load_genai().upload_file).parameters["path"].annotation
+    except (TypeError, ValueError, KeyError):
+        return False
+    return "IOBase" in str(annotation)
+
+
+class StagingArea:
+    def __init__(self, max_bytes=MAX_STAGED_BYTES, use_streams=None):
+        self.max_bytes = max_bytes
+        self._use_streams = use_streams
+        self._cond = threading.Condition()
+        self._staged = 0
+        self._active = 0
+        self._peak = 0
+
+    @property
+    def use_streams(self):
+        if self._use_streams is None:
+            self._use_streams = _client_accepts_streams()
+        return self._use_streams
+
+    def _reserve(self, size, deadline):
+        if size > self.max_bytes:
+            raise ValueError(f"파일이 너무 큽니다 ({size / 1024 / 1024:.0f}MB, 상한 {self.max_bytes / 1024 / 1024:.0f}MB)")
+        deadline = deadline if deadline is not None else time.monotonic() + STAGING_WAIT
+        with self._cond:
+            while self._staged + size > self.max_bytes:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError("다른 업로드가 많아 대기 시간이 초과되었습니다. 잠시 후 다시 시도해 주세요.")
+                self._cond.wait(remaining)
+            self._staged += size
+            self._active += 1
+            self._peak = max(self._peak, self._staged)
+
+    def _release(self, size):
+        with self._cond:
+            self._staged -= size
+            self._active -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def stage(self, data, suffix="", deadline=None):
+        """
+        업로드 원본을 준비하여 넘긴다 (파일 객체 또는 임시 파일 경로). with 블록을 벗어나면 정리.
+        deadline(time.monotonic 기준)까지 자리가 나지 않으면 TimeoutError.
+        """
+        size = len(data)
+        started = time.perf_counter()
+        self._reserve(size, deadline)
+        temp_path = None
+        try:
+            if self.use_streams:
+                source = io.BytesIO(data)
+            else:
+                fd, temp_path = tempfile.mkstemp(prefix="upload_", suffix=suffix)
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                source = temp_path
+            record_stage("staging", time.perf_counter() - started)
+            yield source
+        finally:
+            if temp_path is not None and os.path.exists(temp_path):
+                os.remove(temp_path)
+            self._release(size)
+
+    def stats(self):
+        with self._cond:
+            return {"staged_bytes": self._staged, "active": self._active, "peak_bytes": self._peak}
+
+
+# 프로세스 전역 스테이징 영역 (모든 세션/작업 스레드 공유, 상한도 공유)
+_staging = None
+_staging_lock = threading.Lock()
+
+
+def get_staging():
+    global _staging
+    if _staging is None:
+        with _staging_lock:
+            if _staging is None:
+                _staging = StagingArea()
+    return _staging
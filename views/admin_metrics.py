@@ -0,0 +1,114 @@
+import os
+import time
+
+import streamlit as st
+
+from app_common import get_job_queue, require_admin
+from context_cache import get_context_cache
+from metrics import PROFILE_DIR, pending_profiles, read_records, request_profile, summarize
+from resilient_client import client_stats
+from upload_pipeline import STAGE_LABELS
+from upload_staging import get_staging
+from upload_registry import get_registry
+
+# ==========================================
+# 관리: 성능 지표 (탭별 p50/p95, 문서당 토큰/비용, 단계별 시간, 프로파일링)
+# ==========================================
+
+JOB_KIND_LABELS = {
+    "plan_eval": "1-1 계획서 평가",
+    "plan_batch_item": "1-1 일괄 평가 (업체별)",
+    "risk_review": "1-2 위험성평가 검토",
+    "risk_manual": "2-1 입력형 생성",
+    "risk_manual_item": "2-1 일괄 생성 (공사별)",
+    "risk_pdf": "2-2 PDF 기반 생성",
+}
+
+PERIODS = {
+    "최근 24시간": 24 * 60 * 60,
+    "최근 7일": 7 * 24 * 60 * 60,
+    "전체": None,
+}
+
+def fmt_seconds(value):
+    return "-" if value is None else f"{value:.1f}"
+
+st.subheader("⚙️ 성능 지표")
+require_admin()
+st.info("분석 작업별 단계 소요 시간과 토큰 사용량(.cache/metrics.jsonl)을 집계합니다.")
+
+period = st.radio("기간", list(PERIODS), horizontal=True, key="metrics_period")
+window = PERIODS[period]
+records = read_records(since=time.time() - window if window else None)
+
+if not records:
+    st.caption("아직 기록된 실행이 없습니다.")
+else:
+    summary = summarize(records)
+    st.markdown("#### 탭별 소요 시간 / 비용 (완료 건 기준)")
+    st.dataframe([{"탭": JOB_KIND_LABELS.get(row["tab"], row["tab"]),
+                   "실행": row["runs"],
+                   "실패": row["failed"],
+                   "p50(초)": fmt_seconds(row["p50"]),
+                   "p95(초)": fmt_seconds(row["p95"]),
+                   "호출/건": round(row["calls"], 1),
+                   "입력 토큰/건": round(row["prompt_tokens"]),
+                   "캐시 입력/건": round(row["cached_tokens"]),
+                   "출력 토큰/건": round(row["output_tokens"]),
+                   "비용/건(USD)": f"{row['cost_usd']:.4f}"} for row in summary],
+                 use_container_width=True, hide_index=True)
+
+    prescored = [row for row in summary if row["counts"].get("prescore_items")]
+    if prescored:
+        st.caption("키워드 사전 채점 (건당 평균, 관련 문구가 없어 로컬에서 0점 확정한 항목): " + " · ".join(
+            f"{JOB_KIND_LABELS.get(row['tab'], row['tab'])} {row['counts'].get('prescore_local_items', 0):.1f} / "
+            f"{row['counts']['prescore_items']:.1f}개" for row in prescored))
+
+    st.markdown("#### 단계별 평균 시간 (초)")
+    st.dataframe([{"탭": JOB_KIND_LABELS.get(row["tab"], row["tab"]),
+                   **{STAGE_LABELS.get(name, name): round(seconds, 2) for name, seconds in row["stages"].items()}}
+                  for row in summary],
+                 use_container_width=True, hide_index=True)
+
+    with st.expander("최근 실행 기록"):
+        st.dataframe([{"시각": time.strftime("%m-%d %H:%M:%S", time.localtime(r["ts"])),
+                       "탭": JOB_KIND_LABELS.get(r["tab"], r["tab"]),
+                       "문서": r["title"],
+                       "상태": r["status"],
+                       "소요(초)": r["elapsed"],
+                       "토큰(입력/출력)": f"{r['prompt_tokens']} / {r['output_tokens']}",
+                       "오류": r["error"] or ""} for r in reversed(records[-50:])],
+                     use_container_width=True, hide_index=True)
+
+st.markdown("#### 현재 프로세스 상태")
+calls = client_stats()
+job_stats = get_job_queue().stats()
+staging = get_staging().stats()
+registry = get_registry().stats()
+guide_cache = get_context_cache().stats()
+m1, m2, m3, m4 = st.columns(4)
+m1.metric("모델 호출 / 재시도", f"{calls['calls']} / {calls['retries']}")
+m2.metric("헤지 요청 (선착 성공)", f"{calls['hedges']} ({calls['hedge_wins']})")
+m3.metric("대기 / 진행 중 작업", f"{job_stats.get('queued', 0)} / {job_stats.get('running', 0)}")
+m4.metric("업로드 파일 (사용 중)", f"{registry['files']} ({registry['in_use']})")
+st.caption(f"스테이징 중 {staging['staged_bytes'] / 1024 / 1024:.1f}MB · 최대 {staging['peak_bytes'] / 1024 / 1024:.1f}MB")
+st.caption(f"가이드라인 캐시 {guide_cache['caches']}개 · 캐시 호출 {guide_cache['cached_calls']} / 인라인 호출 "
+           f"{guide_cache['inline_calls']} · 생성 {guide_cache['created']} / 연장 {guide_cache['extended']} / "
+           f"실패 {guide_cache['failures']} / 소실 {guide_cache['stale']}")
+
+st.markdown("#### 프로파일링 (cProfile)")
+col_a, col_b = st.columns([3, 1])
+profile_tab = col_a.selectbox("대상 작업", list(JOB_KIND_LABELS), format_func=JOB_KIND_LABELS.get, key="profile_tab")
+col_b.button("다음 실행 1회 프로파일링", on_click=request_profile, args=(profile_tab,), use_container_width=True)
+st.caption("작업 스레드에서 실행되는 코드만 집계됩니다. 헤지 요청, PDF 구간 분할 분석, 파일 업로드 스레드에서 쓴 시간은 "
+           "프로파일에 나타나지 않으므로 위의 단계별 시간으로 확인하세요. 다른 작업이 프로파일링 중이면 이번 실행은 건너뜁니다.")
+waiting = pending_profiles()
+if waiting:
+    st.caption("대기 중: " + ", ".join(JOB_KIND_LABELS.get(tab, tab) for tab in sorted(waiting)))
+
+if os.path.isdir(PROFILE_DIR):
+    summaries = sorted((f for f in os.listdir(PROFILE_DIR) if f.endswith(".txt")), reverse=True)[:5]
+    for file_name in summaries:
+        with st.expander(file_name):
+            with open(os.path.join(PROFILE_DIR, file_name), encoding="utf-8") as f:
+                st.code(f.read())
@@ -0,0 +1,115 @@
+import time
+
+import altair as alt
+import pandas as pd
+import streamlit as st
+
+from eval_history import KIND_PLAN, KIND_RISK_REVIEW, get_eval_history
+
+# ==========================================
+# 평가 이력 대시보드 (업체별 점수 추이 / 항목별 취약점)
+# ==========================================
+# 1-1/1-2 평가가 끝날 때마다 작업 함수가 기록한 이력(.cache/eval_history.sqlite3)을 집계한다.
+# 집계는 모두 SQLite 색인 범위 조회로 하고, 화면에는 집계 결과(업체 x 기간 / 업체 x 항목)만 가져온다.
+
+HISTORY_KINDS = {KIND_PLAN: "1-1 계획서 평가", KIND_RISK_REVIEW: "1-2 위험성평가 검토"}
+
+PERIODS = {
+    "최근 3개월": 90,
+    "최근 6개월": 180,
+    "최근 1년": 365,
+    "전체": None,
+}
+
+DEFAULT_CONTRACTORS = 10    # 추이/히트맵에 기본으로 올리는 업체 수 (평가 수 순)
+MAX_HEATMAP_ITEMS = 20      # 히트맵에 올리는 최대 항목 수 (1-2는 항목명이 자유 기술이라 평가 수 순)
+EVALUATION_LIMIT = 100      # 업체별 평가 목록 최대 건수
+
+history = get_eval_history()
+
+def fmt_time(ts):
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(ts))
+
+def render_trend(kind, contractors, since):
+    rows = history.trend(kind, contractors, since)
+    if not rows:
+        return
+    st.markdown("#### 📈 업체별 총점 추이 (월 평균)")
+    trend = pd.DataFrame(rows).pivot(index="period", columns="contractor", values="avg_total")
+    st.line_chart(trend)
+
+def render_heatmap(kind, contractors, since):
+    rows = [r for r in history.item_scores(kind, contractors, since) if r["rate"] is not None]
+    if not rows:
+        return
+    st.markdown("#### 🧩 항목별 득점률 (업체 x 항목, 낮을수록 취약)")
+    cells = pd.DataFrame(rows)
+    items = cells.groupby(["item_key", "label"])["evaluations"].sum().nlargest(MAX_HEATMAP_ITEMS).reset_index()
+    cells = cells[cells["item_key"].isin(items["item_key"])]
+    chart = alt.Chart(cells).mark_rect().encode(
+        x=alt.X("label:N", title="항목", sort=list(items.sort_values("item_key")["label"])),
+        y=alt.Y("contractor:N", title="업체", sort=contractors),
+        color=alt.Color("rate:Q", title="득점률", scale=alt.Scale(domain=[0, 1], scheme="redyellowgreen")),
+        tooltip=[alt.Tooltip("contractor:N", title="업체"), alt.Tooltip("label:N", title="항목"),
+                 alt.Tooltip("rate:Q", title="득점률", format=".0%"), alt.Tooltip("evaluations:Q", title="평가 수")],
+    )
+    st.altair_chart(chart, use_container_width=True)
+    st.caption("득점률 = 기간 내 항목 점수 합 / 만점 합. 감점 항목(만점 0점)은 제외합니다.")
+
+def render_contractor(kind, contractor, since):
+    evaluations = history.evaluations(kind, contractor, since, limit=EVALUATION_LIMIT)
+    st.dataframe([{"평가 시각": fmt_time(e["created"]), "공사명": e["project"] or "", "파일": e["file_name"],
+                   "총점": e["total"], "판정": e["grade"] or "", "모델": e["model"],
+                   "소요(초)": round(e["elapsed"] or 0, 1)}
+                  for e in evaluations], use_container_width=True, hide_index=True)
+    if not evaluations:
+        return
+    chosen = st.selectbox("항목별 점수/근거 보기", evaluations,
+                          format_func=lambda e: f"{fmt_time(e['created'])} · {e['file_name']} ({e['total']:g}점)",
+                          key=f"history_evaluation_{kind}")
+    st.dataframe([{"항목": i["label"] or i["item_key"], "점수": i["score"], "만점": i["max_score"],
+                   "판정": i["judgment"] or "", "근거": i["evidence"] or ""} for i in history.items(chosen["id"])],
+                 use_container_width=True, hide_index=True)
+
+st.subheader("📈 평가 이력 대시보드")
+st.info("1-1/1-2 평가 결과를 업체별로 모아 점수 추이와 항목별 취약점을 보여줍니다. (평가가 끝나면 자동 기록)")
+
+col_a, col_b = st.columns(2)
+history_kind = col_a.radio("평가 종류", list(HISTORY_KINDS), format_func=HISTORY_KINDS.get, horizontal=True,
+                           key="history_kind")
+history_period = col_b.radio("기간", list(PERIODS), horizontal=True, key="history_period")
+history_days = PERIODS[history_period]
+history_since = time.time() - history_days * 24 * 60 * 60 if history_days else None
+
+summary = history.summary(history_kind, history_since)
+if not summary["evaluations"]:
+    st.caption("기간 내 기록된 평가가 없습니다.")
+else:
+    m1, m2, m3 = st.columns(3)
+    m1.metric("평가 수", f"{summary['evaluations']:,}")
+    m2.metric("업체 수", f"{summary['contractors']:,}")
+    m3.metric("평균 총점", f"{summary['avg_total']:.1f}")
+
+    weakest = history.weakest_items(history_kind, history_since)
+    if weakest:
+        with st.expander("⚠️ 전체 업체 기준 취약 항목 (득점률 낮은 순)"):
+            st.dataframe([{"항목": w["label"], "득점률": f"{w['rate']:.0%}", "평가 수": w["evaluations"]} for w in weakest],
+                         use_container_width=True, hide_index=True)
+
+    search = st.text_input("업체 검색", placeholder="업체명 일부", key="history_search")
+    contractor_rows = history.contractors(history_kind, history_since, search=search)
+    names = [r["contractor"] for r in contractor_rows]
+    # 검색어/기간이 바뀌면 선택지가 바뀌므로 선택 상태도 새로 시작
+    selected = st.multiselect("비교할 업체 (평가 수 순)", names, default=names[:DEFAULT_CONTRACTORS],
+                              key=f"history_contractors_{history_kind}_{history_period}_{search}")
+    render_trend(history_kind, selected, history_since)
+    render_heatmap(history_kind, selected, history_since)
+
+    st.markdown("#### 🏢 업체별 평가 기록")
+    with st.expander(f"업체 목록 ({len(contractor_rows)}곳)"):
+        st.dataframe([{"업체": r["contractor"], "평가 수": r["evaluations"], "평균 총점": round(r["avg_total"] or 0, 1),
+                       "최근 평가": fmt_time(r["last"])} for r in contractor_rows],
+                     use_container_width=True, hide_index=True)
+    if names:
+        contractor = st.selectbox("업체 선택", names, key="history_contractor")
+        render_contractor(history_kind, contractor, history_since)
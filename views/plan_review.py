@@ -0,0 +1,170 @@
+import uuid
+
+import streamlit as st
+
+from app_common import (JOB_REFRESH_SECONDS, PLAN_EVAL_MODES, chunk_options, get_job_queue, get_owner, get_result_store, job_panel,
+                        render_revision_delta, result_header, show_stored_result, submit_job)
+from batch_eval import collect_documents, empty_result, rank_results, build_summary_workbook
+from job_queue import ACTIVE_STATUSES
+from plan_eval import eligibility, total_score as plan_total_score
+
+# ==========================================
+# 1-1. 수급업체 안전보건관리계획서 정량 평가 (단건 / 일괄)
+# ==========================================
+# 채점은 백그라운드 작업 큐에서 실행되고, 이 화면은 진행 상황과 결과만 표시한다.
+
+BATCH_JOB_LIMIT = 500       # 일괄 평가 진행 상황 조회 시 읽는 최대 작업 수
+
+# 항목별 채점 주체 (로컬 사전 채점 / 수정본에서 이전 결과를 그대로 쓴 항목 / 그 외 AI)
+SOURCE_LABELS = {"local": "로컬", "carried": "이전 결과"}
+
+result_store = get_result_store()
+
+def plan_display_rows(eval_data):
+    """1-1 채점 결과 표 행 (스트리밍 중 일부 키가 빠진 항목도 표시)"""
+    return [{"항목": f"{i.get('item_no', '')}. {i.get('category', '')}", "점수": f"{i.get('score', '')}/{i.get('max_score', '')}",
+             "등급": i.get('judgment', ''), "근거": i.get('evidence', ''),
+             "채점": SOURCE_LABELS.get(i.get('source'), "AI")} for i in eval_data]
+
+def batch_display_rows(batch_results):
+    """1-1 일괄 평가 결과 표 행 (총점 순)"""
+    return [{"업체명": r["contractor"],
+             "총점": r["total"],
+             "판정": r["eligibility"] or "평가 실패",
+             "소요(초)": round(r["elapsed"], 1),
+             "비고": r["error"] or ("캐시" if r["from_cache"] else "")} for r in rank_results(batch_results)]
+
+def render_plan_result(entry):
+    data = entry["data"]
+    result_header(entry)
+    for caption in data["captions"]:
+        st.caption(caption)
+    for note in data["notes"]:
+        st.warning(note)
+
+    eval_data = data["eval_data"]
+    total_score = plan_total_score(eval_data)
+    st.markdown(f"## 🏆 종합 점수: **{total_score}점**")
+
+    band_kind, band_message, _ = eligibility(total_score)
+    getattr(st, band_kind)(band_message)
+    render_revision_delta(data.get("revision"), eval_data, key=lambda i: i.get('item_no'),
+                          label=lambda i: f"{i.get('item_no')}. {i.get('category', '')}")
+
+    st.markdown("---")
+    st.table(plan_display_rows(eval_data))
+
+def render_batch_result(entry):
+    data = entry["data"]
+    result_header(entry)
+    batch_results = data["results"]
+    st.dataframe(batch_display_rows(batch_results), use_container_width=True, hide_index=True)
+    failed = sum(1 for r in batch_results if r["error"])
+    st.success(f"일괄 평가 완료: {len(batch_results) - failed}건 성공 / {failed}건 실패 ({data['elapsed']:.1f}초)")
+    st.download_button("📥 평가 결과 요약 엑셀 다운로드", entry["files"]["summary"],
+                       "계획서_일괄평가_결과.xlsx",
+                       "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                       key=f"eval_batch_download_{entry['id']}")
+
+def show_live_items(live_items):
+    """스트리밍: 항목이 완성되는 대로 표와 누적 점수를 갱신"""
+    live_items = sorted(live_items, key=lambda i: i.get('item_no') or 0)
+    running = sum(i.get('score') or 0 for i in live_items)
+    st.markdown(f"### ⏳ 채점 중... {len(live_items)}/17 항목 · 누적 **{running}점**")
+    st.table(plan_display_rows(live_items))
+
+def batch_job_result(queue, job):
+    """일괄 평가 작업 1건 -> 업체별 결과 dict (실패/취소 건 포함)"""
+    if job["status"] == "done":
+        return queue.result(job["id"])
+    if job["status"] == "cancelled":
+        return empty_result(job["title"], "취소됨")
+    return empty_result(job["title"], job["error"])
+
+def batch_panel():
+    """
+    일괄 평가 진행 상황 (업체별 작업을 묶음 단위로 표시, 진행 중이면 주기적으로 자동 갱신).
+    묶음의 모든 작업이 끝나면 요약 엑셀을 만들어 결과 보관소로 옮긴다.
+    """
+    queue = get_job_queue()
+    owner = get_owner()
+    imported = st.session_state.setdefault("imported_jobs", set())
+
+    def panel():
+        groups = {}
+        for job in reversed(queue.list(owner=owner, kind="plan_batch_item", limit=BATCH_JOB_LIMIT)):
+            groups.setdefault(job["job_group"], []).append(job)
+        changed = False
+        for group, members in groups.items():
+            if group in imported:
+                continue
+            finished = [j for j in members if j["status"] not in ACTIVE_STATUSES]
+            batch_results = [batch_job_result(queue, j) for j in finished]
+            if len(finished) < len(members):
+                # 끝나는 순서대로 결과를 표에 추가
+                with st.container(border=True):
+                    st.progress(len(finished) / len(members), text=f"{len(finished)} / {len(members)} 완료")
+                    if batch_results:
+                        st.dataframe(batch_display_rows(batch_results), use_container_width=True, hide_index=True)
+                    active_ids = [j["id"] for j in members if j["status"] in ACTIVE_STATUSES]
+                    st.button("일괄 평가 취소", key=f"cancel_batch_{group}",
+                              on_click=lambda ids=active_ids: [queue.cancel(job_id) for job_id in ids])
+                continue
+            imported.add(group)
+            changed = True
+            elapsed = max(j["finished"] for j in members) - min(j["created"] for j in members)
+            result_store.put("plan_batch", f"{len(members)}개 업체", {"results": batch_results, "elapsed": elapsed},
+                             files={"summary": build_summary_workbook(batch_results)})
+        if changed:
+            st.rerun()
+
+    active = bool(queue.list(owner=owner, kind="plan_batch_item", statuses=ACTIVE_STATUSES, limit=1))
+    st.fragment(panel, run_every=JOB_REFRESH_SECONDS if active else None)()
+
+st.subheader("1-1. 수급업체 안전보건관리계획서 정량 평가")
+st.info("AI가 가이드라인에 따라 점수를 산출합니다.")
+
+eval_mode = st.radio("평가 방식", list(PLAN_EVAL_MODES.values()), horizontal=True, key="eval_mode_1_1")
+
+if eval_mode == PLAN_EVAL_MODES["plan_eval"]:
+    # Key값 충돌 방지를 위해 key 변경
+    user_file = st.file_uploader("업체 제출 계획서(PDF) 업로드", type=["pdf"], key="eval_upload_1_1")
+    col_c, col_p = st.columns(2)
+    eval_contractor = col_c.text_input("업체명 (평가 이력 기록용, 비우면 파일명)", key="eval_contractor_1_1")
+    eval_project = col_p.text_input("공사명 (선택)", key="eval_project_1_1")
+    eval_split, eval_chunk_pages = chunk_options("eval_1_1")
+
+    if st.button("계획서 평가 시작", key="eval_btn_1_1"):
+        if not user_file:
+            st.warning("파일을 업로드해 주세요.")
+        else:
+            submit_job("plan_eval", {"file_name": user_file.name, "pdf_bytes": user_file.getvalue(),
+                                     "chunk_pages": eval_chunk_pages if eval_split else None,
+                                     "contractor": eval_contractor.strip(), "project": eval_project.strip()},
+                       user_file.name)
+
+    job_panel("plan_eval", render_partial=show_live_items)
+    show_stored_result("plan_eval", render_plan_result)
+
+else:
+    # 일괄 평가: 업체별로 작업을 등록하여 공용 작업 풀에서 동시 채점 (일괄 작업 우선순위, 단건 분석이 먼저 실행됨)
+    batch_files = st.file_uploader("업체 제출 계획서 일괄 업로드 (PDF 여러 개 또는 zip)", type=["pdf", "zip"],
+                                   accept_multiple_files=True, key="eval_batch_upload_1_1")
+    st.caption("업체별 채점은 서버 공용 작업 풀에서 동시에 진행되며, 다른 사용자의 단건 분석이 먼저 처리됩니다. "
+               "(API 분당 호출 한도는 공용 속도 제한기가 별도로 지킵니다)")
+    st.caption("평가 이력에는 파일명(확장자 제외)이 업체명으로 기록됩니다.")
+
+    if st.button("일괄 평가 시작", key="eval_batch_btn_1_1"):
+        docs = collect_documents(batch_files or [])
+        if not docs:
+            st.warning("PDF 파일(또는 PDF가 든 zip)을 업로드해 주세요.")
+        else:
+            batch_group = uuid.uuid4().hex
+            job_queue = get_job_queue()
+            for file_name, pdf_bytes in docs:
+                job_queue.submit("plan_batch_item", {"file_name": file_name, "pdf_bytes": pdf_bytes},
+                                 title=file_name, owner=get_owner(), group=batch_group)
+            st.toast(f"{len(docs)}개 업체 일괄 평가 작업이 등록되었습니다.")
+
+    batch_panel()
+    show_stored_result("plan_batch", render_batch_result)
@@ -0,0 +1,180 @@
+import uuid
+
+import streamlit as st
+
+from app_common import (JOB_REFRESH_SECONDS, get_job_queue, get_owner, get_result_store, job_panel, render_risk_excel,
+                        result_header, show_stored_result, submit_job)
+from job_queue import ACTIVE_STATUSES, STATUS_LABELS
+from risk_bulk import HAZARDS, MAX_PROJECTS, build_workbook, build_zip, read_projects, template_csv
+from risk_library import get_risk_library, project_query
+
+# ==========================================
+# 2-1. 공사 내용 직접 입력형 위험성평가 생성 (단건 / 일괄)
+# ==========================================
+# 생성은 백그라운드 작업(analysis_jobs.run_risk_manual)으로 실행된다.
+# 검토를 마친 결과는 위험요인 라이브러리에 등록하여 다음 생성 때 AI 호출 없이 재사용한다.
+# 일괄 생성은 공사마다 작업을 하나씩 등록하고, 엑셀/zip은 내려받기 버튼을 누를 때 작업 결과에서 만든다.
+
+MANUAL_MODES = ["단건 입력", "일괄 생성 (CSV/엑셀 목록)"]
+BULK_JOB_LIMIT = 1000       # 일괄 생성 진행 상황 조회 시 읽는 최대 작업 수
+
+result_store = get_result_store()
+
+def register_rows(entry):
+    data = entry["data"]
+    added = get_risk_library().add(data["new_rows"], context=project_query(data["p_info"]), source=entry["title"])
+    st.session_state[f"library_added_{entry['id']}"] = added
+
+def render_manual_result(entry):
+    render_risk_excel(entry)
+    new_rows = entry["data"].get("new_rows")
+    if not new_rows:
+        return
+    added = st.session_state.get(f"library_added_{entry['id']}")
+    if added is not None:
+        st.caption(f"📚 라이브러리에 {added}개 항목을 등록했습니다. (이미 있던 항목 제외)")
+    else:
+        st.button(f"📚 AI 생성 {len(new_rows)}개 항목을 검토 완료 후 라이브러리에 등록", key=f"library_add_{entry['id']}",
+                  on_click=register_rows, args=(entry,), help="다음에 비슷한 공사를 입력하면 이 항목들을 AI 호출 없이 재사용합니다.")
+
+def bulk_status_rows(members):
+    """일괄 생성 진행 표 행 (작업 상태만 사용, 결과는 읽지 않음)"""
+    return [{"번호": n, "공사명": j["title"], "상태": STATUS_LABELS[j["status"]], "비고": j["error"] or j["message"] or ""}
+            for n, j in enumerate(members, 1)]
+
+def bulk_summary_rows(queue, members):
+    """묶음 완료 시 한 번 만드는 결과 요약 (결과는 한 건씩 읽고 행 수/캡션만 남김)"""
+    rows = []
+    for n, job in enumerate(members, 1):
+        result = queue.result(job["id"]) if job["status"] == "done" else None
+        data = result["data"] if result else {}
+        note = job["error"] or ("취소됨" if job["status"] == "cancelled" else " / ".join(data.get("captions", [])
+                                                                                       + data.get("warnings", [])))
+        rows.append({"번호": n, "공사명": job["title"], "결과": "성공" if result else "실패",
+                     "항목 수": len(data.get("risk_data", [])), "비고": note})
+    return rows
+
+def bulk_panel():
+    """
+    일괄 생성 진행 상황 (공사별 작업을 묶음 단위로 표시, 진행 중이면 주기적으로 자동 갱신).
+    묶음의 모든 작업이 끝나면 요약만 결과 보관소로 옮긴다 (엑셀 바이트는 작업 큐에 두고 내려받을 때 읽음).
+    """
+    queue = get_job_queue()
+    owner = get_owner()
+    imported = st.session_state.setdefault("imported_jobs", set())
+
+    def panel():
+        groups = {}
+        for job in reversed(queue.list(owner=owner, kind="risk_manual_item", limit=BULK_JOB_LIMIT)):
+            groups.setdefault(job["job_group"], []).append(job)
+        changed = False
+        for group, members in groups.items():
+            if group in imported:
+                continue
+            active_ids = [j["id"] for j in members if j["status"] in ACTIVE_STATUSES]
+            if active_ids:
+                done = len(members) - len(active_ids)
+                with st.container(border=True):
+                    st.progress(done / len(members), text=f"{done} / {len(members)} 완료")
+                    st.dataframe(bulk_status_rows(members), use_container_width=True, hide_index=True)
+                    st.button("일괄 생성 취소", key=f"cancel_bulk_{group}",
+                              on_click=lambda ids=active_ids: [queue.cancel(job_id) for job_id in ids])
+                continue
+            imported.add(group)
+            changed = True
+            elapsed = max(j["finished"] for j in members) - min(j["created"] for j in members)
+            result_store.put("risk_bulk", f"{len(members)}개 공사",
+                             {"jobs": [j["id"] for j in members], "rows": bulk_summary_rows(queue, members),
+                              "elapsed": elapsed})
+        if changed:
+            st.rerun()
+
+    active = bool(queue.list(owner=owner, kind="risk_manual_item", statuses=ACTIVE_STATUSES, limit=1))
+    st.fragment(panel, run_every=JOB_REFRESH_SECONDS if active else None)()
+
+def render_bulk_result(entry):
+    data = entry["data"]
+    result_header(entry)
+    rows = data["rows"]
+    st.dataframe(rows, use_container_width=True, hide_index=True)
+    succeeded = sum(1 for r in rows if r["결과"] == "성공")
+    st.success(f"일괄 생성 완료: {succeeded}건 성공 / {len(rows) - succeeded}건 실패 ({data['elapsed']:.1f}초)")
+    if not succeeded:
+        return
+    queue = get_job_queue()
+    job_ids = data["jobs"]
+    col_a, col_b = st.columns(2)
+    # 파일은 버튼을 누를 때 생성 (작업 결과를 한 건씩 읽어 씀)
+    col_a.download_button("📦 공사별 엑셀 zip 다운로드", lambda: build_zip(queue, job_ids, rows),
+                          "위험성평가_일괄.zip", "application/zip",
+                          key=f"bulk_zip_{entry['id']}", use_container_width=True)
+    col_b.download_button("📥 통합 엑셀 다운로드 (공사별 시트)", lambda: build_workbook(queue, job_ids),
+                          "위험성평가_일괄_통합.xlsx",
+                          "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                          key=f"bulk_workbook_{entry['id']}", use_container_width=True)
+    st.caption("생성 결과는 작업 보관 기간(24시간) 동안 다시 내려받을 수 있습니다.")
+
+st.subheader("2-1. 공사 내용 직접 입력")
+st.info("공사 내용을 입력하면 표준 위험성평가표 엑셀을 생성합니다.")
+
+manual_mode = st.radio("생성 방식", MANUAL_MODES, horizontal=True, key="manual_mode_2_1")
+
+if manual_mode == MANUAL_MODES[1]:
+    # 일괄 생성: 공사별로 작업을 등록하여 공용 작업 풀에서 동시 생성 (1건 실패해도 나머지는 계속, 단건 작업보다 나중 순서)
+    st.caption(f"공사명 / 장소 / 기간 / 작업 내용과 위험요인({', '.join(HAZARDS)}) 표시 열이 있는 목록을 올리세요. "
+               f"(최대 {MAX_PROJECTS}건, 위험요인 열에는 O 또는 ✓ 표시)")
+    st.download_button("📄 목록 양식(CSV) 내려받기", template_csv(), "위험성평가_일괄_양식.csv", "text/csv",
+                       key="bulk_template_2_1")
+    bulk_file = st.file_uploader("공사 목록 업로드 (CSV / 엑셀)", type=["csv", "xlsx", "xls"], key="bulk_upload_2_1")
+
+    bulk_projects = []
+    if bulk_file:
+        try:
+            bulk_projects, bulk_problems = read_projects(bulk_file.name, bulk_file.getvalue())
+        except ValueError as e:
+            st.error(str(e))
+        else:
+            for row_no, problem in bulk_problems:
+                st.warning(f"{row_no}행: {problem}")
+            st.dataframe([{"행": p["row"], "공사명": p["p_info"]["name"], "장소": p["p_info"]["loc"],
+                           "기간": p["p_info"]["period"], "위험요인": ", ".join(p["selected_risks"])} for p in bulk_projects],
+                         use_container_width=True, hide_index=True)
+
+    if st.button(f"✨ {len(bulk_projects)}건 일괄 생성", type="primary", disabled=not bulk_projects, key="bulk_btn_2_1"):
+        bulk_group = uuid.uuid4().hex
+        job_queue = get_job_queue()
+        for project in bulk_projects:
+            job_queue.submit("risk_manual_item", {"p_info": project["p_info"], "selected_risks": project["selected_risks"]},
+                             title=project["p_info"]["name"], owner=get_owner(), group=bulk_group)
+        st.toast(f"{len(bulk_projects)}개 공사 일괄 생성 작업이 등록되었습니다.")
+
+    bulk_panel()
+    show_stored_result("risk_bulk", render_bulk_result)
+
+else:
+    with st.container(border=True):
+        col1, col2 = st.columns([1, 1])
+        with col1:
+            p_name = st.text_input("공사명", placeholder="예: 3층 객실 리모델링")
+            p_loc = st.text_input("장소", placeholder="예: 본관 3층")
+            p_period = st.text_input("기간", placeholder="예: 26.02.01 ~ 02.15")
+            p_content = st.text_area("작업 내용", height=100)
+        with col2:
+            risk_cols = st.columns(3)
+            r_check = [
+                risk_cols[0].checkbox("🔥 화기"), risk_cols[0].checkbox("⚡ 전기"),
+                risk_cols[1].checkbox("🪜 고소"), risk_cols[1].checkbox("🏗️ 중량물"),
+                risk_cols[2].checkbox("☠️ 위험물"), risk_cols[2].checkbox("🕳️ 밀폐")
+            ]
+            selected_risks = [["화기","전기","고소","중량물","위험물","밀폐"][i] for i, v in enumerate(r_check) if v]
+            st.markdown("---")
+            gen_btn_manual = st.button("✨ 엑셀 생성 (입력형)", type="primary", use_container_width=True)
+
+    if gen_btn_manual:
+        if not p_name: st.warning("공사명을 입력하세요.")
+        else:
+            manual_info = {"name":p_name, "loc":p_loc, "period":p_period, "content":p_content}
+            submit_job("risk_manual", {"p_info": manual_info, "selected_risks": selected_risks}, p_name)
+
+    job_panel("risk_manual")
+    show_stored_result("risk_manual", render_manual_result)
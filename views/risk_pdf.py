@@ -0,0 +1,25 @@
+import streamlit as st
+
+from app_common import chunk_options, job_panel, render_risk_excel, show_stored_result, submit_job
+
+# ==========================================
+# 2-2. 안전보건관리계획서(PDF) 기반 위험성평가 자동 생성
+# ==========================================
+# 분석은 백그라운드 작업(analysis_jobs.run_risk_pdf)으로 실행되며,
+# 응답에서 데이터를 찾지 못한 경우 작업 패널 위에 AI 원문과 함께 알린다.
+
+st.subheader("2-2. 안전보건관리계획서(PDF) 기반 자동 생성")
+st.info("PDF 계획서를 분석하여 공사 개요와 위험요인을 스스로 추출합니다.")
+
+pdf_file = st.file_uploader("계획서(PDF) 업로드", type=["pdf"], key="risk_pdf_upload")
+pdf_split, pdf_chunk_pages = chunk_options("risk_pdf")
+
+if st.button("🚀 분석 및 엑셀 생성", key="pdf_risk_btn", type="primary"):
+    if not pdf_file: 
+        st.warning("PDF를 업로드하세요.")
+    else:
+        submit_job("risk_pdf", {"file_name": pdf_file.name, "pdf_bytes": pdf_file.getvalue(),
+                                "chunk_pages": pdf_chunk_pages if pdf_split else None}, pdf_file.name)
+
+job_panel("risk_pdf")
+show_stored_result("risk_pdf", render_risk_excel)
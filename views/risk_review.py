@@ -0,0 +1,71 @@
+import streamlit as st
+
+from app_common import job_panel, render_revision_delta, result_header, show_stored_result, submit_job
+
+# ==========================================
+# 1-2. 위험성평가 적정성 검토
+# ==========================================
+# 검토는 백그라운드 작업(analysis_jobs.run_risk_review)으로 실행된다.
+
+def render_risk_cards(result_data):
+    """1-2 검토 항목 카드"""
+    for item in result_data:
+        with st.container(border=True):
+            c1, c2 = st.columns([3, 1])
+            with c1:
+                carried = " · 이전 결과" if item.get('source') == "carried" else ""
+                st.markdown(f"**📌 {item.get('category', '')}** ({item.get('status', '')}{carried})")
+                st.caption(item.get('comment', ''))
+            with c2:
+                st.metric("점수", f"{item.get('score', '')} / {item.get('max_score', '')}")
+
+def render_checks(checks):
+    """사전 자동 점검에서 발견된 기계적 결함 (항목별 건수 + 예시 행)"""
+    if not checks:
+        return
+    with st.expander(f"🔎 사전 자동 점검: 결함 {len(checks)}종 발견"):
+        for check in checks:
+            st.markdown(f"**{check['label']}** · {check['count']:,}행")
+            st.caption(" / ".join(check["examples"]))
+
+def render_risk_review(entry):
+    data = entry["data"]
+    result_header(entry)
+    for caption in data["captions"]:
+        st.caption(caption)
+    for warning in data["warnings"]:
+        st.warning(warning)
+    render_checks(data.get("checks", []))
+
+    result_data = data["items"]
+    total_r_score = sum(item['score'] for item in result_data)
+    st.markdown(f"## 📊 검토 결과: **{total_r_score}점**")
+    render_revision_delta(data.get("revision"), result_data, key=lambda i: " ".join(str(i.get('category', '')).split()),
+                          label=lambda i: i.get('category', ''))
+    st.markdown("---")
+    render_risk_cards(result_data)
+
+def show_live_risk_items(live_items):
+    """스트리밍: 항목 카드와 누적 점수를 완성되는 대로 표시"""
+    running = sum(i.get('score') or 0 for i in live_items)
+    st.markdown(f"### ⏳ 검토 중... {len(live_items)}개 항목 · 누적 **{running}점**")
+    render_risk_cards(live_items)
+
+st.subheader("1-2. 위험성평가 적정성 검토")
+st.info("제출된 위험성평가서(PDF, Excel)가 가이드라인에 부합하는지 분석합니다.")
+
+risk_eval_file = st.file_uploader("위험성평가서 업로드 (PDF/Excel)", type=["pdf", "xlsx", "xls"], key="eval_upload_1_2")
+col_c, col_p = st.columns(2)
+risk_contractor = col_c.text_input("업체명 (평가 이력 기록용, 비우면 파일명)", key="eval_contractor_1_2")
+risk_project = col_p.text_input("공사명 (선택)", key="eval_project_1_2")
+
+if st.button("위험성평가 검토 시작", key="btn_eval_1_2"):
+    if not risk_eval_file:
+        st.warning("파일을 업로드해 주세요.")
+    else:
+        submit_job("risk_review", {"file_name": risk_eval_file.name, "file_bytes": risk_eval_file.getvalue(),
+                                   "contractor": risk_contractor.strip(), "project": risk_project.strip()},
+                   risk_eval_file.name)
+
+job_panel("risk_review", render_partial=show_live_risk_items)
+show_stored_result("risk_review", render_risk_review)